@@ -0,0 +1,91 @@
+import asyncio
+from typing import Any, Awaitable, Callable, List, Optional, Sequence, Set
+
+# Regroupement des requêtes concurrentes en un seul appel vectorisé.
+# Les éléments soumis pendant 'max_wait' secondes (ou jusqu'à 'max_batch_size' éléments)
+# sont prédits ensemble, puis le futur de chaque appelant reçoit son propre résultat.
+class MicroBatcher:
+    def __init__(self, predict_batch: Callable[[List[Any]], Awaitable[Sequence[Any]]],
+                 max_batch_size: int = 32, max_wait: float = 0.002):
+        self.predict_batch = predict_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait)
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        # Lots en cours de traitement : la boucle d'événements ne garde qu'une référence faible sur les tâches
+        self._dispatches: Set[asyncio.Task] = set()
+
+    # Soumet un élément et attend le résultat de son lot
+    async def submit(self, item: Any) -> Any:
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.ensure_future(self._collect())
+        future = asyncio.get_event_loop().create_future()
+        self._queue.put_nowait((item, future))
+        return await future
+
+    # Boucle de constitution des lots
+    async def _collect(self):
+        loop = asyncio.get_event_loop()
+        batch = []
+        try:
+            while True:
+                batch = [await self._queue.get()]
+                deadline = loop.time() + self.max_wait
+                while len(batch) < self.max_batch_size:
+                    if not self._queue.empty():
+                        batch.append(self._queue.get_nowait())
+                        continue
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+                self._start_dispatch(batch)
+                batch = []
+        except asyncio.CancelledError:
+            # Arrêt pendant la constitution d'un lot : les éléments déjà retirés de la file sont tout de même prédits
+            if batch:
+                self._start_dispatch(batch)
+            raise
+
+    # Le lot est traité en tâche de fond pour pouvoir constituer le suivant
+    def _start_dispatch(self, batch):
+        task = asyncio.ensure_future(self._dispatch(batch))
+        self._dispatches.add(task)
+        task.add_done_callback(self._dispatches.discard)
+
+    async def _dispatch(self, batch):
+        items = [item for item, _ in batch]
+        try:
+            results = await self.predict_batch(items)
+        except Exception as e:
+            if len(batch) == 1:
+                _, future = batch[0]
+                if not future.done():
+                    future.set_exception(e)
+                return
+            # Un élément invalide ne doit pas faire échouer les autres : on reprend un par un
+            for entry in batch:
+                await self._dispatch([entry])
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def close(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+            self._worker = None
+        # Éléments encore en file : prédits en derniers lots
+        pending = []
+        while self._queue is not None and not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        for start in range(0, len(pending), self.max_batch_size):
+            self._start_dispatch(pending[start:start + self.max_batch_size])
+        # Les lots déjà constitués sont terminés pour que leurs appelants reçoivent une réponse
+        if self._dispatches:
+            await asyncio.gather(*self._dispatches, return_exceptions=True)
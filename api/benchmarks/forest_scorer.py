@@ -0,0 +1,108 @@
+import argparse
+import io
+import json
+import os
+import sys
+import timeit
+import tracemalloc
+import numpy as np
+import pandas as pd
+from joblib import dump, load
+
+# Comparaison du scorer de forêt aplatie (forest.py) avec le pipeline sklearn du modèle RF :
+# parité des prédictions sur des voitures générées, latence par taille de lot et mémoire
+# (taille de l'artefact, des tableaux de la forêt et pic d'allocation pendant une prédiction).
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, API_DIR)
+
+from fast_path import final_estimator  # noqa: E402
+from forest import ForestScorer, export_features, export_forest  # noqa: E402
+from main import Car, load_metadata  # noqa: E402
+from payloads import make_cars  # noqa: E402
+
+
+# Durée moyenne d'un appel (ms), la répétition la plus rapide étant retenue
+def time_call(function, repeat: int) -> float:
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1000
+
+
+def peak_allocation(function) -> int:
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def serialized_size(obj) -> int:
+    buffer = io.BytesIO()
+    dump(obj, buffer)
+    return buffer.tell()
+
+
+def main():
+    model_dir = os.environ.get("MODEL_DIR", API_DIR)
+    parser = argparse.ArgumentParser(description="Forêt aplatie contre pipeline sklearn (parité, latence, mémoire).")
+    parser.add_argument("--model", default=os.path.join(model_dir, "RF_model.joblib"))
+    parser.add_argument("--metadata", default=os.path.join(model_dir, "model_metadata.json"))
+    parser.add_argument("--batch-sizes", type=int, nargs="*", default=[1, 8, 32, 128, 512, 2048])
+    parser.add_argument("--parity-rows", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Fichier JSON de résultats")
+    args = parser.parse_args()
+
+    pipeline = load(args.model)
+    features = list(pipeline.named_steps['features_preprocessing'].feature_names_in_)
+    layout = export_features(pipeline)
+    # Parcours vectorisé seul (sans repli sur sklearn pour les grands lots), feuilles float64 et float32
+    scorers = {dtype: ForestScorer(layout, export_forest(pipeline, np.dtype(dtype))) for dtype in ("float64", "float32")}
+
+    cars = make_cars(max([args.parity_rows] + args.batch_sizes), Car.schema(), load_metadata(args.metadata), args.seed)
+    columns = {feature: [car[feature] for car in cars] for feature in features}
+    frame = pd.DataFrame(columns)[features]
+
+    reference = pipeline.predict(frame.iloc[:args.parity_rows])
+    parity_columns = {feature: values[:args.parity_rows] for feature, values in columns.items()}
+    parity = {}
+    for dtype, scorer in scorers.items():
+        difference = np.abs(scorer.predict(parity_columns) - reference)
+        parity[dtype] = {"max_abs_error": float(difference.max()),
+                         "max_rel_error": float((difference / np.abs(reference)).max())}
+    assert parity["float64"]["max_rel_error"] < 1e-9, parity
+
+    estimator = final_estimator(pipeline)
+    memory = {
+        "artifact_bytes": os.path.getsize(args.model),
+        "sklearn_forest_serialized_bytes": serialized_size(estimator),
+        "trees": len(estimator.estimators_),
+        "nodes": int(sum(tree.tree_.node_count for tree in estimator.estimators_)),
+        "max_depth": scorers["float64"].max_depth,
+        **{f"flat_{dtype}_bytes": scorer.nbytes() for dtype, scorer in scorers.items()},
+    }
+
+    latency = []
+    for batch_size in args.batch_sizes:
+        batch_columns = {feature: values[:batch_size] for feature, values in columns.items()}
+        batch_frame = frame.iloc[:batch_size]
+        result = {"batch_size": batch_size,
+                  "sklearn_ms": time_call(lambda: pipeline.predict(pd.DataFrame(batch_columns)[features]), args.repeat),
+                  "sklearn_peak_bytes": peak_allocation(lambda: pipeline.predict(batch_frame))}
+        for dtype, scorer in scorers.items():
+            result[f"flat_{dtype}_ms"] = time_call(lambda: scorer.predict(batch_columns), args.repeat)
+            result[f"flat_{dtype}_peak_bytes"] = peak_allocation(lambda: scorer.predict(batch_columns))
+        latency.append({key: round(value, 3) if isinstance(value, float) else value for key, value in result.items()})
+        print(json.dumps(latency[-1]), file=sys.stderr)
+
+    report = json.dumps({"parity": parity, "memory": memory, "latency": latency}, indent=2)
+    print(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
+
+
+if __name__ == "__main__":
+    main()
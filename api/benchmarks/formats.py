@@ -0,0 +1,126 @@
+import argparse
+import datetime
+import json
+import sys
+import time
+from typing import Dict, List
+import httpx
+import numpy as np
+import pyarrow as pa
+
+from loadtest import free_port, git_commit, start_server
+from payloads import make_cars
+
+# Débit de la prédiction groupée (voitures/s) selon le format du lot : JSON (/predict/batch), NDJSON
+# (/predict/batch/ndjson) et Apache Arrow IPC (/predict/batch/arrow), pour chaque régresseur et taille de lot.
+# Les corps sont encodés avant la mesure : seul le coût côté serveur (et le transport) est comparé.
+# Le cache des prédictions est désactivé par défaut pour que chaque lot atteigne le modèle.
+
+ARROW_STREAM_TYPE = "application/vnd.apache.arrow.stream"
+
+
+def arrow_body(cars: List[Dict]) -> bytes:
+    table = pa.Table.from_pylist(cars)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def request_formats(cars: List[Dict]) -> Dict[str, Dict]:
+    return {
+        "json": {"path": "/predict/batch", "body": json.dumps(cars).encode(),
+                 "headers": {"Content-Type": "application/json"}},
+        "ndjson": {"path": "/predict/batch/ndjson", "body": "\n".join(json.dumps(car) for car in cars).encode(),
+                   "headers": {"Content-Type": "application/x-ndjson"}},
+        "arrow": {"path": "/predict/batch/arrow", "body": arrow_body(cars),
+                  "headers": {"Content-Type": ARROW_STREAM_TYPE, "Accept": ARROW_STREAM_TYPE}},
+    }
+
+
+def decode_predictions(response: httpx.Response) -> np.ndarray:
+    if response.headers["content-type"].startswith(ARROW_STREAM_TYPE):
+        return pa.ipc.open_stream(response.content).read_all().column("prediction").to_numpy()
+    return np.array(response.json()["predictions"])
+
+
+def post(client: httpx.Client, regressor: str, request: Dict) -> httpx.Response:
+    response = client.post(request["path"], params={"regressor": regressor}, content=request["body"],
+                           headers=request["headers"])
+    response.raise_for_status()
+    return response
+
+
+# Requêtes l'une après l'autre pendant 'duration' secondes, après une requête d'échauffement
+def measure(client: httpx.Client, regressor: str, request: Dict, n_rows: int, duration: float) -> Dict:
+    post(client, regressor, request)
+    latencies = []
+    start = time.perf_counter()
+    while time.perf_counter() - start < duration:
+        sent = time.perf_counter()
+        post(client, regressor, request)
+        latencies.append(time.perf_counter() - sent)
+    elapsed = time.perf_counter() - start
+    return {"requests": len(latencies), "request_bytes": len(request["body"]),
+            "rows_per_second": round(len(latencies) * n_rows / elapsed, 1),
+            "latency_ms": {"p50": round(float(np.percentile(latencies, 50)) * 1000, 3),
+                           "mean": round(float(np.mean(latencies)) * 1000, 3)}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Débit de la prédiction groupée : JSON, NDJSON et Arrow IPC.")
+    parser.add_argument("--url", default=None, help="API déjà démarrée (sinon uvicorn est lancé localement)")
+    parser.add_argument("--env", action="append", default=["PREDICTION_CACHE_SIZE=0"], metavar="NOM=VALEUR",
+                        help="Variable d'environnement de l'API lancée localement (répétable)")
+    parser.add_argument("--regressors", nargs="*", default=["LR", "Ridge", "RF"])
+    parser.add_argument("--formats", nargs="*", default=["json", "ndjson", "arrow"])
+    parser.add_argument("--batch-sizes", type=int, nargs="*", default=[100, 1000, 10000])
+    parser.add_argument("--duration", type=float, default=3, help="Durée mesurée par combinaison (s)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Fichier JSON de résultats")
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if url is None:
+        port = free_port()
+        server = start_server(port, 1, dict(item.split("=", 1) for item in args.env))
+        url = f"http://127.0.0.1:{port}"
+    results = []
+    try:
+        car_schema = httpx.get(f"{url}/openapi.json").json()["components"]["schemas"]["Car"]
+        metadata = httpx.get(f"{url}/metadata").json()
+        with httpx.Client(base_url=url, timeout=300) as client:
+            for batch_size in args.batch_sizes:
+                cars = make_cars(batch_size, car_schema, metadata, seed=args.seed)
+                requests = {name: request for name, request in request_formats(cars).items() if name in args.formats}
+                for regressor in args.regressors:
+                    # Les formats doivent donner exactement les mêmes prédictions
+                    predictions = {name: decode_predictions(post(client, regressor, request))
+                                   for name, request in requests.items()}
+                    reference = next(iter(predictions.values()))
+                    for name, values in predictions.items():
+                        assert np.allclose(values, reference, rtol=0, atol=1e-9), f"{regressor} {name}: prédictions différentes"
+                    for name, request in requests.items():
+                        result = {"regressor": regressor, "batch_size": batch_size, "format": name,
+                                  **measure(client, regressor, request, batch_size, args.duration)}
+                        results.append(result)
+                        print(json.dumps(result), file=sys.stderr)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    report = json.dumps({
+        "meta": {"commit": git_commit(), "date": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+                 "url": args.url or "local", "env": args.env, "duration_s": args.duration, "seed": args.seed},
+        "results": results,
+    }, indent=2)
+    print(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
+
+
+if __name__ == "__main__":
+    main()
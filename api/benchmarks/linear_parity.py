@@ -0,0 +1,68 @@
+import argparse
+import os
+import sys
+import numpy as np
+from sklearn.model_selection import train_test_split
+
+# Parité du scorer linéaire (fast_path.LinearScorer) avec le pipeline sklearn sur les vraies données :
+# LR et Ridge sont ajustés comme dans train.py (filtrage, regroupement des catégories rares, préprocesseur),
+# puis les deux prédictions sont comparées sur les lignes de test, y compris celles des catégories
+# supprimées par drop='first' (poids nul dans la table).
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, API_DIR)
+
+from dataset_cache import DATASET_URL, DEFAULT_CACHE_DIR, load_dataset  # noqa: E402
+from fast_path import LinearScorer, export_linear  # noqa: E402
+from train import regroup_categories, train_model  # noqa: E402
+
+
+def prepare(dataset, sample, seed):
+    dataset = dataset[(dataset['mileage'] >= 0) & (dataset['engine_power'] != 0)]
+    if sample and sample < len(dataset):
+        dataset = dataset.sample(sample, random_state=seed)
+    threshold = 0.005 * len(dataset)
+    for column in ['model_key', 'fuel', 'paint_color', 'car_type']:
+        dataset = regroup_categories(dataset, column, threshold)
+    Y = dataset['rental_price_per_day']
+    X = dataset.drop('rental_price_per_day', axis=1)
+    return train_test_split(X, Y, test_size=0.2, random_state=seed)
+
+
+def check_regressor(regressor, X_train, X_test, Y_train, Y_test, rtol, atol):
+    pipeline, _ = train_model(X_train, Y_train, X_test, Y_test, regressor)
+    scorer = LinearScorer(export_linear(pipeline))
+    columns = {column: X_test[column].astype(object).tolist() if column in scorer.table["categorical"]
+               else X_test[column].to_numpy() for column in X_test.columns}
+    expected = pipeline.predict(X_test)
+    np.testing.assert_allclose(scorer.predict(columns), expected, rtol=rtol, atol=atol)
+
+    # Les catégories de référence (supprimées par drop='first') doivent figurer parmi les lignes comparées
+    encoder = pipeline.named_steps['features_preprocessing'].named_transformers_['cat'].named_steps['encoder']
+    baselines = {column: str(categories[dropped]) for column, categories, dropped
+                 in zip(scorer.table["categorical"], encoder.categories_, encoder.drop_idx_)}
+    for column, baseline in baselines.items():
+        assert baseline in set(columns[column]), f"{regressor} : catégorie de référence {column}={baseline} absente du test"
+    error = float(np.max(np.abs(scorer.predict(columns) - expected)))
+    print(f"{regressor} : {len(X_test)} lignes de test, écart maximal {error:.3g}, références {baselines}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parité du scorer linéaire avec le pipeline sklearn sur le jeu de données.")
+    parser.add_argument("--dataset", default=DATASET_URL, help="URL ou chemin local du CSV des prix")
+    parser.add_argument("--cache_dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--sample", type=int, default=0, help="Nombre de lignes tirées du jeu de données (0 : toutes)")
+    parser.add_argument("--regressors", nargs="*", default=["LR", "Ridge"], choices=["LR", "Ridge"])
+    parser.add_argument("--rtol", type=float, default=1e-9)
+    parser.add_argument("--atol", type=float, default=1e-6)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    X_train, X_test, Y_train, Y_test = prepare(load_dataset(args.dataset, cache_dir=args.cache_dir), args.sample, args.seed)
+    for regressor in args.regressors:
+        check_regressor(regressor, X_train, X_test, Y_train, Y_test, args.rtol, args.atol)
+    print("Parité vérifiée.")
+
+
+if __name__ == "__main__":
+    main()
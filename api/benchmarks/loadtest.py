@@ -0,0 +1,223 @@
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import time
+from typing import Dict, List
+import httpx
+import numpy as np
+
+from payloads import load_cars, make_cars
+
+# Test de charge de /predict : démarre l'API localement (uvicorn) ou cible --url, puis envoie des requêtes
+# en boucle fermée avec N clients asynchrones concurrents. Pour chaque scénario (un régresseur seul, ou un
+# mélange pondéré) et chaque niveau de concurrence : débit et latences p50/p95/p99, en JSON comparable
+# d'un commit à l'autre (--baseline affiche l'écart avec un résultat précédent).
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=API_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+# Démarrage de l'API dans un processus uvicorn, prêt lorsque /models répond (ses logs vont sur stderr)
+def start_server(port: int, workers: int, env: Dict[str, str], timeout: float = 120) -> subprocess.Popen:
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'main:app', '--host', '127.0.0.1', '--port', str(port),
+         '--workers', str(workers), '--log-level', 'warning'],
+        cwd=API_DIR, env={**os.environ, **env}, stdout=sys.stderr)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with code {server.returncode}")
+        try:
+            if httpx.get(f'http://127.0.0.1:{port}/models', timeout=1).status_code == 200:
+                return server
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError(f"API not ready after {timeout} s")
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    weights = {}
+    for part in mix.split(','):
+        name, weight = part.split('=')
+        weights[name.strip()] = float(weight)
+    return weights
+
+
+# Un client : envoie des requêtes l'une après l'autre jusqu'à l'échéance
+async def client_loop(client, cars, regressors, weights, deadline, samples, rng):
+    while time.perf_counter() < deadline:
+        regressor = rng.choices(regressors, weights)[0]
+        car = cars[rng.randrange(len(cars))]
+        start = time.perf_counter()
+        try:
+            response = await client.post('/predict', params={'regressor': regressor}, json=car)
+            ok = response.status_code == 200 and 'prediction' in response.json()
+        except httpx.HTTPError:
+            ok = False
+        samples.append((regressor, time.perf_counter() - start, ok))
+
+
+async def run_level(url, cars, weights, concurrency, duration, warmup, seed):
+    regressors, shares = list(weights), list(weights.values())
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        # Échauffement (résultats ignorés) puis mesure
+        for phase_duration in (warmup, duration):
+            samples: List = []
+            start = time.perf_counter()
+            deadline = start + phase_duration
+            await asyncio.gather(*[
+                client_loop(client, cars, regressors, shares, deadline, samples, random.Random(seed + worker))
+                for worker in range(concurrency)])
+            elapsed = time.perf_counter() - start
+    return samples, elapsed
+
+
+def summarize(samples, elapsed) -> Dict:
+    latencies = np.array([latency for _, latency, ok in samples if ok]) * 1000
+    errors = sum(not ok for _, _, ok in samples)
+    summary = {
+        'requests': len(samples),
+        'errors': errors,
+        'throughput_rps': round(len(latencies) / elapsed, 1),
+    }
+    if len(latencies):
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        summary['latency_ms'] = {'p50': round(p50, 3), 'p95': round(p95, 3), 'p99': round(p99, 3),
+                                 'mean': round(latencies.mean(), 3), 'max': round(latencies.max(), 3)}
+    return summary
+
+
+# Régresseurs réellement servis : une requête d'essai par régresseur
+def available_regressors(url, regressors, car) -> List[str]:
+    available = []
+    for regressor in regressors:
+        response = httpx.post(f'{url}/predict', params={'regressor': regressor}, json=car, timeout=60)
+        if response.status_code == 200 and 'prediction' in response.json():
+            available.append(regressor)
+        else:
+            print(f"{regressor} ignoré : {response.text}", file=sys.stderr)
+    return available
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = {(r['scenario'], r['concurrency'], r['regressor']): r for r in json.load(f)['results']}
+    print(f"{'scénario':<14}{'conc.':>6}{'régresseur':>12}{'débit (req/s)':>24}{'p99 (ms)':>24}", file=sys.stderr)
+    for result in results:
+        old = baseline.get((result['scenario'], result['concurrency'], result['regressor']))
+        if old is None or 'latency_ms' not in old or 'latency_ms' not in result:
+            continue
+        rps = f"{old['throughput_rps']:.0f} → {result['throughput_rps']:.0f}"
+        p99 = f"{old['latency_ms']['p99']:.1f} → {result['latency_ms']['p99']:.1f}"
+        print(f"{result['scenario']:<14}{result['concurrency']:>6}{result['regressor']:>12}{rps:>24}{p99:>24}",
+              file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test de charge de l'endpoint /predict.")
+    parser.add_argument('--url', default=None, help="API déjà démarrée (sinon uvicorn est lancé localement)")
+    parser.add_argument('--workers', type=int, default=1, help="Workers uvicorn de l'API lancée localement")
+    parser.add_argument('--env', action='append', default=[], metavar='NOM=VALEUR',
+                        help="Variable d'environnement de l'API lancée localement (répétable)")
+    parser.add_argument('--regressors', nargs='*', default=['LR', 'Ridge', 'RF'])
+    parser.add_argument('--mix', default=None, help="Scénario mélangé, ex. LR=0.5,Ridge=0.3,RF=0.2")
+    parser.add_argument('--concurrency', type=int, nargs='*', default=[1, 8, 32, 64])
+    parser.add_argument('--duration', type=float, default=10, help="Durée mesurée par niveau (s)")
+    parser.add_argument('--warmup', type=float, default=2, help="Durée d'échauffement non mesurée (s)")
+    parser.add_argument('--pool-size', type=int, default=10000,
+                        help="Nombre de voitures distinctes (contrôle le taux de succès du cache)")
+    parser.add_argument('--cars', default=None, help="CSV de voitures réelles à la place des voitures générées")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=None, help="Fichier JSON de résultats")
+    parser.add_argument('--baseline', default=None, help="Résultats précédents à comparer")
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if url is None:
+        port = free_port()
+        server = start_server(port, args.workers, dict(item.split('=', 1) for item in args.env))
+        url = f'http://127.0.0.1:{port}'
+    try:
+        car_schema = httpx.get(f'{url}/openapi.json').json()['components']['schemas']['Car']
+        metadata = httpx.get(f'{url}/metadata').json()
+        if args.cars:
+            cars = load_cars(args.cars, car_schema, metadata)[:args.pool_size]
+        else:
+            cars = make_cars(args.pool_size, car_schema, metadata, seed=args.seed)
+
+        regressors = available_regressors(url, args.regressors, cars[0])
+        scenarios = {regressor: {regressor: 1.0} for regressor in regressors}
+        if args.mix:
+            scenarios['mix'] = {name: weight for name, weight in parse_mix(args.mix).items() if name in regressors}
+        elif len(regressors) > 1:
+            scenarios['mix'] = {regressor: 1.0 for regressor in regressors}
+
+        results = []
+        for scenario, weights in scenarios.items():
+            for concurrency in args.concurrency:
+                samples, elapsed = asyncio.run(
+                    run_level(url, cars, weights, concurrency, args.duration, args.warmup, args.seed))
+                rows = {'all': samples} if len(weights) > 1 else {}
+                for regressor in weights:
+                    rows[regressor] = [sample for sample in samples if sample[0] == regressor]
+                for regressor, regressor_samples in rows.items():
+                    result = {'scenario': scenario, 'concurrency': concurrency, 'regressor': regressor,
+                              **summarize(regressor_samples, elapsed)}
+                    results.append(result)
+                    print(json.dumps(result), file=sys.stderr)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'date': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'cpu_count': os.cpu_count(),
+            'url': args.url or 'local',
+            'workers': args.workers,
+            'env': args.env,
+            'duration_s': args.duration,
+            'warmup_s': args.warmup,
+            'pool_size': len(cars),
+            'seed': args.seed,
+        },
+        'results': results,
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    if args.baseline:
+        compare(results, args.baseline)
+
+
+if __name__ == '__main__':
+    main()
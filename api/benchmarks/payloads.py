@@ -0,0 +1,72 @@
+import csv
+import random
+from typing import Dict, List, Optional
+
+# Voitures de test pour les benchmarks : valeurs acceptées par la classe Car (schéma JSON de l'API)
+# et connues des encodeurs (model_metadata.json), pour que chaque requête aboutisse à une prédiction.
+
+# Répartition approximative des valeurs numériques du jeu de données de prix
+MILEAGE_MEDIAN = 140000
+ENGINE_POWER_MEAN, ENGINE_POWER_STD = 128, 38
+BOOLEAN_SHARE = {
+    'private_parking_available': 0.55,
+    'has_gps': 0.8,
+    'has_air_conditioning': 0.2,
+    'automatic_car': 0.2,
+    'has_getaround_connect': 0.55,
+    'has_speed_regulator': 0.25,
+    'winter_tires': 0.93,
+}
+
+
+# Vocabulaire de chaque feature catégorielle : valeurs de l'énumération du schéma Car,
+# restreintes aux catégories connues des modèles lorsque les métadonnées sont disponibles
+def vocabularies(car_schema: Dict, metadata: Optional[Dict] = None) -> Dict[str, List[str]]:
+    known = (metadata or {}).get('categories', {})
+    vocabulary = {}
+    for feature, spec in car_schema['properties'].items():
+        if 'enum' in spec:
+            values = [value for value in spec['enum'] if feature not in known or value in known[feature]]
+            vocabulary[feature] = values or spec['enum']
+    return vocabulary
+
+
+def make_cars(n: int, car_schema: Dict, metadata: Optional[Dict] = None, seed: int = 0) -> List[Dict]:
+    rng = random.Random(seed)
+    vocabulary = vocabularies(car_schema, metadata)
+    cars = []
+    for _ in range(n):
+        car = {}
+        for feature, spec in car_schema['properties'].items():
+            if feature in vocabulary:
+                car[feature] = rng.choice(vocabulary[feature])
+            elif feature == 'mileage':
+                car[feature] = round(rng.lognormvariate(0, 0.6) * MILEAGE_MEDIAN)
+            elif feature == 'engine_power':
+                car[feature] = max(25, round(rng.gauss(ENGINE_POWER_MEAN, ENGINE_POWER_STD)))
+            elif spec.get('type') == 'boolean':
+                car[feature] = rng.random() < BOOLEAN_SHARE.get(feature, 0.5)
+            else:
+                car[feature] = rng.random()
+        cars.append(car)
+    return cars
+
+
+# Voitures lues dans un CSV (ex. le jeu de données de prix) ; les lignes hors vocabulaire sont ignorées
+def load_cars(path: str, car_schema: Dict, metadata: Optional[Dict] = None) -> List[Dict]:
+    vocabulary = vocabularies(car_schema, metadata)
+    cars = []
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            car = {}
+            for feature, spec in car_schema['properties'].items():
+                value = row[feature]
+                if spec.get('type') == 'boolean':
+                    car[feature] = value.strip().lower() in ('true', '1')
+                elif spec.get('type') == 'number':
+                    car[feature] = float(value)
+                else:
+                    car[feature] = value
+            if all(car[feature] in values for feature, values in vocabulary.items()):
+                cars.append(car)
+    return cars
@@ -0,0 +1,93 @@
+import argparse
+import json
+import os
+import sys
+import timeit
+from typing import Callable, Dict
+import pandas as pd
+from joblib import load
+
+# Coût de chaque étape d'une prédiction, mesuré dans le processus (sans réseau ni serveur) :
+# décodage JSON, validation pydantic (Car), extraction des colonnes, construction du DataFrame,
+# transformation (préprocesseur sklearn), prédiction de l'estimateur final, scorer rapide le cas échéant,
+# et sérialisation de la réponse ; pour chaque régresseur et chaque taille de lot.
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, API_DIR)
+
+import main  # noqa: E402
+from fast_path import final_estimator  # noqa: E402
+from payloads import make_cars  # noqa: E402
+
+
+# Durée moyenne d'un appel (µs), la répétition la plus rapide étant retenue
+def time_call(function: Callable, repeat: int) -> float:
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1e6
+
+
+def stage_timings(loaded, pipeline, cars, repeat: int) -> Dict[str, float]:
+    body = json.dumps(cars)
+    decoded = json.loads(body)
+    parsed = [main.Car.parse_obj(car) for car in decoded]
+    columns = main.cars_to_columns(parsed)
+    frame = pd.DataFrame(columns)
+    preprocessor = pipeline[:-1]
+    features = preprocessor.transform(frame)
+    estimator = final_estimator(pipeline)
+    predictions = estimator.predict(features)
+    response = {"predictions": [float(price) for price in predictions]}
+
+    timings = {
+        "json_decode": time_call(lambda: json.loads(body), repeat),
+        "validation": time_call(lambda: [main.Car.parse_obj(car) for car in decoded], repeat),
+        "columns": time_call(lambda: main.cars_to_columns(parsed), repeat),
+        "dataframe": time_call(lambda: pd.DataFrame(columns), repeat),
+        "transform": time_call(lambda: preprocessor.transform(frame), repeat),
+        "predict": time_call(lambda: estimator.predict(features), repeat),
+        "serialization": time_call(lambda: json.dumps({"predictions": [float(p) for p in predictions]}), repeat),
+    }
+    timings["sklearn_total"] = sum(timings.values())
+    if loaded.scorer is not None:
+        timings["fast_path_predict"] = time_call(lambda: loaded.scorer.predict(columns), repeat)
+    assert len(response["predictions"]) == len(cars)
+    return {stage: round(microseconds, 2) for stage, microseconds in timings.items()}
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Coût par étape d'une prédiction, dans le processus.")
+    parser.add_argument("--regressors", nargs="*", default=list(main.registry.names))
+    parser.add_argument("--batch-sizes", type=int, nargs="*", default=[1, 32, 1000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Fichier JSON de résultats")
+    args = parser.parse_args()
+
+    main.metadata.update(main.load_metadata(main.METADATA_PATH))
+    main.registry.load_all()
+    car_schema = main.Car.schema()
+
+    results = []
+    for regressor in args.regressors:
+        loaded = main.registry.get(regressor)
+        if loaded is None:
+            print(f"{regressor} ignoré : modèle introuvable", file=sys.stderr)
+            continue
+        # Le pipeline n'est pas désérialisé par le registre lorsque le scorer est chargé depuis des tableaux exportés
+        pipeline = loaded.model if loaded.model is not None else load(main.registry.path_for(regressor))
+        for batch_size in args.batch_sizes:
+            cars = make_cars(batch_size, car_schema, main.metadata, seed=args.seed)
+            results.append({"regressor": regressor, "batch_size": batch_size,
+                            "microseconds": stage_timings(loaded, pipeline, cars, args.repeat)})
+            print(json.dumps(results[-1]), file=sys.stderr)
+
+    report = json.dumps({"fast_path": main.FAST_PATH, "results": results}, indent=2)
+    print(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,61 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Mesure du temps de démarrage de l'API : import de main.py puis exécution des handlers de démarrage
+# (chargement des métadonnées et des modèles), dans un processus neuf à chaque répétition.
+# --dataset-url mesure en plus le téléchargement du jeu de données que l'API effectuait auparavant à l'import.
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATASET_URL = "https://full-stack-assets.s3.eu-west-3.amazonaws.com/Deployment/get_around_pricing_project.csv"
+
+STARTUP_SNIPPET = """
+import asyncio, time
+start = time.perf_counter()
+import main
+asyncio.run(main.app.router.startup())
+elapsed = time.perf_counter() - start
+asyncio.run(main.app.router.shutdown())
+print(elapsed)
+"""
+
+DATASET_SNIPPET = """
+import sys, time
+import pandas as pd
+start = time.perf_counter()
+pd.read_csv(sys.argv[1])
+print(time.perf_counter() - start)
+"""
+
+def run_snippet(snippet, *args):
+    output = subprocess.run([sys.executable, "-c", snippet, *args], cwd=API_DIR, capture_output=True, text=True, check=True)
+    return float(output.stdout.strip().splitlines()[-1])
+
+def summarize(samples):
+    return {"median_s": statistics.median(samples), "min_s": min(samples), "max_s": max(samples), "samples": samples}
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--dataset-url", nargs="?", const=DATASET_URL, default=None,
+                        help="Mesurer aussi le téléchargement du jeu de données (ancien démarrage)")
+    parser.add_argument("--output", default=None, help="Fichier JSON de résultats")
+    args = parser.parse_args()
+
+    results = {"startup": summarize([run_snippet(STARTUP_SNIPPET) for _ in range(args.repeat)])}
+    if args.dataset_url:
+        download = summarize([run_snippet(DATASET_SNIPPET, args.dataset_url) for _ in range(args.repeat)])
+        results["dataset_download"] = download
+        results["legacy_startup_estimate_s"] = results["startup"]["median_s"] + download["median_s"]
+
+    report = json.dumps(results, indent=2)
+    print(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
+
+if __name__ == "__main__":
+    main()
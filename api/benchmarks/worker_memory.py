@@ -0,0 +1,144 @@
+import argparse
+import datetime
+import json
+import os
+import sys
+import time
+from typing import Dict, List
+import httpx
+
+from loadtest import free_port, git_commit, start_server
+from payloads import make_cars
+
+# Mémoire de chaque processus de l'API lancée avec plusieurs workers uvicorn, lue dans /proc/<pid>/smaps_rollup.
+# Scénarios comparés par défaut :
+#   copy : chaque worker désérialise sa propre copie des modèles (FAST_PATH=0, MODEL_MMAP_MODE=none)
+#   mmap : tableaux des modèles et forêt exportée mappés en mémoire, partagés via le cache de pages (défaut de l'API)
+# La PSS (mémoire proportionnelle) compte une page partagée par N processus pour 1/N dans chacun :
+# sa somme est la mémoire réellement occupée par le serveur, contrairement à la somme des RSS.
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, API_DIR)
+
+from metrics import read_process_memory  # noqa: E402
+
+DEFAULT_SCENARIOS = {
+    "copy": {"FAST_PATH": "0", "MODEL_MMAP_MODE": "none"},
+    "mmap": {},
+}
+
+
+def parent_pids() -> Dict[int, int]:
+    parents = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # Le nom du processus (entre parenthèses) peut contenir des espaces : on lit après la dernière ')'
+                fields = f.read().rsplit(")", 1)[1].split()
+            parents[int(entry)] = int(fields[1])
+        except (OSError, IndexError, ValueError):
+            continue
+    return parents
+
+
+def cmdline(pid: int) -> str:
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as f:
+            return f.read().replace(b"\0", b" ").decode(errors="replace").strip()
+    except OSError:
+        return ""
+
+
+# Processus du serveur : le processus principal uvicorn et ses descendants, avec leur rôle
+def server_processes(master: int, workers: int) -> List[Dict]:
+    parents = parent_pids()
+    processes = [{"pid": master, "role": "server" if workers == 1 else "master"}]
+    pending = [(master, 0)]
+    while pending:
+        pid, depth = pending.pop()
+        for child, parent in parents.items():
+            if parent != pid:
+                continue
+            spawned = "spawn_main" in cmdline(child)
+            if spawned and depth == 0 and workers > 1:
+                role = "worker"
+            elif spawned:
+                role = "inference"
+            else:
+                role = "other"
+            processes.append({"pid": child, "role": role})
+            pending.append((child, depth + 1))
+    return processes
+
+
+def warm_up(url: str, regressors: List[str], cars: List[Dict], requests_per_regressor: int):
+    # Nouvelle connexion à chaque requête : le noyau répartit les connexions entre les workers
+    for regressor in regressors:
+        for i in range(requests_per_regressor):
+            httpx.post(f"{url}/predict/batch", params={"regressor": regressor}, json=cars[i % 4::4][:32], timeout=120)
+
+
+def run_scenario(name: str, env: Dict[str, str], args) -> Dict:
+    port = free_port()
+    server = start_server(port, args.workers, env)
+    url = f"http://127.0.0.1:{port}"
+    try:
+        car_schema = httpx.get(f"{url}/openapi.json").json()["components"]["schemas"]["Car"]
+        cars = make_cars(128, car_schema, httpx.get(f"{url}/metadata").json(), seed=args.seed)
+        warm_up(url, args.regressors, cars, args.workers * 8)
+        time.sleep(args.settle)
+        processes = server_processes(server.pid, args.workers)
+        for process in processes:
+            process.update(read_process_memory(process["pid"]))
+    finally:
+        server.terminate()
+        server.wait()
+
+    workers = [p for p in processes if p["role"] in ("worker", "server")]
+    totals = {kind: sum(p.get(kind, 0) for p in processes) for kind in ("rss", "pss", "private_dirty", "shared_clean")}
+    result = {"scenario": name, "env": env, "processes": processes, "totals": totals,
+              "worker_mean_pss": sum(p.get("pss", 0) for p in workers) / max(1, len(workers))}
+    print(f"{name:<8} workers={len(workers)} rss_sum={totals['rss'] / 1e6:.0f} Mo "
+          f"pss_sum={totals['pss'] / 1e6:.0f} Mo worker_pss={result['worker_mean_pss'] / 1e6:.0f} Mo", file=sys.stderr)
+    return result
+
+
+def parse_scenario(value: str):
+    name, _, assignments = value.partition(":")
+    return name, dict(item.split("=", 1) for item in assignments.split(",") if item)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mémoire par worker de l'API (RSS, PSS, pages partagées et privées).")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--env", action="append", default=[], metavar="NOM=VALEUR",
+                        help="Variable d'environnement commune à tous les scénarios (répétable)")
+    parser.add_argument("--scenario", action="append", type=parse_scenario, default=None, metavar="NOM:A=1,B=2",
+                        help="Scénario à mesurer (répétable ; par défaut : copy et mmap)")
+    parser.add_argument("--regressors", nargs="*", default=["LR", "Ridge", "RF"])
+    parser.add_argument("--settle", type=float, default=1.0, help="Attente avant la mesure (s)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Fichier JSON de résultats")
+    args = parser.parse_args()
+
+    if not os.path.exists("/proc/self/smaps_rollup"):
+        raise SystemExit("/proc/<pid>/smaps_rollup est nécessaire (Linux 4.14 ou plus récent).")
+    common = dict(item.split("=", 1) for item in args.env)
+    scenarios = dict(args.scenario) if args.scenario else DEFAULT_SCENARIOS
+    results = [run_scenario(name, {**common, **env}, args) for name, env in scenarios.items()]
+
+    report = json.dumps({
+        "meta": {"commit": git_commit(), "date": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+                 "workers": args.workers, "cpu_count": os.cpu_count()},
+        "results": results,
+    }, indent=2)
+    print(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
+
+
+if __name__ == "__main__":
+    main()
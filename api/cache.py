@@ -0,0 +1,161 @@
+import argparse
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+from multiprocessing.managers import BaseManager
+from typing import Any, Dict, Hashable, Optional, Sequence, Tuple
+
+# Cache des prédictions : clé (régresseur, version du modèle, features normalisées de la voiture),
+# éviction LRU, durée de vie optionnelle et invalidation lors du rechargement d'un modèle.
+
+
+# Stockage LRU en mémoire, protégé par un verrou (partagé entre threads dans le serveur de cache)
+class LocalBackend:
+    def __init__(self, maxsize: int = 10000, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[Optional[float], Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires is not None and expires <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def get_many(self, keys: Sequence[Hashable]) -> list:
+        return [self.get(key) for key in keys]
+
+    def set(self, key: Hashable, value: Any):
+        expires = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def set_many(self, items: Sequence[Tuple[Hashable, Any]]):
+        for key, value in items:
+            self.set(key, value)
+
+    # Supprime les entrées d'un régresseur (la clé commence par son nom et sa version),
+    # sauf celles de la version 'keep' : un worker qui détecte le rechargement après les autres
+    # n'efface pas les prédictions qu'ils ont déjà enregistrées pour la nouvelle version
+    def invalidate(self, regressor: str, keep: Optional[str] = None) -> int:
+        with self._lock:
+            stale = [key for key in self._entries if key[0] == regressor and (keep is None or key[1] != keep)]
+            for key in stale:
+                del self._entries[key]
+        return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def size(self) -> int:
+        return len(self._entries)
+
+
+# Serveur de cache partagé : un processus local sert un LocalBackend à plusieurs workers uvicorn
+class CacheManager(BaseManager):
+    pass
+
+BACKEND_METHODS = ('get', 'get_many', 'set', 'set_many', 'invalidate', 'clear', 'size')
+
+def parse_address(address: str) -> Tuple[str, int]:
+    host, port = address.rsplit(':', 1)
+    return host, int(port)
+
+def connect_backend(address: str, authkey: bytes):
+    CacheManager.register('backend', exposed=BACKEND_METHODS)
+    manager = CacheManager(address=parse_address(address), authkey=authkey)
+    manager.connect()
+    return manager.backend()
+
+def serve(address: str, authkey: bytes, maxsize: int, ttl: Optional[float]):
+    backend = LocalBackend(maxsize, ttl)
+    CacheManager.register('backend', callable=lambda: backend, exposed=BACKEND_METHODS)
+    manager = CacheManager(address=parse_address(address), authkey=authkey)
+    print(f"Serveur de cache des prédictions sur {address} (taille {maxsize}, durée de vie {ttl or 'illimitée'})")
+    manager.get_server().serve_forever()
+
+
+class PredictionCache:
+    def __init__(self, features: Sequence[str], backend=None, maxsize: int = 10000, ttl: Optional[float] = None):
+        self.features = list(features)
+        self.backend = backend if backend is not None else LocalBackend(maxsize, ttl)
+        self.hits = 0
+        self.misses = 0
+
+    # Clé normalisée : les nombres sont convertis en float pour que 100 et 100.0 partagent la même entrée
+    def key(self, regressor: str, version: str, car) -> Tuple:
+        values = []
+        for feature in self.features:
+            value = getattr(car, feature)
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                value = float(value)
+            values.append(value)
+        return (regressor, version, *values)
+
+    def get_many(self, keys: Sequence[Tuple]) -> list:
+        values = self.backend.get_many(keys)
+        hits = sum(value is not None for value in values)
+        self.hits += hits
+        self.misses += len(values) - hits
+        return values
+
+    def set_many(self, items: Sequence[Tuple[Tuple, Any]]):
+        self.backend.set_many(items)
+
+    # Le backend partagé répond par des appels IPC bloquants : dans la boucle d'événements, ils sont exécutés
+    # dans le pool de threads par défaut (le backend local, en mémoire, est appelé directement)
+    async def get_many_async(self, keys: Sequence[Tuple]) -> list:
+        if isinstance(self.backend, LocalBackend):
+            return self.get_many(keys)
+        return await asyncio.get_running_loop().run_in_executor(None, self.get_many, keys)
+
+    async def set_many_async(self, items: Sequence[Tuple[Tuple, Any]]):
+        if isinstance(self.backend, LocalBackend):
+            return self.set_many(items)
+        await asyncio.get_running_loop().run_in_executor(None, self.set_many, items)
+
+    # Appelé par le registre lorsqu'une nouvelle version d'un modèle est chargée : les entrées de cette version sont gardées
+    def invalidate(self, regressor: str, version: Optional[str] = None):
+        removed = self.backend.invalidate(regressor, version)
+        print(f"Cache des prédictions invalidé pour {regressor} ({removed} entrées)")
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": self.backend.size(),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serveur de cache des prédictions partagé entre workers.")
+    parser.add_argument("command", choices=["serve"])
+    parser.add_argument("--address", default="127.0.0.1:50000")
+    # Pas de clé par défaut : le serveur désérialise (pickle) les requêtes de tout client qui connaît la clé
+    parser.add_argument("--authkey", default=os.environ.get("PREDICTION_CACHE_AUTHKEY"),
+                        help="Clé partagée avec les workers (par défaut PREDICTION_CACHE_AUTHKEY)")
+    parser.add_argument("--maxsize", type=int, default=100000)
+    parser.add_argument("--ttl", type=float, default=None)
+    args = parser.parse_args()
+    if not args.authkey:
+        parser.error("--authkey (ou PREDICTION_CACHE_AUTHKEY) est obligatoire")
+    serve(args.address, args.authkey.encode(), args.maxsize, args.ttl)
+
+
+if __name__ == "__main__":
+    main()
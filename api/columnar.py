@@ -0,0 +1,123 @@
+import typing
+from typing import Dict, List, Mapping, Sequence, Tuple
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Lots de voitures au format Apache Arrow (IPC, flux ou fichier) : validation colonne par colonne
+# avec les mêmes règles que la classe Car (types, valeurs des Literal, valeurs manquantes),
+# sans construire d'objet ni de dictionnaire par ligne, puis colonnes NumPy pour les scorers.
+
+ARROW_STREAM_TYPE = "application/vnd.apache.arrow.stream"
+ARROW_FILE_MAGIC = b"ARROW1"
+# Nombre maximal d'erreurs rapportées pour un lot (un lot invalide peut compter des millions de lignes)
+MAX_ERRORS = 100
+
+
+class ColumnValidationError(ValueError):
+    def __init__(self, errors: List[Dict]):
+        super().__init__(f"{len(errors)} invalid values")
+        self.errors = errors
+
+
+# Colonnes d'un modèle pydantic par type : numériques, booléennes et catégorielles (avec les valeurs permises)
+def car_fields(model) -> Tuple[List[str], List[str], Dict[str, List[str]]]:
+    numeric, binary, categorical = [], [], {}
+    for name, field in model.__fields__.items():
+        if typing.get_origin(field.outer_type_) is typing.Literal:
+            categorical[name] = list(typing.get_args(field.outer_type_))
+        elif field.type_ is bool:
+            binary.append(name)
+        else:
+            numeric.append(name)
+    return numeric, binary, categorical
+
+
+# Table Arrow d'un corps de requête (format IPC flux, ou fichier reconnu à sa signature)
+def read_table(body: bytes) -> pa.Table:
+    if body.startswith(ARROW_FILE_MAGIC):
+        return pa.ipc.open_file(pa.py_buffer(body)).read_all()
+    return pa.ipc.open_stream(pa.py_buffer(body)).read_all()
+
+
+# Réponse au format IPC flux : une colonne 'prediction' (float64), dans l'ordre des lignes
+def predictions_to_ipc(predictions: np.ndarray) -> bytes:
+    table = pa.table({"prediction": pa.array(np.asarray(predictions, dtype=np.float64))})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def rows_where(mask: pa.ChunkedArray, limit: int) -> List[int]:
+    return np.flatnonzero(mask.to_numpy())[:limit].tolist()
+
+
+def add_errors(errors: List[Dict], rows: List[int], column: str, msg: str, error_type: str):
+    for row in rows[:MAX_ERRORS - len(errors)]:
+        errors.append({"loc": [row, column], "msg": msg, "type": error_type})
+
+
+# Colonnes validées (numériques en float64, booléens, catégories en chaînes) ; les erreurs reprennent
+# la forme de celles de pydantic, avec 'loc' = [ligne, colonne] ou [colonne] pour une colonne absente ou mal typée
+def validate_table(table: pa.Table, fields: Tuple[List[str], List[str], Dict[str, List[str]]]) -> Dict[str, pa.ChunkedArray]:
+    numeric, binary, categorical = fields
+    errors, arrays = [], {}
+    for column in numeric + binary + list(categorical):
+        if len(errors) >= MAX_ERRORS:
+            break
+        if column not in table.column_names:
+            errors.append({"loc": [column], "msg": "field required", "type": "value_error.missing"})
+            continue
+        array = table.column(column)
+        if array.null_count:
+            add_errors(errors, rows_where(array.is_null(), MAX_ERRORS), column,
+                       "none is not an allowed value", "type_error.none.not_allowed")
+            continue
+        kind = array.type
+        if column in categorical:
+            if pa.types.is_dictionary(kind):
+                array, kind = array.cast(kind.value_type), kind.value_type
+            if not (pa.types.is_string(kind) or pa.types.is_large_string(kind)):
+                errors.append({"loc": [column], "msg": f"expected a string column, got {kind}", "type": "type_error.str"})
+                continue
+            permitted = categorical[column]
+            invalid = pc.invert(pc.is_in(array, value_set=pa.array(permitted, type=kind)))
+            add_errors(errors, rows_where(invalid, MAX_ERRORS), column,
+                       "unexpected value; permitted: " + ", ".join(repr(value) for value in permitted), "value_error.const")
+        elif column in binary:
+            if pa.types.is_integer(kind):
+                # Comme pydantic, 0 et 1 sont acceptés pour un booléen
+                add_errors(errors, rows_where(pc.invert(pc.is_in(array, value_set=pa.array([0, 1], type=kind))), MAX_ERRORS),
+                           column, "value could not be parsed to a boolean", "type_error.bool")
+                array = array.cast(pa.bool_())
+            elif not pa.types.is_boolean(kind):
+                errors.append({"loc": [column], "msg": f"expected a boolean column, got {kind}", "type": "type_error.bool"})
+                continue
+        elif pa.types.is_integer(kind) or pa.types.is_floating(kind) or pa.types.is_decimal(kind):
+            array = array.cast(pa.float64())
+        else:
+            errors.append({"loc": [column], "msg": f"expected a numeric column, got {kind}", "type": "type_error.float"})
+            continue
+        arrays[column] = array
+    if errors:
+        raise ColumnValidationError(errors[:MAX_ERRORS])
+    return arrays
+
+
+# Valeurs inconnues des encodeurs des modèles, même forme que pour les lots JSON ({"row", "column", "value", "known"})
+def unknown_categories(arrays: Mapping[str, pa.ChunkedArray], categories: Mapping[str, Sequence[str]]) -> List[Dict]:
+    errors = []
+    for column, vocabulary in categories.items():
+        if column not in arrays:
+            continue
+        array = arrays[column]
+        unknown = pc.invert(pc.is_in(array, value_set=pa.array(vocabulary, type=array.type)))
+        for row in rows_where(unknown, MAX_ERRORS - len(errors)):
+            errors.append({"row": row, "column": column, "value": array[row].as_py(), "known": vocabulary})
+    return errors
+
+
+# Colonnes NumPy dans l'ordre des features (les catégories en tableaux d'objets str, lus par les scorers et par pandas)
+def to_columns(arrays: Mapping[str, pa.ChunkedArray], features: Sequence[str]) -> Dict[str, np.ndarray]:
+    return {feature: arrays[feature].to_numpy() for feature in features}
@@ -0,0 +1,140 @@
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Mapping, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+from sklearn.pipeline import Pipeline
+from fast_path import build_scorer, load_scorer
+from registry import LoadedModel, ModelRegistry
+
+# Modes d'exécution de l'inférence :
+#   'inline'  : dans la boucle d'événements (coût négligeable, ex. scorer linéaire)
+#   'thread'  : dans un pool de threads, la boucle d'événements reste libre
+#   'process' : dans un pool de processus, chacun ayant ses propres modèles préchargés
+EXECUTOR_KINDS = ('inline', 'thread', 'process')
+
+
+# Prédiction vectorisée avec un modèle chargé à partir des colonnes des voitures
+def predict_columns(loaded: LoadedModel, columns: Mapping[str, Sequence]) -> np.ndarray:
+    return predict_columns_timed(loaded, columns)[0]
+
+
+# Même prédiction, avec la durée (secondes) de chaque étape : scorer rapide, ou construction du DataFrame,
+# transformation des features (préprocesseur du pipeline) et prédiction de l'estimateur final
+def predict_columns_timed(loaded: LoadedModel, columns: Mapping[str, Sequence]) -> Tuple[np.ndarray, Dict[str, float]]:
+    start = time.perf_counter()
+    if loaded.scorer is not None:
+        prediction = loaded.scorer.predict(columns)
+        return prediction, {'fast_path': time.perf_counter() - start}
+    frame = pd.DataFrame(columns)
+    built = time.perf_counter()
+    model = loaded.model
+    if not isinstance(model, Pipeline) or len(model.steps) < 2:
+        prediction = model.predict(frame)
+        return prediction, {'dataframe': built - start, 'estimator': time.perf_counter() - built}
+    features = model[:-1].transform(frame)
+    transformed = time.perf_counter()
+    prediction = model.steps[-1][1].predict(features)
+    return prediction, {'dataframe': built - start, 'transform': transformed - built,
+                        'estimator': time.perf_counter() - transformed}
+
+
+# Modèle retiré du registre entre la vérification de la requête et l'exécution de l'inférence
+class ModelUnavailableError(LookupError):
+    def __init__(self, regressor: str):
+        super().__init__(regressor)
+        self.regressor = regressor
+
+
+def _registry_predict(registry: ModelRegistry, regressor: str,
+                      columns: Mapping[str, Sequence]) -> Tuple[np.ndarray, Dict[str, float]]:
+    start = time.perf_counter()
+    loaded = registry.get(regressor)
+    if loaded is None:
+        raise ModelUnavailableError(regressor)
+    model_seconds = time.perf_counter() - start
+    prediction, stages = predict_columns_timed(loaded, columns)
+    return prediction, {'model': model_seconds, **stages}
+
+
+# Registre propre à chaque processus du pool, initialisé au démarrage du processus
+_worker_registry: Optional[ModelRegistry] = None
+
+def _init_worker(model_dir: str, names, check_interval: float, fast_path: bool, mmap_mode: Optional[str]):
+    global _worker_registry
+    _worker_registry = ModelRegistry(model_dir, names=names, check_interval=check_interval,
+                                     scorer_factory=build_scorer if fast_path else None,
+                                     scorer_loader=load_scorer if fast_path else None, mmap_mode=mmap_mode)
+    _worker_registry.load_all()
+
+def _worker_ready() -> bool:
+    return _worker_registry is not None
+
+def _worker_predict(regressor: str, columns: Mapping[str, Sequence]) -> Tuple[np.ndarray, Dict[str, float]]:
+    return _registry_predict(_worker_registry, regressor, columns)
+
+
+# Couche d'exécution de l'inférence : le gestionnaire async n'exécute jamais le modèle lui-même
+class InferenceExecutor:
+    def __init__(self, registry: ModelRegistry, kinds: Dict[str, str], workers: Optional[int] = None,
+                 fast_path: bool = True):
+        for name, kind in kinds.items():
+            if kind not in EXECUTOR_KINDS:
+                raise ValueError(f"Executor '{kind}' for regressor '{name}' must be one of {EXECUTOR_KINDS}.")
+        self.registry = registry
+        self.kinds = kinds
+        self.workers = workers or os.cpu_count()
+        self.fast_path = fast_path
+        self._threads: Optional[ThreadPoolExecutor] = None
+        self._processes: Optional[ProcessPoolExecutor] = None
+
+    def kind(self, regressor: str) -> str:
+        return self.kinds.get(regressor, 'thread')
+
+    # Régresseurs dont les modèles doivent être chargés dans le processus principal
+    def local_regressors(self):
+        return tuple(name for name in self.registry.names if self.kind(name) != 'process')
+
+    def start(self):
+        kinds = set(self.kind(name) for name in self.registry.names)
+        if 'thread' in kinds and self._threads is None:
+            self._threads = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="inference")
+        if 'process' in kinds and self._processes is None:
+            names = tuple(name for name in self.registry.names if self.kind(name) == 'process')
+            print(f"Démarrage de {self.workers} processus d'inférence pour {', '.join(names)}...")
+            self._processes = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(self.registry.model_dir, names, self.registry.check_interval, self.fast_path,
+                          self.registry.mmap_mode))
+            # Le pool crée ses processus à la demande : on les démarre (et précharge les modèles) dès maintenant
+            for _ in range(self.workers):
+                self._processes.submit(_worker_ready)
+
+    async def predict(self, regressor: str, columns: Mapping[str, Sequence]) -> np.ndarray:
+        prediction, _ = await self.predict_timed(regressor, columns)
+        return prediction
+
+    # Prédiction et durée de chaque étape, mesurée là où le modèle s'exécute (thread, processus ou boucle)
+    async def predict_timed(self, regressor: str, columns: Mapping[str, Sequence]) -> Tuple[np.ndarray, Dict[str, float]]:
+        kind = self.kind(regressor)
+        if kind == 'inline':
+            return _registry_predict(self.registry, regressor, columns)
+        if self._threads is None and self._processes is None:
+            self.start()
+        loop = asyncio.get_event_loop()
+        if kind == 'process':
+            return await loop.run_in_executor(self._processes, _worker_predict, regressor, dict(columns))
+        return await loop.run_in_executor(self._threads, _registry_predict, self.registry, regressor, columns)
+
+    def shutdown(self):
+        if self._threads is not None:
+            self._threads.shutdown(wait=False)
+            self._threads = None
+        if self._processes is not None:
+            self._processes.shutdown(wait=False)
+            self._processes = None
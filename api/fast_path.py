@@ -0,0 +1,170 @@
+import argparse
+import json
+from typing import Dict, Mapping, Optional, Sequence
+import numpy as np
+from joblib import load
+
+# Export et évaluation rapide des modèles linéaires (LR, Ridge).
+# Un pipeline create_preprocessor + LinearRegression/Ridge se résume à :
+#   prix = intercept + somme(poids numérique * x) + somme(poids de la catégorie) + somme(poids booléen * b)
+# une fois le StandardScaler fusionné dans les poids et l'intercept, et le OneHotEncoder
+# remplacé par une table de poids par catégorie (la catégorie supprimée par drop='first' vaut 0).
+
+
+# Estimateur final d'un pipeline, en déballant un éventuel GridSearchCV
+def final_estimator(pipeline):
+    model = pipeline.named_steps['model']
+    return getattr(model, 'best_estimator_', model)
+
+
+# Aplatit un pipeline linéaire ajusté en une table de coefficients sérialisable en JSON
+def export_linear(pipeline) -> Dict:
+    preprocessor = pipeline.named_steps['features_preprocessing']
+    estimator = final_estimator(pipeline)
+    if not hasattr(estimator, 'coef_'):
+        raise ValueError(f"{type(estimator).__name__} is not a linear model.")
+    coef = np.ravel(estimator.coef_)
+    intercept = float(np.ravel(estimator.intercept_)[0])
+
+    table = {"intercept": 0.0, "numeric": {}, "categorical": {}, "binary": {}}
+    position = 0
+    for name, transformer, columns in preprocessor.transformers_:
+        if transformer == 'drop' or len(columns) == 0:
+            continue
+        if name == 'num':
+            scaler = transformer.named_steps['scaler']
+            mean = scaler.mean_ if scaler.mean_ is not None else np.zeros(len(columns))
+            scale = scaler.scale_ if scaler.scale_ is not None else np.ones(len(columns))
+            for i, column in enumerate(columns):
+                weight = coef[position] / scale[i]
+                table["numeric"][column] = float(weight)
+                intercept -= float(weight * mean[i])
+                position += 1
+        elif name == 'cat':
+            encoder = transformer.named_steps['encoder']
+            drop_idx = encoder.drop_idx_ if encoder.drop_idx_ is not None else [None] * len(columns)
+            for column, categories, dropped in zip(columns, encoder.categories_, drop_idx):
+                weights = {}
+                for j, category in enumerate(categories):
+                    if dropped is not None and j == dropped:
+                        weights[str(category)] = 0.0
+                    else:
+                        weights[str(category)] = float(coef[position])
+                        position += 1
+                table["categorical"][column] = weights
+        elif name == 'bin':
+            for column in columns:
+                table["binary"][column] = float(coef[position])
+                position += 1
+        else:
+            raise ValueError(f"Unexpected transformer '{name}' in preprocessor.")
+
+    if position != len(coef):
+        raise ValueError(f"Exported {position} coefficients, model has {len(coef)}.")
+    table["intercept"] = intercept
+    return table
+
+
+# Évaluation NumPy d'une table de coefficients, directement à partir des colonnes des voitures
+class LinearScorer:
+    def __init__(self, table: Dict):
+        self.table = table
+        self.intercept = table["intercept"]
+        self.numeric = [(column, weight) for column, weight in table["numeric"].items()]
+        self.categorical = [(column, weights) for column, weights in table["categorical"].items()]
+        self.binary = [(column, weight) for column, weight in table["binary"].items()]
+
+    # 'columns' associe chaque nom de feature à la séquence de ses valeurs
+    def predict(self, columns: Mapping[str, Sequence]) -> np.ndarray:
+        n_rows = len(next(iter(columns.values())))
+        prediction = np.full(n_rows, self.intercept)
+        for column, weight in self.numeric:
+            prediction += weight * np.asarray(columns[column], dtype=float)
+        for column, weights in self.categorical:
+            try:
+                prediction += np.fromiter((weights[value] for value in columns[column]), dtype=float, count=n_rows)
+            except KeyError as e:
+                raise ValueError(f"Found unknown category {e.args[0]!r} in column '{column}' during transform")
+        for column, weight in self.binary:
+            prediction += weight * np.asarray(columns[column], dtype=float)
+        return prediction
+
+
+# Plages réalistes des variables numériques pour les lignes de contrôle (ordre de grandeur du jeu de données GetAround)
+PROBE_RANGES = {"mileage": (0, 500000), "engine_power": (40, 450)}
+
+
+# Lignes de contrôle couvrant toutes les catégories connues de la table
+def probe_columns(table: Dict, n_rows: int = 64, seed: int = 0) -> Dict[str, list]:
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for column in table["numeric"]:
+        low, high = PROBE_RANGES.get(column, (0, 1))
+        columns[column] = rng.uniform(low, high, n_rows).tolist()
+    for column, weights in table["categorical"].items():
+        categories = list(weights)
+        columns[column] = [categories[i % len(categories)] for i in range(n_rows)]
+    for column in table["binary"]:
+        columns[column] = rng.integers(0, 2, n_rows).astype(bool).tolist()
+    return columns
+
+
+# Vérifie que le scorer reproduit les prédictions du pipeline sklearn
+def check_parity(pipeline, scorer: LinearScorer, n_rows: int = 64, rtol: float = 1e-9, atol: float = 1e-6) -> bool:
+    import pandas as pd
+    columns = probe_columns(scorer.table, n_rows)
+    frame = pd.DataFrame(columns)[list(pipeline.named_steps['features_preprocessing'].feature_names_in_)]
+    return bool(np.allclose(scorer.predict(columns), pipeline.predict(frame), rtol=rtol, atol=atol))
+
+
+# Construit le scorer rapide d'un pipeline linéaire, ou None si la parité n'est pas garantie
+def build_linear_scorer(pipeline) -> Optional[LinearScorer]:
+    try:
+        scorer = LinearScorer(export_linear(pipeline))
+    except (ValueError, KeyError, AttributeError) as e:
+        print(f"Export linéaire impossible : {e}")
+        return None
+    if not check_parity(pipeline, scorer):
+        print("Le scorer linéaire ne reproduit pas le pipeline, utilisation de sklearn.")
+        return None
+    return scorer
+
+
+# Fabrique de scorers rapides pour le registre des modèles
+def build_scorer(name: str, model):
+    if name in ('LR', 'Ridge'):
+        return build_linear_scorer(model)
+    if name == 'RF':
+        from forest import build_forest_scorer
+        return build_forest_scorer(model)
+    return None
+
+
+# Scorer rapide chargé depuis des tableaux exportés à côté de l'artefact (sans désérialiser le pipeline),
+# ou None s'il n'y en a pas pour cette version de l'artefact
+def load_scorer(name: str, path: str, version: str, mmap_mode: Optional[str] = 'r'):
+    if name == 'RF':
+        from forest import load_forest_scorer
+        return load_forest_scorer(path, version, mmap_mode)
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporte un pipeline linéaire en table de coefficients JSON.")
+    parser.add_argument("model", help="Fichier .joblib du pipeline (LR ou Ridge)")
+    parser.add_argument("--output", default=None, help="Fichier JSON de sortie")
+    args = parser.parse_args()
+
+    pipeline = load(args.model)
+    table = export_linear(pipeline)
+    scorer = LinearScorer(table)
+    print(f"Parité avec le pipeline sklearn : {check_parity(pipeline, scorer)}")
+
+    output = args.output or args.model.replace('_model.joblib', '_linear.json')
+    with open(output, 'w') as f:
+        json.dump(table, f, indent=2, ensure_ascii=False)
+    print(f"Table de coefficients enregistrée dans {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+import argparse
+import json
+import os
+import shutil
+import threading
+import time
+from typing import Callable, Dict, List, Mapping, Optional, Sequence
+import numpy as np
+from joblib import load
+from fast_path import final_estimator, probe_columns
+from registry import artifact_version
+
+# Export et évaluation rapide de la forêt aléatoire (RF).
+# Les arbres sklearn sont aplatis en tableaux contigus (structure de tableaux), tous arbres confondus :
+#   feature[n], threshold[n], children[2n] (gauche, droite), missing_left[n], value[n]   (n = nombre total de nœuds)
+# Les feuilles pointent vers elles-mêmes : chaque étape de parcours descend d'un niveau dans tous les arbres
+# et pour toutes les voitures à la fois, sans test « est-ce une feuille ? ».
+# Le parcours vectorisé évite le coût fixe de sklearn par arbre (jusqu'à 150 arbres) : il est nettement plus
+# rapide pour les petits lots, mais plus lent que le parcours Cython de sklearn pour les grands lots,
+# qui sont donc confiés au pipeline au-delà de FOREST_MAX_BATCH lignes.
+# Le préprocesseur (StandardScaler, OneHotEncoder, booléens) est remplacé par une table de positions :
+# la matrice de features est construite directement en float32, comme sklearn avant le parcours des arbres.
+# Les tableaux sont enregistrés à côté de l'artefact (RF_model.joblib -> RF_forest/, un fichier .npy par tableau)
+# et chargés par l'API en mémoire mappée : tous les workers d'un serveur partagent une seule copie
+# et le pipeline sklearn n'est désérialisé que si un grand lot le nécessite.
+
+# Type des valeurs des feuilles : float64 (parité exacte) ou float32 (moitié moins de mémoire)
+FOREST_LEAF_DTYPE = os.environ.get("FOREST_LEAF_DTYPE", "float64")
+FOREST_MAX_BATCH = int(os.environ.get("FOREST_MAX_BATCH", "256"))
+# Les lignes arrivées à une feuille sont retirées du parcours tous les COMPACT_EVERY niveaux
+COMPACT_EVERY = 4
+FOREST_ARRAYS = ("feature", "threshold", "children", "missing_left", "value", "roots", "max_depth")
+
+
+# Plus petit type entier signé pouvant contenir 'n'
+def index_dtype(n: int):
+    for dtype in (np.int16, np.int32):
+        if n <= np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+# Position de chaque feature dans la matrice transformée par le préprocesseur du pipeline
+def export_features(pipeline) -> Dict:
+    preprocessor = pipeline.named_steps['features_preprocessing']
+    layout = {"n_features": 0, "numeric": {}, "categorical": {}, "binary": {}}
+    position = 0
+    for name, transformer, columns in preprocessor.transformers_:
+        if transformer == 'drop' or len(columns) == 0:
+            continue
+        if name == 'num':
+            scaler = transformer.named_steps['scaler']
+            mean = scaler.mean_ if scaler.mean_ is not None else np.zeros(len(columns))
+            scale = scaler.scale_ if scaler.scale_ is not None else np.ones(len(columns))
+            for i, column in enumerate(columns):
+                layout["numeric"][column] = (position, float(mean[i]), float(scale[i]))
+                position += 1
+        elif name == 'cat':
+            encoder = transformer.named_steps['encoder']
+            drop_idx = encoder.drop_idx_ if encoder.drop_idx_ is not None else [None] * len(columns)
+            for column, categories, dropped in zip(columns, encoder.categories_, drop_idx):
+                positions = {}
+                for j, category in enumerate(categories):
+                    if dropped is not None and j == dropped:
+                        positions[str(category)] = -1
+                    else:
+                        positions[str(category)] = position
+                        position += 1
+                layout["categorical"][column] = positions
+        elif name == 'bin':
+            for column in columns:
+                layout["binary"][column] = position
+                position += 1
+        else:
+            raise ValueError(f"Unexpected transformer '{name}' in preprocessor.")
+    layout["n_features"] = position
+    return layout
+
+
+# Aplatit les arbres d'une forêt ajustée en tableaux contigus
+def export_forest(pipeline, leaf_dtype=np.float64) -> Dict[str, np.ndarray]:
+    estimator = final_estimator(pipeline)
+    if not hasattr(estimator, 'estimators_'):
+        raise ValueError(f"{type(estimator).__name__} is not a fitted forest.")
+    if getattr(estimator, 'n_outputs_', 1) != 1:
+        raise ValueError("Only single-output forests are supported.")
+    trees = [tree.tree_ for tree in estimator.estimators_]
+    n_nodes = sum(tree.node_count for tree in trees)
+    # Les indices de nœuds doivent contenir 2n (position des enfants dans 'children')
+    node_dtype = index_dtype(2 * n_nodes)
+
+    feature = np.empty(n_nodes, dtype=index_dtype(estimator.n_features_in_))
+    threshold = np.empty(n_nodes, dtype=np.float64)
+    children = np.empty(2 * n_nodes, dtype=node_dtype)
+    missing_left = np.zeros(n_nodes, dtype=np.uint8)
+    value = np.empty(n_nodes, dtype=leaf_dtype)
+    roots = np.empty(len(trees), dtype=node_dtype)
+
+    offset = 0
+    for t, tree in enumerate(trees):
+        nodes = slice(offset, offset + tree.node_count)
+        own = np.arange(offset, offset + tree.node_count)
+        leaf = tree.children_left == -1
+        roots[t] = offset
+        feature[nodes] = np.where(leaf, 0, tree.feature)
+        threshold[nodes] = tree.threshold
+        children[2 * offset:2 * (offset + tree.node_count):2] = np.where(leaf, own, tree.children_left + offset)
+        children[2 * offset + 1:2 * (offset + tree.node_count):2] = np.where(leaf, own, tree.children_right + offset)
+        if hasattr(tree, 'missing_go_to_left'):
+            missing_left[nodes] = tree.missing_go_to_left
+        value[nodes] = tree.value[:, 0, 0]
+        offset += tree.node_count
+
+    return {
+        "feature": feature, "threshold": threshold, "children": children,
+        "missing_left": missing_left, "value": value, "roots": roots,
+        "max_depth": np.array(max(tree.max_depth for tree in trees), dtype=np.int32),
+    }
+
+
+# Évaluation NumPy de la forêt aplatie, directement à partir des colonnes des voitures
+class ForestScorer:
+    def __init__(self, layout: Dict, arrays: Mapping[str, np.ndarray], fallback=None,
+                 max_batch: int = FOREST_MAX_BATCH, load_fallback: Optional[Callable[[], object]] = None):
+        self.layout = layout
+        self.arrays = arrays
+        self.n_features = layout["n_features"]
+        self.numeric = list(layout["numeric"].items())
+        self.categorical = list(layout["categorical"].items())
+        self.binary = list(layout["binary"].items())
+        self.feature = arrays["feature"]
+        self.threshold = arrays["threshold"]
+        self.children = arrays["children"]
+        self.missing_left = arrays["missing_left"]
+        self.value = arrays["value"]
+        self.roots = arrays["roots"]
+        self.max_depth = int(arrays["max_depth"])
+        # Pipeline sklearn utilisé pour les lots de plus de 'max_batch' lignes (chargé à la demande par 'load_fallback')
+        self.fallback = fallback
+        self.max_batch = max_batch
+        self.load_fallback = load_fallback
+        self._fallback_lock = threading.Lock()
+
+    # Matrice de features float32, identique à la sortie du préprocesseur convertie par les arbres sklearn
+    def transform(self, columns: Mapping[str, Sequence]) -> np.ndarray:
+        n_rows = len(next(iter(columns.values())))
+        X = np.zeros((n_rows, self.n_features), dtype=np.float32)
+        for column, (position, mean, scale) in self.numeric:
+            X[:, position] = (np.asarray(columns[column], dtype=float) - mean) / scale
+        for column, positions in self.categorical:
+            try:
+                encoded = np.fromiter((positions[value] for value in columns[column]), dtype=np.intp, count=n_rows)
+            except KeyError as e:
+                raise ValueError(f"Found unknown category {e.args[0]!r} in column '{column}' during transform")
+            rows = np.flatnonzero(encoded >= 0)
+            X[rows, encoded[rows]] = 1.0
+        for column, position in self.binary:
+            X[:, position] = np.asarray(columns[column], dtype=float)
+        return X
+
+    # Feuille atteinte dans chaque arbre, pour chaque ligne : parcours simultané de tous les chemins
+    # (ligne, arbre), un niveau par itération, à plat dans des tableaux 1D
+    def apply(self, X: np.ndarray) -> np.ndarray:
+        n_rows, n_trees = len(X), len(self.roots)
+        values = X.ravel()
+        row_start = np.repeat(np.arange(n_rows, dtype=np.intp) * X.shape[1], n_trees)
+        node = np.tile(self.roots.astype(np.intp), n_rows)
+        leaves = node.copy()
+        paths = np.arange(n_rows * n_trees)
+        has_missing = bool(np.isnan(values).any())
+        for depth in range(self.max_depth):
+            x = values[row_start + self.feature[node]]
+            go_right = x > self.threshold[node]
+            if has_missing:
+                missing = np.isnan(x)
+                go_right[missing] = self.missing_left[node[missing]] == 0
+            node = self.children[2 * node + go_right]
+            if depth % COMPACT_EVERY == COMPACT_EVERY - 1:
+                leaves[paths] = node
+                active = self.children[2 * node] != node
+                paths, node, row_start = paths[active], node[active], row_start[active]
+                if not len(paths):
+                    break
+        leaves[paths] = node
+        return leaves.reshape(n_rows, n_trees)
+
+    # Moyenne des feuilles sur les arbres (accumulée en float64 comme sklearn)
+    def predict(self, columns: Mapping[str, Sequence]) -> np.ndarray:
+        n_rows = len(next(iter(columns.values())))
+        pipeline = self.fallback_pipeline() if n_rows > self.max_batch else None
+        if pipeline is not None:
+            import pandas as pd
+            frame = pd.DataFrame(columns)[list(pipeline.named_steps['features_preprocessing'].feature_names_in_)]
+            return pipeline.predict(frame)
+        leaves = self.value[self.apply(self.transform(columns))]
+        return leaves.sum(axis=1, dtype=np.float64) / len(self.roots)
+
+    def fallback_pipeline(self):
+        if self.fallback is None and self.load_fallback is not None:
+            with self._fallback_lock:
+                if self.fallback is None:
+                    self.fallback = self.load_fallback()
+        return self.fallback
+
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in self.arrays.values())
+
+
+# Vérifie que le scorer reproduit les prédictions du pipeline sklearn
+def check_parity(pipeline, scorer: ForestScorer, n_rows: int = 256, rtol: Optional[float] = None,
+                 atol: float = 1e-6) -> bool:
+    import pandas as pd
+    if rtol is None:
+        rtol = 1e-9 if scorer.value.dtype == np.float64 else 1e-5
+    columns = probe_columns(scorer.layout, min(n_rows, scorer.max_batch))
+    frame = pd.DataFrame(columns)[list(pipeline.named_steps['features_preprocessing'].feature_names_in_)]
+    return bool(np.allclose(scorer.predict(columns), pipeline.predict(frame), rtol=rtol, atol=atol))
+
+
+# Construit le scorer rapide d'une forêt, ou None si la parité n'est pas garantie
+def build_forest_scorer(pipeline, leaf_dtype: str = FOREST_LEAF_DTYPE) -> Optional[ForestScorer]:
+    try:
+        scorer = ForestScorer(export_features(pipeline), export_forest(pipeline, np.dtype(leaf_dtype)), fallback=pipeline)
+    except (ValueError, KeyError, AttributeError, TypeError) as e:
+        print(f"Export de la forêt impossible : {e}")
+        return None
+    if not check_parity(pipeline, scorer):
+        print("Le scorer de la forêt ne reproduit pas le pipeline, utilisation de sklearn.")
+        return None
+    return scorer
+
+
+# Répertoire des tableaux exportés d'un artefact
+def forest_dir(model_path: str) -> str:
+    return model_path.replace('_model.joblib', '_forest')
+
+
+# Nombre d'exports conservés : le courant et le précédent, qu'un worker peut encore être en train de charger
+FOREST_KEEP_VERSIONS = 2
+
+
+def forest_versions(directory: str) -> List[str]:
+    parent, prefix = os.path.split(os.path.abspath(directory))
+    versions = [os.path.join(parent, entry) for entry in os.listdir(parent or '.') if entry.startswith(f"{prefix}.v")]
+    return sorted(versions, key=os.path.getmtime, reverse=True)
+
+
+# Écrit un fichier .npy par tableau et la table des features dans un répertoire versionné (<directory>.v<horodatage>),
+# puis fait pointer le lien symbolique 'directory' dessus en une seule opération : un lecteur voit toujours
+# un export complet. Les workers qui mappent encore une ancienne version gardent leurs fichiers jusqu'au rechargement.
+def save_forest(scorer: ForestScorer, directory: str, source_version: Optional[str]):
+    target = f"{directory}.v{time.time_ns():x}-{os.getpid()}"
+    os.makedirs(target)
+    for name in FOREST_ARRAYS:
+        np.save(os.path.join(target, f"{name}.npy"), np.asarray(scorer.arrays[name]))
+    with open(os.path.join(target, "layout.json"), "w", encoding="utf-8") as f:
+        json.dump({"source_version": source_version, **scorer.layout}, f, ensure_ascii=False)
+    # Export d'une version précédente écrit directement dans 'directory' : déplacé une fois pour laisser place au lien
+    if os.path.isdir(directory) and not os.path.islink(directory):
+        os.replace(directory, f"{directory}.v0-{os.getpid()}")
+    link = f"{directory}.link-{os.getpid()}"
+    if os.path.lexists(link):
+        os.remove(link)
+    os.symlink(os.path.basename(target), link)
+    os.replace(link, directory)
+    for old in forest_versions(directory)[FOREST_KEEP_VERSIONS:]:
+        shutil.rmtree(old, ignore_errors=True)
+
+
+# Le lien est résolu une seule fois : table des features et tableaux proviennent du même export
+def load_forest(directory: str, mmap_mode: Optional[str] = 'r', **kwargs) -> ForestScorer:
+    directory = os.path.realpath(directory)
+    with open(os.path.join(directory, "layout.json"), encoding="utf-8") as f:
+        layout = json.load(f)
+    layout.pop("source_version", None)
+    # np.asarray : vues ndarray simples sur les fichiers mappés (l'indexation d'un np.memmap est plus lente)
+    arrays = {name: np.asarray(np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode))
+              for name in FOREST_ARRAYS}
+    return ForestScorer(layout, arrays, **kwargs)
+
+
+# Scorer de la forêt exportée pour cette version de l'artefact, ou None (pas d'export, ou export périmé)
+def load_forest_scorer(model_path: str, version: str, mmap_mode: Optional[str] = 'r') -> Optional[ForestScorer]:
+    directory = os.path.realpath(forest_dir(model_path))
+    try:
+        with open(os.path.join(directory, "layout.json"), encoding="utf-8") as f:
+            source_version = json.load(f).get("source_version")
+    except FileNotFoundError:
+        return None
+    if source_version != version:
+        print(f"Tableaux de {directory} périmés (artefact {version}, export {source_version}), chargement du pipeline.")
+        return None
+    try:
+        scorer = load_forest(directory, mmap_mode, load_fallback=lambda: load(model_path, mmap_mode=mmap_mode))
+    except FileNotFoundError as e:
+        # Export supprimé pendant la lecture (plusieurs exports successifs) : le pipeline prend le relais
+        print(f"Tableaux de {directory} supprimés pendant le chargement ({e}), chargement du pipeline.")
+        return None
+    print(f"Forêt chargée depuis {directory} (mmap_mode={mmap_mode}).")
+    return scorer
+
+
+# Exporte la forêt d'un artefact si la parité avec le pipeline est vérifiée ; retourne le répertoire écrit.
+# 'source_version' permet d'exporter avant la mise en place de l'artefact (version de son fichier temporaire)
+def export_forest_arrays(model_path: str, leaf_dtype: str = FOREST_LEAF_DTYPE, pipeline=None,
+                         source_version: Optional[str] = None) -> Optional[str]:
+    source_version = source_version or artifact_version(model_path)
+    pipeline = pipeline if pipeline is not None else load(model_path)
+    scorer = ForestScorer(export_features(pipeline), export_forest(pipeline, np.dtype(leaf_dtype)))
+    parity = check_parity(pipeline, scorer)
+    print(f"Parité avec le pipeline sklearn : {parity}")
+    print(f"{len(scorer.roots)} arbres, {len(scorer.value)} nœuds, profondeur {scorer.max_depth}, "
+          f"{scorer.nbytes() / 1e6:.1f} Mo")
+    if not parity:
+        return None
+    directory = forest_dir(model_path)
+    save_forest(scorer, directory, source_version)
+    print(f"Tableaux de la forêt enregistrés dans {directory}")
+    return directory
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporte une forêt aléatoire en tableaux NumPy mappables en mémoire.")
+    parser.add_argument("model", help="Fichier .joblib du pipeline (RF)")
+    parser.add_argument("--leaf_dtype", default=FOREST_LEAF_DTYPE, choices=["float64", "float32"])
+    args = parser.parse_args()
+
+    if export_forest_arrays(args.model, args.leaf_dtype) is None:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,21 @@
-import gc
+import json
+import os
+import time
 import uvicorn
 import numpy as np
-import pandas as pd
-from pydantic import BaseModel
-from typing import Literal
-from fastapi import FastAPI
-from fastapi.responses import RedirectResponse
-from joblib import load
+import pyarrow as pa
+from pydantic import BaseModel, ValidationError
+from typing import Dict, List, Literal, Optional, Tuple
+from fastapi import FastAPI, Header, HTTPException, Request, Response
+from fastapi.responses import ORJSONResponse, PlainTextResponse, RedirectResponse
+from batching import MicroBatcher
+from cache import PredictionCache, connect_backend
+from columnar import ARROW_STREAM_TYPE, ColumnValidationError, car_fields, predictions_to_ipc, read_table, to_columns, validate_table
+from columnar import unknown_categories as unknown_column_categories
+from executor import InferenceExecutor, ModelUnavailableError
+from fast_path import build_scorer, load_scorer
+from metrics import BATCH_SIZE_BUCKETS, LATENCY_BUCKETS, MetricsRegistry, StageTimer, install_gc_metrics, read_process_memory
+from registry import ModelRegistry
 
 # Description pour l'application FastAPI
 description = """
@@ -29,7 +38,9 @@ app = FastAPI(
     title="Prédicteur de prix de location de voiture",
     description=description,
     version="0.0.1",
-    openapi_tags=tags_metadata
+    openapi_tags=tags_metadata,
+    # Sérialisation JSON par orjson (les listes de prédictions des lots en sont nettement plus rapides)
+    default_response_class=ORJSONResponse
 )
 
 # Définition de la classe Car pour les données d'entrée
@@ -53,42 +64,366 @@ class Car(BaseModel):
 async def docs_redirect():
     return RedirectResponse(url='/docs')
 
-# Fonction pour charger le jeu de données
-def load_data(url: str) -> pd.DataFrame:
-    print("Chargement du jeu de données depuis l'URL...")
-    dataset = pd.read_csv(url)
-    dataset = dataset.drop(['Unnamed: 0'], axis=1)
-    print("Jeu de données chargé avec succès.")
-    return dataset
+# Registre des modèles : les artefacts sont chargés une fois puis gardés en mémoire
+MODEL_DIR = os.environ.get("MODEL_DIR", os.path.dirname(os.path.abspath(__file__)))
+MODEL_CHECK_INTERVAL = float(os.environ.get("MODEL_CHECK_INTERVAL", "5"))
+# Scorers NumPy pour les modèles linéaires et la forêt aléatoire (sans DataFrame ni ColumnTransformer)
+FAST_PATH = os.environ.get("FAST_PATH", "1") == "1"
+# Tableaux des modèles mappés en mémoire et partagés entre workers ('r' par défaut, 'none' pour les copier)
+MODEL_MMAP_MODE = os.environ.get("MODEL_MMAP_MODE", "r")
+MODEL_MMAP_MODE = None if MODEL_MMAP_MODE.lower() in ("", "none") else MODEL_MMAP_MODE
+registry = ModelRegistry(MODEL_DIR, check_interval=MODEL_CHECK_INTERVAL,
+                         scorer_factory=build_scorer if FAST_PATH else None,
+                         scorer_loader=load_scorer if FAST_PATH else None, mmap_mode=MODEL_MMAP_MODE)
 
-# URL du jeu de données
-dataset_url = "https://full-stack-assets.s3.eu-west-3.amazonaws.com/Deployment/get_around_pricing_project.csv"
-# Chargement du jeu de données
-dataset = load_data(dataset_url)
+# Exécution de l'inférence hors de la boucle d'événements : 'thread', 'process' ou 'inline'
+# (INFERENCE_EXECUTOR par défaut, INFERENCE_EXECUTOR_<RÉGRESSEUR> pour un modèle donné)
+INFERENCE_EXECUTOR = os.environ.get("INFERENCE_EXECUTOR", "thread")
+INFERENCE_WORKERS = int(os.environ.get("INFERENCE_WORKERS", "0")) or None
+executor = InferenceExecutor(
+    registry,
+    kinds={name: os.environ.get(f"INFERENCE_EXECUTOR_{name.upper()}", INFERENCE_EXECUTOR) for name in registry.names},
+    workers=INFERENCE_WORKERS,
+    fast_path=FAST_PATH)
+
+# Métadonnées des modèles (features et vocabulaires des catégories connues des encodeurs),
+# petit fichier local écrit par train.py : le démarrage ne dépend pas du réseau
+METADATA_PATH = os.environ.get("MODEL_METADATA", os.path.join(MODEL_DIR, "model_metadata.json"))
+metadata: Dict = {}
+
+def load_metadata(path: str) -> Dict:
+    if not os.path.exists(path):
+        print(f"Métadonnées introuvables ({path}), pas de contrôle des catégories.")
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+# Chargement des modèles au démarrage de l'application (les processus d'inférence chargent les leurs)
+@app.on_event("startup")
+def load_models():
+    metadata.update(load_metadata(METADATA_PATH))
+    registry.load_all(executor.local_regressors())
+    executor.start()
+    connect_prediction_cache()
+
+# Features et catégories acceptées par les modèles
+@app.get("/metadata", tags=["Prédictions"])
+async def model_metadata():
+    return metadata
+
+# Arrêt des micro-lots et des pools d'inférence à l'arrêt de l'application
+@app.on_event("shutdown")
+async def stop_inference():
+    for batcher in batchers.values():
+        await batcher.close()
+    executor.shutdown()
+
+# Versions des modèles actuellement en mémoire
+@app.get("/models", tags=["Prédictions"])
+async def models():
+    return registry.versions()
+
+# Colonnes attendues par les modèles, dans l'ordre de la classe Car
+FEATURES = list(Car.__fields__)
+
+# Cache des prédictions (LRU, durée de vie optionnelle), invalidé lors du rechargement d'un modèle.
+# PREDICTION_CACHE_ADDRESS (ex. 127.0.0.1:50000) partage le cache entre workers via 'python3 cache.py serve'.
+PREDICTION_CACHE_SIZE = int(os.environ.get("PREDICTION_CACHE_SIZE", "10000"))
+PREDICTION_CACHE_TTL = float(os.environ.get("PREDICTION_CACHE_TTL", "0")) or None
+PREDICTION_CACHE_ADDRESS = os.environ.get("PREDICTION_CACHE_ADDRESS")
+# Clé partagée avec le serveur de cache, sans valeur par défaut : le serveur désérialise (pickle) tout ce que
+# lui envoient les clients authentifiés, une clé connue permettrait d'exécuter du code sur le serveur
+PREDICTION_CACHE_AUTHKEY = os.environ.get("PREDICTION_CACHE_AUTHKEY", "").encode()
+
+prediction_cache = None
+if PREDICTION_CACHE_SIZE > 0:
+    prediction_cache = PredictionCache(FEATURES, maxsize=PREDICTION_CACHE_SIZE, ttl=PREDICTION_CACHE_TTL)
+    registry.add_listener(prediction_cache.invalidate)
+
+def connect_prediction_cache():
+    if prediction_cache is None or not PREDICTION_CACHE_ADDRESS:
+        return
+    if not PREDICTION_CACHE_AUTHKEY:
+        raise ValueError("PREDICTION_CACHE_AUTHKEY must be set when PREDICTION_CACHE_ADDRESS is used.")
+    try:
+        prediction_cache.backend = connect_backend(PREDICTION_CACHE_ADDRESS, PREDICTION_CACHE_AUTHKEY)
+        print(f"Cache des prédictions partagé : {PREDICTION_CACHE_ADDRESS}")
+    except OSError as e:
+        print(f"Serveur de cache {PREDICTION_CACHE_ADDRESS} injoignable ({e}), utilisation d'un cache local.")
+
+# Statistiques du cache des prédictions
+@app.get("/cache", tags=["Prédictions"])
+async def cache_stats():
+    if prediction_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **prediction_cache.stats()}
+
+# Métriques Prometheus : durée des étapes de prédiction par régresseur, accès aux modèles et au cache,
+# requêtes en cours, taille des lots envoyés aux modèles et pauses du ramasse-miettes (propres à chaque worker)
+metrics = MetricsRegistry()
+metrics.declare("predict_request_seconds", "histogram", "Durée de traitement des requêtes de prédiction.", LATENCY_BUCKETS)
+metrics.declare("predict_stage_seconds", "histogram", "Durée de chaque étape de prédiction.", LATENCY_BUCKETS)
+metrics.declare("predict_requests_in_flight", "gauge", "Requêtes de prédiction en cours de traitement.")
+metrics.declare("predict_batch_size", "histogram", "Nombre de voitures par appel au modèle.", BATCH_SIZE_BUCKETS)
+metrics.declare("prediction_cache_lookups_total", "counter", "Consultations du cache des prédictions.")
+metrics.declare("prediction_cache_entries", "gauge", "Nombre d'entrées du cache des prédictions.")
+metrics.declare("model_lookups_total", "counter", "Accès aux modèles du registre (hit, check, load).")
+metrics.declare("model_load_seconds", "gauge", "Durée du dernier chargement de chaque modèle.")
+metrics.declare("process_memory_bytes", "gauge", "Mémoire du worker (rss, pss, pages partagées et privées).")
+install_gc_metrics(metrics)
+
+# Compteurs tenus par le registre des modèles et le cache, lus à chaque consultation de /metrics
+def collect_model_metrics(metrics: MetricsRegistry):
+    for (name, result), count in list(registry.lookups.items()):
+        metrics.set("model_lookups_total", count, regressor=name, result=result)
+    for name, seconds in list(registry.load_seconds.items()):
+        metrics.set("model_load_seconds", seconds, regressor=name)
+    if prediction_cache is not None:
+        metrics.set("prediction_cache_entries", prediction_cache.backend.size())
+    for kind, size in read_process_memory().items():
+        metrics.set("process_memory_bytes", size, kind=kind)
+
+metrics.add_collector(collect_model_metrics)
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+# Profilage à la demande : avec l'en-tête 'X-Profile: 1', la réponse contient la durée de chaque étape (Server-Timing)
+def profile_requested(x_profile: Optional[str]) -> bool:
+    return x_profile is not None and x_profile.strip().lower() not in ("", "0", "false")
+
+def record_timings(endpoint: str, regressor: str, timer: StageTimer, response: Response, x_profile: Optional[str]):
+    for stage, seconds in timer.stages.items():
+        metrics.observe("predict_stage_seconds", seconds, regressor=regressor, stage=stage)
+    metrics.observe("predict_request_seconds", timer.elapsed(), endpoint=endpoint, regressor=regressor)
+    if profile_requested(x_profile):
+        response.headers["Server-Timing"] = timer.server_timing()
+
+# En-têtes ajoutés à la réponse injectée dans un point de terminaison (Server-Timing), à recopier
+# dans une réponse renvoyée telle quelle
+def response_headers(response: Response) -> Dict[str, str]:
+    return {name: value for name, value in response.headers.items() if name != "content-length"}
+
+# Réponse JSON sérialisée par orjson sans passer par jsonable_encoder
+def json_response(content: Dict, response: Response) -> ORJSONResponse:
+    return ORJSONResponse(content, headers=response_headers(response))
+
+# Valeurs de chaque feature pour une liste de voitures
+def cars_to_columns(cars: List[Car]) -> Dict[str, list]:
+    return {feature: [getattr(car, feature) for car in cars] for feature in FEATURES}
+
+# Vérifier que le modèle demandé par 'regressor' est servi (sinon un message d'erreur)
+def check_regressor(regressor: str):
+    try:
+        available = registry.available(regressor)
+    except KeyError:
+        return {"error": f"Regressor '{regressor}' not supported."}
+    if not available:
+        return {"error": f"Model for regressor '{regressor}' is not available."}
+    return None
+
+# Modèle devenu indisponible pendant le traitement de la requête : même réponse que check_regressor
+@app.exception_handler(ModelUnavailableError)
+async def model_unavailable(request: Request, exc: ModelUnavailableError):
+    return ORJSONResponse({"error": f"Model for regressor '{exc.regressor}' is not available."})
+
+# Catégories inconnues des modèles (l'encodeur les refuserait lors de la prédiction)
+def unknown_categories(cars: List[Car]) -> List[Dict]:
+    errors = []
+    for column, vocabulary in metadata.get("categories", {}).items():
+        known = set(vocabulary)
+        for row, car in enumerate(cars):
+            value = getattr(car, column)
+            if value not in known:
+                errors.append({"row": row, "column": column, "value": value, "known": vocabulary})
+    return errors
+
+def check_categories(cars: List[Car]):
+    errors = unknown_categories(cars)
+    if errors:
+        raise HTTPException(status_code=422, detail={"unknown_categories": errors})
+
+# Prédiction vectorisée pour une liste de voitures, exécutée hors de la boucle d'événements.
+# Les durées des étapes du modèle sont enregistrées une fois par appel (et non par requête du lot).
+async def predict_cars(regressor: str, cars: List[Car]) -> Tuple[np.ndarray, Dict[str, float]]:
+    start = time.perf_counter()
+    columns = cars_to_columns(cars)
+    return await predict_from_columns(regressor, columns, len(cars), {"columns": time.perf_counter() - start})
+
+async def predict_from_columns(regressor: str, columns: Dict, n_rows: int,
+                               stages: Optional[Dict[str, float]] = None) -> Tuple[np.ndarray, Dict[str, float]]:
+    start = time.perf_counter()
+    predictions, model_stages = await executor.predict_timed(regressor, columns)
+    stages = {**(stages or {}), "executor": time.perf_counter() - start, **model_stages}
+    for stage, seconds in stages.items():
+        metrics.observe("predict_stage_seconds", seconds, regressor=regressor, stage=stage)
+    metrics.observe("predict_batch_size", n_rows, regressor=regressor)
+    return predictions, stages
+
+# Micro-lots : les requêtes /predict concurrentes sont regroupées en un seul appel au modèle
+MICRO_BATCH_MAX_SIZE = int(os.environ.get("MICRO_BATCH_MAX_SIZE", "32"))
+MICRO_BATCH_MAX_WAIT_MS = float(os.environ.get("MICRO_BATCH_MAX_WAIT_MS", "2"))
+
+def make_batcher(regressor: str) -> MicroBatcher:
+    async def predict_batch(cars):
+        predictions, stages = await predict_cars(regressor, cars)
+        return [(price, stages) for price in predictions]
+    return MicroBatcher(predict_batch, max_batch_size=MICRO_BATCH_MAX_SIZE, max_wait=MICRO_BATCH_MAX_WAIT_MS / 1000)
+
+batchers = {name: make_batcher(name) for name in registry.names}
+
+# Prédictions servies depuis le cache ; seules les voitures absentes du cache sont envoyées à 'predict',
+# qui retourne les prix et la durée des étapes du modèle (mesurée sous le nom 'stage' dans 'timer')
+async def cached_predict(regressor: str, cars: List[Car], predict, timer: StageTimer, stage: str) -> List[float]:
+    if prediction_cache is None:
+        with timer.stage(stage):
+            predicted_prices, model_stages = await predict(cars)
+        timer.detail(model_stages)
+        return [float(price) for price in predicted_prices]
+    with timer.stage("cache"):
+        version = registry.current_version(regressor)
+        keys = [prediction_cache.key(regressor, version, car) for car in cars]
+        prices = await prediction_cache.get_many_async(keys)
+    missing = [row for row, price in enumerate(prices) if price is None]
+    metrics.inc("prediction_cache_lookups_total", len(cars) - len(missing), regressor=regressor, result="hit")
+    metrics.inc("prediction_cache_lookups_total", len(missing), regressor=regressor, result="miss")
+    if missing:
+        with timer.stage(stage):
+            predicted_prices, model_stages = await predict([cars[row] for row in missing])
+        timer.detail(model_stages)
+        for row, price in zip(missing, predicted_prices):
+            prices[row] = float(price)
+        with timer.stage("cache"):
+            await prediction_cache.set_many_async([(keys[row], prices[row]) for row in missing])
+    return prices
 
 # Définition du point de terminaison pour la prédiction
 @app.post("/predict", tags=["Prédictions"])
-async def predict(data: Car, regressor: str):
-    # Nettoyer la mémoire inutilisée
-    gc.collect(generation=2)
-
-    # Charger le modèle approprié en fonction de 'regressor'
-    if regressor == 'LR':
-        loaded_model = load('LR_model.joblib')
-    elif regressor == 'Ridge':
-        loaded_model = load('Ridge_model.joblib')
-    elif regressor == 'RF':
-        loaded_model = load('RF_model.joblib')
-    else:
-        return {"error": f"Regressor '{regressor}' not supported."}
+async def predict(data: Car, regressor: str, response: Response, x_profile: Optional[str] = Header(None)):
+    error = check_regressor(regressor)
+    if error:
+        return error
+
+    with metrics.in_flight("predict_requests_in_flight", endpoint="/predict"):
+        timer = StageTimer()
+        with timer.stage("categories"):
+            check_categories([data])
+
+        # Prédiction regroupée avec les autres requêtes concurrentes (sauf si elle est déjà en cache)
+        async def predict_one(cars):
+            price, stages = await batchers[regressor].submit(cars[0])
+            return [price], stages
+        predicted_price, = await cached_predict(regressor, [data], predict_one, timer, "batch")
+        record_timings("/predict", regressor, timer, response, x_profile)
+
+    return json_response({"prediction": float(predicted_price)}, response)  # Assurez-vous que predicted_price est de type float
+
+# Prédiction groupée : une seule prédiction vectorisée pour toutes les voitures, résultats dans l'ordre
+@app.post("/predict/batch", tags=["Prédictions"])
+async def predict_batch(cars: List[Car], regressor: str, response: Response, x_profile: Optional[str] = Header(None)):
+    error = check_regressor(regressor)
+    if error:
+        return error
+    if not cars:
+        return {"predictions": []}
+
+    with metrics.in_flight("predict_requests_in_flight", endpoint="/predict/batch"):
+        timer = StageTimer()
+        with timer.stage("categories"):
+            check_categories(cars)
+
+        predicted_prices = await cached_predict(regressor, cars, lambda missing: predict_cars(regressor, missing),
+                                                timer, "inference")
+        record_timings("/predict/batch", regressor, timer, response, x_profile)
+    return json_response({"predictions": predicted_prices}, response)
+
+# Prédiction groupée à partir d'un corps NDJSON (une voiture JSON par ligne) lu en flux
+@app.post("/predict/batch/ndjson", tags=["Prédictions"])
+async def predict_batch_ndjson(request: Request, regressor: str, response: Response,
+                               x_profile: Optional[str] = Header(None)):
+    error = check_regressor(regressor)
+    if error:
+        return error
+
+    cars = []
+    buffer = b""
+    line_number = 0
+
+    def parse_line(line: bytes):
+        nonlocal line_number
+        line_number += 1
+        if not line.strip():
+            return
+        try:
+            cars.append(Car.parse_raw(line))
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail={"line": line_number, "errors": e.errors()})
+
+    with metrics.in_flight("predict_requests_in_flight", endpoint="/predict/batch/ndjson"):
+        timer = StageTimer()
+        # Lecture du corps en flux et validation des lignes
+        with timer.stage("parse"):
+            async for chunk in request.stream():
+                buffer += chunk
+                *lines, buffer = buffer.split(b"\n")
+                for line in lines:
+                    parse_line(line)
+            parse_line(buffer)
+
+        if not cars:
+            return {"predictions": []}
+        with timer.stage("categories"):
+            check_categories(cars)
+
+        predicted_prices = await cached_predict(regressor, cars, lambda missing: predict_cars(regressor, missing),
+                                                timer, "inference")
+        record_timings("/predict/batch/ndjson", regressor, timer, response, x_profile)
+    return json_response({"predictions": predicted_prices}, response)
+
+# Colonnes de la classe Car par type, pour valider les lots Arrow colonne par colonne
+CAR_FIELDS = car_fields(Car)
+
+# Prédiction groupée à partir d'un lot Apache Arrow (IPC, flux ou fichier ; une colonne par feature) :
+# validation et contrôle des catégories colonne par colonne, sans objet Car ni cache par ligne.
+# Réponse Arrow (colonne 'prediction') ou JSON avec l'en-tête 'Accept: application/json'
+@app.post("/predict/batch/arrow", tags=["Prédictions"])
+async def predict_batch_arrow(request: Request, regressor: str, response: Response,
+                              x_profile: Optional[str] = Header(None), accept: Optional[str] = Header(None)):
+    error = check_regressor(regressor)
+    if error:
+        return error
 
-    # Création d'un DataFrame à partir des nouvelles données
-    new_data = pd.DataFrame([data.dict()])
+    with metrics.in_flight("predict_requests_in_flight", endpoint="/predict/batch/arrow"):
+        timer = StageTimer()
+        with timer.stage("parse"):
+            body = await request.body()
+            try:
+                table = read_table(body)
+            except (pa.ArrowInvalid, OSError) as e:
+                raise HTTPException(status_code=400, detail=f"Invalid Arrow IPC body: {e}")
+        with timer.stage("validation"):
+            try:
+                arrays = validate_table(table, CAR_FIELDS)
+            except ColumnValidationError as e:
+                raise HTTPException(status_code=422, detail={"errors": e.errors})
+        with timer.stage("categories"):
+            errors = unknown_column_categories(arrays, metadata.get("categories", {}))
+            if errors:
+                raise HTTPException(status_code=422, detail={"unknown_categories": errors})
 
-    # Prédiction avec le modèle chargé
-    predicted_price = loaded_model.predict(new_data)[0]  # Obtenir la prédiction
+        if table.num_rows:
+            with timer.stage("inference"):
+                columns = to_columns(arrays, FEATURES)
+                predicted_prices, model_stages = await predict_from_columns(regressor, columns, table.num_rows)
+            timer.detail(model_stages)
+        else:
+            predicted_prices = np.empty(0)
+        record_timings("/predict/batch/arrow", regressor, timer, response, x_profile)
 
-    return {"prediction": float(predicted_price)}  # Assurez-vous que predicted_price est de type float
+    if accept and "application/json" in accept and ARROW_STREAM_TYPE not in accept:
+        return json_response({"predictions": predicted_prices.tolist()}, response)
+    return Response(predictions_to_ipc(predicted_prices), media_type=ARROW_STREAM_TYPE, headers=response_headers(response))
 
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
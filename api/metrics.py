@@ -0,0 +1,174 @@
+import bisect
+import gc
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Métriques de l'API au format texte Prometheus (GET /metrics), sans dépendance externe :
+# compteurs, jauges et histogrammes étiquetés, protégés par un verrou (l'inférence tourne dans des threads).
+# Les valeurs sont propres à chaque processus : avec plusieurs workers uvicorn, chaque worker expose les siennes.
+
+# Bornes des histogrammes de latence (secondes) et de taille des lots
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name: str, labels: Labels) -> Iterator[str]:
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            cumulative += count
+            yield f"{name}_bucket{format_labels(labels, ('le', format_value(bound)))} {cumulative}"
+        yield f"{name}_sum{format_labels(labels)} {format_value(self.sum)}"
+        yield f"{name}_count{format_labels(labels)} {self.count}"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        # Réentrant : une collecte du ramasse-miettes peut enregistrer sa durée pendant qu'une métrique est modifiée
+        self._lock = threading.RLock()
+        self._help: Dict[str, Tuple[str, str]] = {}
+        self._buckets: Dict[str, Sequence[float]] = {}
+        self._values: Dict[str, Dict[Labels, object]] = {}
+        # Fonctions appelées à chaque lecture (valeurs tenues par d'autres composants : cache, registre des modèles)
+        self._collectors: List[Callable[["MetricsRegistry"], None]] = []
+
+    def declare(self, name: str, kind: str, help_text: str, buckets: Optional[Sequence[float]] = None):
+        self._help[name] = (kind, help_text)
+        self._values.setdefault(name, {})
+        if buckets is not None:
+            self._buckets[name] = buckets
+
+    def add_collector(self, collector: Callable[["MetricsRegistry"], None]):
+        self._collectors.append(collector)
+
+    def inc(self, name: str, amount: float = 1, **labels: str):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            values = self._values[name]
+            values[key] = values.get(key, 0) + amount
+
+    def set(self, name: str, value: float, **labels: str):
+        with self._lock:
+            self._values[name][tuple(sorted(labels.items()))] = value
+
+    def observe(self, name: str, value: float, **labels: str):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            histogram = self._values[name].get(key)
+            if histogram is None:
+                histogram = self._values[name][key] = Histogram(self._buckets[name])
+            histogram.observe(value)
+
+    @contextmanager
+    def in_flight(self, name: str, **labels: str):
+        self.inc(name, 1, **labels)
+        try:
+            yield
+        finally:
+            self.inc(name, -1, **labels)
+
+    def render(self) -> str:
+        for collector in self._collectors:
+            collector(self)
+        lines = []
+        with self._lock:
+            for name, (kind, help_text) in self._help.items():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in sorted(self._values[name].items()):
+                    if isinstance(value, Histogram):
+                        lines.extend(value.lines(name, labels))
+                    else:
+                        lines.append(f"{name}{format_labels(labels)} {format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+# Durées des étapes d'une requête (secondes). Les étapes du modèle, mesurées une fois par lot,
+# sont ajoutées comme détails : elles apparaissent dans l'en-tête Server-Timing mais pas dans les histogrammes de la requête.
+class StageTimer:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        self.details: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+    def detail(self, stages: Dict[str, float]):
+        for name, seconds in stages.items():
+            self.details[name] = self.details.get(name, 0.0) + seconds
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+    # Valeur de l'en-tête Server-Timing (durées en millisecondes)
+    def server_timing(self) -> str:
+        stages = {**self.stages, **self.details, "total": self.elapsed()}
+        return ", ".join(f"{name};dur={seconds * 1000:.3f}" for name, seconds in stages.items())
+
+
+# Mémoire d'un processus (octets) lue dans /proc/<pid>/smaps_rollup (Linux) : 'pss' répartit les pages partagées
+# (modèles mappés en mémoire, bibliothèques) entre les processus qui les utilisent, contrairement à 'rss'
+SMAPS_FIELDS = {"Rss": "rss", "Pss": "pss", "Shared_Clean": "shared_clean", "Shared_Dirty": "shared_dirty",
+                "Private_Clean": "private_clean", "Private_Dirty": "private_dirty", "Swap": "swap"}
+
+def read_process_memory(pid="self") -> Dict[str, int]:
+    memory = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                field, _, value = line.partition(":")
+                if field in SMAPS_FIELDS:
+                    memory[SMAPS_FIELDS[field]] = int(value.split()[0]) * 1024
+    except OSError:
+        pass
+    return memory
+
+
+# Durée des collectes du ramasse-miettes, par génération
+def install_gc_metrics(metrics: MetricsRegistry, name: str = "python_gc_pause_seconds"):
+    metrics.declare(name, "histogram", "Durée des collectes du ramasse-miettes par génération.", LATENCY_BUCKETS)
+    started = {}
+
+    def callback(phase, info):
+        if phase == "start":
+            started["time"] = time.perf_counter()
+        elif "time" in started:
+            metrics.observe(name, time.perf_counter() - started.pop("time"), generation=str(info["generation"]))
+
+    gc.callbacks.append(callback)
+    return callback
@@ -0,0 +1,157 @@
+import os
+import threading
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+from joblib import load
+
+# Modèles servis par l'API
+SUPPORTED_REGRESSORS = ('LR', 'Ridge', 'RF')
+
+
+# Version d'un artefact : date de modification et taille du fichier (None s'il n'existe pas)
+def artifact_version(path: str) -> Optional[str]:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+
+
+# Modèle chargé en mémoire avec sa version et son éventuel scorer rapide
+# ('model' vaut None lorsque le scorer a été chargé sans désérialiser le pipeline)
+class LoadedModel(NamedTuple):
+    name: str
+    version: str
+    model: object
+    scorer: Optional[object] = None
+
+
+# Registre des modèles : chaque artefact est chargé une seule fois et gardé en mémoire.
+# Un nouvel artefact (fichier modifié sur disque) est rechargé puis échangé de façon atomique,
+# les requêtes en cours continuent d'utiliser l'ancienne version.
+# Avec 'mmap_mode', les tableaux NumPy des artefacts sont mappés en mémoire (joblib) au lieu d'être copiés :
+# les workers d'un même serveur partagent alors une seule copie dans le cache de pages.
+# 'scorer_loader' peut fournir directement un scorer à partir de tableaux exportés à côté de l'artefact,
+# auquel cas le pipeline n'est pas désérialisé.
+class ModelRegistry:
+    def __init__(self, model_dir: str, names: Tuple[str, ...] = SUPPORTED_REGRESSORS, check_interval: float = 5.0,
+                 scorer_factory: Optional[Callable[[str, object], Optional[object]]] = None,
+                 scorer_loader: Optional[Callable[[str, str, str, Optional[str]], Optional[object]]] = None,
+                 mmap_mode: Optional[str] = None):
+        self.model_dir = model_dir
+        self.names = tuple(names)
+        self.check_interval = check_interval
+        self.scorer_factory = scorer_factory
+        self.scorer_loader = scorer_loader
+        self.mmap_mode = mmap_mode
+        self._models: Dict[str, LoadedModel] = {}
+        self._last_check: Dict[str, float] = {}
+        self._artifact_versions: Dict[str, Optional[str]] = {}
+        self._version_checks: Dict[str, float] = {}
+        self._listeners: List[Callable[[str, str], None]] = []
+        self._lock = threading.Lock()
+        # Accès aux modèles : 'hit' (modèle en mémoire), 'check' (artefact vérifié, inchangé), 'load' (chargement)
+        self.lookups: Dict[Tuple[str, str], int] = {}
+        self.load_seconds: Dict[str, float] = {}
+
+    def path_for(self, name: str) -> str:
+        return os.path.join(self.model_dir, f"{name}_model.joblib")
+
+    def _artifact_version(self, name: str) -> Optional[str]:
+        return artifact_version(self.path_for(name))
+
+    def _load(self, name: str, version: str) -> LoadedModel:
+        print(f"Chargement du modèle {name} (version {version})...")
+        start = time.perf_counter()
+        path = self.path_for(name)
+        scorer = self.scorer_loader(name, path, version, self.mmap_mode) if self.scorer_loader else None
+        if scorer is not None:
+            model = None
+        else:
+            model = load(path, mmap_mode=self.mmap_mode)
+            scorer = self.scorer_factory(name, model) if self.scorer_factory else None
+        self.load_seconds[name] = time.perf_counter() - start
+        self._count(name, 'load')
+        loaded = LoadedModel(name, version, model, scorer)
+        with self._lock:
+            current = self._models.get(name)
+            # Un autre thread a peut-être déjà chargé la même version
+            if current is not None and current.version == version:
+                return current
+            self._models[name] = loaded
+        print(f"Modèle {name} chargé avec succès.")
+        if current is not None:
+            self._notify(name, version)
+        return loaded
+
+    def _count(self, name: str, result: str):
+        self.lookups[(name, result)] = self.lookups.get((name, result), 0) + 1
+
+    # Fonctions appelées avec (nom, version) lorsqu'un modèle est remplacé par une nouvelle version
+    def add_listener(self, listener: Callable[[str, str], None]):
+        self._listeners.append(listener)
+
+    def _notify(self, name: str, version: str):
+        for listener in self._listeners:
+            listener(name, version)
+
+    # Chargement des artefacts disponibles au démarrage (tous par défaut)
+    def load_all(self, names: Optional[Tuple[str, ...]] = None):
+        for name in (self.names if names is None else names):
+            version = self._artifact_version(name)
+            if version is None:
+                print(f"Artefact introuvable pour le modèle {name}, chargement différé.")
+                continue
+            self._load(name, version)
+            self._last_check[name] = time.monotonic()
+
+    # Vérifie si un nouvel artefact est apparu et l'échange le cas échéant
+    def refresh(self, name: str) -> Optional[LoadedModel]:
+        self._last_check[name] = time.monotonic()
+        version = self._artifact_version(name)
+        current = self._models.get(name)
+        if version is None:
+            return current
+        if current is None or current.version != version:
+            return self._load(name, version)
+        self._count(name, 'check')
+        return current
+
+    # Retourne le modèle demandé (None si aucun artefact n'existe)
+    def get(self, name: str) -> Optional[LoadedModel]:
+        if name not in self.names:
+            raise KeyError(name)
+        current = self._models.get(name)
+        last_check = self._last_check.get(name)
+        if current is None or last_check is None or time.monotonic() - last_check >= self.check_interval:
+            return self.refresh(name)
+        self._count(name, 'hit')
+        return current
+
+    # Version courante d'un modèle, lue sur l'artefact (un stat au plus par intervalle de vérification), qu'il soit
+    # chargé dans ce processus ou servi par le pool de processus. Ne charge jamais le modèle : appelée dans la boucle
+    # d'événements, elle laisse le rechargement à l'inférence (get() dans le thread ou le processus d'exécution).
+    def current_version(self, name: str) -> Optional[str]:
+        last_check = self._version_checks.get(name)
+        if name not in self._artifact_versions or last_check is None or time.monotonic() - last_check >= self.check_interval:
+            self._version_checks[name] = time.monotonic()
+            previous = self._artifact_versions.get(name)
+            version = self._artifact_version(name)
+            loaded = self._models.get(name)
+            if version is None and loaded is not None:
+                # Artefact supprimé : le modèle en mémoire reste servi
+                version = loaded.version
+            self._artifact_versions[name] = version
+            # Un modèle chargé ici notifie lui-même son remplacement (_load)
+            if loaded is None and previous is not None and version is not None and version != previous:
+                self._notify(name, version)
+        return self._artifact_versions[name]
+
+    # Un modèle est disponible s'il est en mémoire ou si son artefact existe
+    def available(self, name: str) -> bool:
+        if name not in self.names:
+            raise KeyError(name)
+        return name in self._models or self._artifact_version(name) is not None
+
+    def versions(self) -> Dict[str, str]:
+        return {name: loaded.version for name, loaded in self._models.items()}
@@ -1,28 +1,34 @@
 import pandas as pd
-from sklearn.model_selection import train_test_split, GridSearchCV
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401 (active HalvingGridSearchCV)
+from sklearn.model_selection import train_test_split, GridSearchCV, HalvingGridSearchCV, HalvingRandomSearchCV
 from sklearn.preprocessing import StandardScaler, FunctionTransformer, OneHotEncoder
 from sklearn.compose import ColumnTransformer
 from sklearn.linear_model import LinearRegression, Ridge
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.pipeline import Pipeline
 from sklearn.metrics import r2_score, mean_absolute_error
-from joblib import dump
+import sklearn
+from dataset_cache import DATASET_URL, DEFAULT_CACHE_DIR, load_dataset
+from forest import export_forest_arrays
+from registry import artifact_version
+from joblib import dump, load
 import argparse
-
-# Fonction pour charger les données
-def load_data(url):
-    print("Loading dataset from URL...")
-    dataset = pd.read_csv(url)
-    dataset = dataset.drop(['Unnamed: 0'], axis=1)
-    print("Dataset loaded successfully.")
-    return dataset
+import hashlib
+import json
+import os
+import time
 
 # Fonction pour regrouper les catégories rares
 def regroup_categories(df, column, threshold):
     print(f"Regrouping rare categories in column: {column}...")
     counts = df[column].value_counts()
     infrequent_values = counts[counts < threshold].index
+    # Colonne catégorielle (jeu de données en cache) : 'Others' doit faire partie des catégories
+    if isinstance(df[column].dtype, pd.CategoricalDtype) and 'Others' not in df[column].cat.categories:
+        df[column] = df[column].cat.add_categories(['Others'])
     df.loc[df[column].isin(infrequent_values), column] = 'Others'
+    if isinstance(df[column].dtype, pd.CategoricalDtype):
+        df[column] = df[column].cat.remove_unused_categories()
     print(f"Categories regrouped in column: {column}.")
     return df
 
@@ -59,10 +65,74 @@ def create_preprocessor(X):
     
     return preprocessor
 
+# Version du préprocesseur : à incrémenter lorsque create_preprocessor change, pour invalider le cache
+FEATURES_CACHE_VERSION = 1
+
+# Fonction pour ajuster le préprocesseur et transformer les données d'entraînement, avec cache sur disque :
+# la matrice transformée (one-hot creuse et variables numériques normalisées) ne dépend que des données
+# d'entraînement, elle est donc réutilisée par tous les candidats, régresseurs et exécutions
+def fit_features(X_train, cache_dir=None):
+    if cache_dir is None:
+        preprocessor = create_preprocessor(X_train)
+        return preprocessor, preprocessor.fit_transform(X_train)
+
+    digest = hashlib.sha256()
+    digest.update(f"{FEATURES_CACHE_VERSION}-{sklearn.__version__}".encode())
+    digest.update(str(list(X_train.dtypes.items())).encode())
+    digest.update(pd.util.hash_pandas_object(X_train, index=True).values.tobytes())
+    cache_path = os.path.join(cache_dir, f"features-{digest.hexdigest()[:16]}.joblib")
+
+    if os.path.exists(cache_path):
+        print(f"Loading fitted preprocessor and transformed features from {cache_path}...")
+        return load(cache_path)
+
+    preprocessor = create_preprocessor(X_train)
+    features = (preprocessor, preprocessor.fit_transform(X_train))
+    os.makedirs(cache_dir, exist_ok=True)
+    dump(features, cache_path + ".tmp")
+    os.replace(cache_path + ".tmp", cache_path)
+    print(f"Transformed features cached in {cache_path}")
+    return features
+
+# Stratégies de recherche d'hyperparamètres
+SEARCH_STRATEGIES = ['grid', 'halving', 'halving_random']
+
+# Fonction pour créer la recherche d'hyperparamètres, plis et candidats étant répartis sur 'n_jobs' cœurs :
+# grille complète, ou successive halving (les candidats sont évalués sur une fraction croissante
+# des données et seul le meilleur tiers, pour factor=3, passe à l'itération suivante)
+def create_search(model, param_grid, cv=None, search='grid', n_jobs=-1, factor=3):
+    if search == 'grid':
+        return GridSearchCV(model, param_grid=param_grid, cv=cv, n_jobs=n_jobs, verbose=3)
+    if search == 'halving':
+        return HalvingGridSearchCV(model, param_grid=param_grid, cv=cv, factor=factor, n_jobs=n_jobs, verbose=3)
+    if search == 'halving_random':
+        return HalvingRandomSearchCV(model, param_distributions=param_grid, cv=cv, factor=factor, n_jobs=n_jobs,
+                                     verbose=3, random_state=0)
+    raise ValueError(f"Search strategy must be one of {SEARCH_STRATEGIES}")
+
+# Fonction pour récupérer le temps passé sur chaque candidat (entraînement et évaluation, tous plis confondus :
+# temps de calcul cumulé, supérieur à la durée écoulée lorsque les plis tournent en parallèle avec --n_jobs)
+def candidate_timings(search):
+    results = pd.DataFrame(search.cv_results_)
+    timings = pd.DataFrame({
+        'params': results['params'].astype(str),
+        'mean_fit_time': results['mean_fit_time'],
+        'mean_score_time': results['mean_score_time'],
+        'total_fit_score_time': (results['mean_fit_time'] + results['mean_score_time']) * search.n_splits_,
+        'mean_test_score': results['mean_test_score'],
+        'rank_test_score': results['rank_test_score']
+    })
+    # Successive halving : itération et quantité de données utilisées pour chaque évaluation
+    for column in ['iter', 'n_resources']:
+        if column in results:
+            timings[column] = results[column]
+    return timings
+
 # Fonction pour définir et entraîner le modèle
-def train_model(X_train, Y_train, X_test, Y_test, regressor, param_grid=None, cv=None):
+def train_model(X_train, Y_train, X_test, Y_test, regressor, param_grid=None, cv=None, search='grid', n_jobs=-1, factor=3,
+                features_cache_dir=None):
     print("Creating preprocessors for numerical, categorical, and binary features...")
-    preprocessor = create_preprocessor(X_train)
+    preprocessor, X_train_features = fit_features(X_train, features_cache_dir)
     print("Preprocessors created successfully.")
     
     print(f"Training model: {regressor}...")
@@ -74,18 +144,34 @@ def train_model(X_train, Y_train, X_test, Y_test, regressor, param_grid=None, cv
         model = RandomForestRegressor()
 
     if param_grid:
-        model = GridSearchCV(model, param_grid=param_grid, cv=cv, verbose=3)
-        print("GridSearchCV is being used for hyperparameter tuning.")
+        model = create_search(model, param_grid, cv=cv, search=search, n_jobs=n_jobs, factor=factor)
+        print(f"{type(model).__name__} is being used for hyperparameter tuning.")
 
+    # Le modèle est entraîné sur les features déjà transformées, puis assemblé avec le préprocesseur ajusté
+    model.fit(X_train_features, Y_train)
     predictor = Pipeline(steps=[
         ('features_preprocessing', preprocessor),
         ("model", model)
     ])
 
-    predictor.fit(X_train, Y_train)
     print(f"Model {regressor} trained successfully.")
     return predictor, model
 
+# Fonction pour enregistrer les métadonnées utiles à l'API (features et vocabulaires des catégories)
+def save_metadata(predictor, path):
+    preprocessor = predictor.named_steps['features_preprocessing']
+    encoder = preprocessor.named_transformers_['cat'].named_steps['encoder']
+    categorical_features = [columns for name, _, columns in preprocessor.transformers_ if name == 'cat'][0]
+    metadata = {
+        "features": [str(feature) for feature in preprocessor.feature_names_in_],
+        "categories": {feature: [str(category) for category in categories]
+                       for feature, categories in zip(categorical_features, encoder.categories_)}
+    }
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(metadata, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(path + ".tmp", path)
+    print(f"Metadata saved as {path}")
+
 def main():
     print("Starting main execution...")
     
@@ -99,13 +185,22 @@ def main():
     parser.add_argument("--min_samples_split", type=int, nargs="*")
     parser.add_argument("--n_estimators", type=int, nargs="*")
     parser.add_argument("--executor_name", default='Unknown')
+    parser.add_argument("--search", default='grid', choices=SEARCH_STRATEGIES, help="Hyperparameter search strategy.")
+    parser.add_argument("--n_jobs", type=int, default=-1, help="Cores used by the search (-1: all cores).")
+    parser.add_argument("--halving_factor", type=int, default=3, help="Successive halving elimination factor.")
+    parser.add_argument("--dataset", default=DATASET_URL, help="URL or local path of the pricing CSV.")
+    parser.add_argument("--dataset_sha256", default=None, help="Expected SHA-256 of the pricing CSV.")
+    parser.add_argument("--cache_dir", default=DEFAULT_CACHE_DIR, help="Local dataset cache directory.")
+    parser.add_argument("--refresh_dataset", action="store_true", help="Ignore the local dataset cache.")
+    parser.add_argument("--no_features_cache", action="store_true", help="Do not cache the transformed features.")
     parser.add_argument("--run_name", default='LR_run', help="Specify the name for the run.")
     args = parser.parse_args()
     print(f"Command line arguments parsed: {args}")
+    # Arguments qui ne sont pas des hyperparamètres du modèle
+    non_grid_args = ['cv', 'regressor', 'executor_name', 'run_name', 'dataset', 'dataset_sha256', 'cache_dir', 'refresh_dataset', 'search', 'n_jobs', 'halving_factor', 'no_features_cache']
 
     # Chargement des données
-    dataset_url = "https://full-stack-assets.s3.eu-west-3.amazonaws.com/Deployment/get_around_pricing_project.csv"
-    dataset = load_data(dataset_url)
+    dataset = load_dataset(args.dataset, cache_dir=args.cache_dir, sha256=args.dataset_sha256, refresh=args.refresh_dataset)
 
     # Filtrer les données
     print("Filtering data...")
@@ -131,28 +226,37 @@ def main():
     print("Data split successfully.")
 
     # Entraîner le modèle
-    param_grid = {key: getattr(args, key) for key in vars(args) if getattr(args, key) is not None and key not in ['cv', 'regressor', 'executor_name', 'run_name']}
+    param_grid = {key: getattr(args, key) for key in vars(args) if getattr(args, key) is not None and key not in non_grid_args}
     grid_search_done = False
     if args.regressor == 'LR':
         model = LinearRegression()
     else:
-        regressor_args = {option: parameters for option, parameters in vars(args).items() if (parameters is not None and option not in ['cv', 'regressor', 'run_name', 'executor_name'])}
+        regressor_args = {option: parameters for option, parameters in vars(args).items() if (parameters is not None and option not in non_grid_args)}
         regressor_params = {param_name: values for param_name, values in regressor_args.items()}
         if args.regressor == 'Ridge':
             regressor = Ridge()
         elif args.regressor == 'RF':
             regressor = RandomForestRegressor()
-        model = GridSearchCV(regressor, param_grid=regressor_params, cv=args.cv, verbose=3)
+        model = create_search(regressor, regressor_params, cv=args.cv, search=args.search, n_jobs=args.n_jobs,
+                              factor=args.halving_factor)
         grid_search_done = True
 
+    start_time = time.perf_counter()
     predictor, model = train_model(X_train, Y_train, X_test, Y_test, args.regressor,
                                    param_grid=param_grid if param_grid else None,
-                                   cv=args.cv if grid_search_done else None)
+                                   cv=args.cv if grid_search_done else None,
+                                   search=args.search, n_jobs=args.n_jobs, factor=args.halving_factor,
+                                   features_cache_dir=None if args.no_features_cache else args.cache_dir)
+    print(f"Training wall time: {time.perf_counter() - start_time:.2f} s")
 
-    # Enregistrer les meilleurs paramètres pour GridSearch
-    if isinstance(model, GridSearchCV):
-        print("Best parameters found by GridSearchCV:")
+    # Enregistrer les meilleurs paramètres et le temps passé sur chaque candidat
+    if hasattr(model, 'best_params_'):
+        print(f"Best parameters found by {type(model).__name__}:")
         print(model.best_params_)
+        timings = candidate_timings(model)
+        print(timings.to_string(index=False))
+        timings.to_csv(f"{args.regressor}_search_timings.csv", index=False)
+        print(f"Candidate timings saved as {args.regressor}_search_timings.csv")
 
     # Faire des prédictions sur les ensembles d'entraînement et de test
     print("Making predictions...")
@@ -169,9 +273,18 @@ def main():
     print("Metrics logged successfully.")
 
     # Enregistrer le modèle avec un nom spécifique
+    # Écriture dans un fichier temporaire puis remplacement atomique, pour que l'API
+    # ne lise jamais un artefact partiellement écrit lors du rechargement à chaud
     model_name = f"{args.regressor}_model.joblib"
-    dump(predictor, model_name)
+    dump(predictor, model_name + ".tmp")
+    # Forêt aplatie en tableaux .npy, mappés en mémoire et partagés entre les workers de l'API.
+    # Exportée avant la mise en place de l'artefact, avec la version qu'il aura (os.replace conserve la date
+    # de modification et la taille) : un worker qui détecte le nouvel artefact trouve toujours l'export à jour
+    if args.regressor == 'RF':
+        export_forest_arrays(model_name, pipeline=predictor, source_version=artifact_version(model_name + ".tmp"))
+    os.replace(model_name + ".tmp", model_name)
     print(f"Model saved as {model_name}")
+    save_metadata(predictor, "model_metadata.json")
 
     print("Training completed.")
 
@@ -7,145 +7,74 @@ from streamlit_lottie import st_lottie
 import pandas as pd
 import numpy as np
 import plotly.express as px
-import requests
-import math
+import os
+from delays.aggregates import counts_frame
+from delays.assets import LOTTIE_URLS, prefetch_lottie, read_lottie
+from delays.cascade import RentalChains
+from delays.data import DATA_SOURCE, ingest_rentals, read_rentals, source_signature
+from delays.preprocessing import preprocess
+from delays.reports import build_reports, read_reports
+from delays.simulation import SCOPES, ThresholdSweep
+from delays.timing import RenderTimer
+from delays.viewer import paginate
 
 ##############
 # Fonctions  #
 ##############
 
-# Transformation de la colonne state en fonction du delais de la restitution en minutes.
-def clean_state(row):
-    state = 'Unknown'
-    if row['state'] == 'ended':
-        if row['delay_at_checkout_in_minutes'] <= 0:
-            state = "On time checkout"
-        elif row['delay_at_checkout_in_minutes'] > 0:
-            state = "Late checkout"
-    if row['state'] == 'canceled':
-        state = "Canceled"
-    return state
-
-# Fonction pour extraire le retard de la location précédente
-def extract_previous_rental_delay(row, dataframe):
-    previous_delay = np.nan
-    if not pd.isnull(row['previous_ended_rental_id']):
-        prev_rental_id = row['previous_ended_rental_id']
-        matching_delays = dataframe[dataframe['rental_id'] == prev_rental_id]['delay_at_checkout_in_minutes'].values
-        if len(matching_delays) > 0:
-            previous_delay = matching_delays[0]
-    return previous_delay
-
-
-# Fonction pour déterminer l'impact du retard de la location précédente
-def determine_impact_of_previous_rental_delay(row):
-    impact = 'No previous rental filled out'
-    if not math.isnan(row['checkin_delay']):
-        if row['checkin_delay'] > 0:
-            if row['state'] == 'Canceled':
-                impact = 'Cancelation'
-            else:
-                impact = 'Late checkin'
-        else:
-            impact = 'No impact'
-    return impact
-
-def calculate_statistics(data):
-    # Nombre total de locations
-    total_locations = data.shape[0]
-
-    # Nombre total de voitures
-    total_cars = data['car_id'].nunique()
-
-    # Nombre d'annulations
-    canceled_bookings = data[data['state'] == 'Canceled'].shape[0]
-    cancellation_percentage = (canceled_bookings / total_locations) * 100
-
-    # Nombre de 'connect' check-ins
-    connect_checkins = data[data['checkin_type'] == 'connect'].shape[0]
-    mobile_checkins = data[data['checkin_type'] == 'mobile'].shape[0]
-    connect_percentage = (connect_checkins / total_locations) * 100
-    mobile_percentage = (mobile_checkins / total_locations) * 100
-
-    # Statistiques des temps entre les locations consécutives
-    time_delta_stats = data['time_delta_with_previous_rental_in_minutes'].describe()
-    max_time_delta = time_delta_stats['max']
-    mean_time_delta = time_delta_stats['mean']
-
-    # Tri du DataFrame par car_id et rental_id
-    df_sorted = data.sort_values(by=['car_id', 'rental_id'])
-
-    # Calcul du pourcentage de locations consécutives
-    df_sorted['is_consecutive'] = df_sorted['time_delta_with_previous_rental_in_minutes'].notna()
-    consecutive_locations = df_sorted['is_consecutive'].sum()
-    consecutive_percentage = (consecutive_locations / total_locations) * 100
-
-    return {
-        "total_locations": total_locations,
-        "total_cars": total_cars,
-        "canceled_bookings": canceled_bookings,
-        "cancellation_percentage": cancellation_percentage,
-        "connect_checkins": connect_checkins,
-        "connect_percentage": connect_percentage,
-        "mobile_checkins": mobile_checkins,
-        "mobile_percentage": mobile_percentage,
-        "max_time_delta": max_time_delta,
-        "mean_time_delta": mean_time_delta,
-        "consecutive_locations": consecutive_locations,
-        "consecutive_percentage": consecutive_percentage
-    }
-
-# Fonction pour calculer les pourcentages de retard
-def calculate_delay_percentages(data):
-    total_rentals = len(data)
-    less_than_30m = len(data[(data['delay_at_checkout_in_minutes'] > 0) & (data['delay_at_checkout_in_minutes'] <= 30)])
-    between_30m_1h = len(data[(data['delay_at_checkout_in_minutes'] > 30) & (data['delay_at_checkout_in_minutes'] <= 60)])
-    more_than_1h = len(data[data['delay_at_checkout_in_minutes'] > 60])
-
-
-    percent_less_than_30m = (less_than_30m / total_rentals) * 100
-    percent_between_30m_1h = (between_30m_1h / total_rentals) * 100
-    percent_more_than_1h = (more_than_1h / total_rentals) * 100
-
-    return {
-        "percent_less_than_30m": percent_less_than_30m,
-        "percent_between_30m_1h": percent_between_30m_1h,
-        "percent_more_than_1h": percent_more_than_1h
-    }
-
+# Animations lues uniquement depuis le dossier local (delays/assets.py) : aucun appel réseau à l'affichage
 def load_lottieurl(url: str):
-    r = requests.get(url)
-    if r.status_code != 200:
-        return None
-    return r.json()
-
-
-def keep_only_ended_rentals(dataframe):
-    return dataframe[(dataframe['state'] == 'On time checkout') | (dataframe['state'] == 'Late checkout')]
+    return read_lottie(url)
+
+# Affiche l'animation si elle est disponible, sinon ne bloque pas la page
+def show_lottie(animation, **kwargs):
+    if animation is not None:
+        st_lottie(animation, **kwargs)
+
+# Téléchargement en arrière-plan des animations manquantes, une seule fois par processus
+@st.cache_resource
+def start_lottie_prefetch():
+    return prefetch_lottie()
+
+# Affichage paginé d'un DataFrame (delays/viewer.py) : filtres, tri et pagination côté serveur,
+# seule la page visible est envoyée au navigateur
+def show_data_viewer(data, key):
+    filter_cols = st.columns(4)
+    with filter_cols[0]:
+        car_ids = st.text_input('car_id (séparés par des virgules)', key=f'{key}_car_id')
+    with filter_cols[1]:
+        checkin_types = st.multiselect('checkin_type', sorted(data['checkin_type'].dropna().unique()), key=f'{key}_checkin_type')
+    with filter_cols[2]:
+        states = st.multiselect('state', sorted(data['state'].dropna().unique()), key=f'{key}_state')
+    with filter_cols[3]:
+        delays = data['delay_at_checkout_in_minutes'].dropna()
+        delay_range = st.slider('delay_at_checkout_in_minutes', int(delays.min()), int(delays.max()),
+                                (int(delays.min()), int(delays.max())), key=f'{key}_delay')
+
+    filters = {
+        'car_id': [int(car_id) for car_id in car_ids.split(',') if car_id.strip().isdigit()] or None,
+        'checkin_type': checkin_types or None,
+        'state': states or None,
+        'delay_at_checkout_in_minutes': delay_range if delay_range != (int(delays.min()), int(delays.max())) else None,
+    }
 
-def keep_only_late_checkins_canceled(dataframe):
-    return dataframe[(dataframe['checkin_delay'] > 0) & (dataframe['state'] == 'Canceled')]
+    sort_cols = st.columns([30, 20, 20, 30])
+    with sort_cols[0]:
+        sort_by = st.selectbox('Trier par', [None] + list(data.columns), key=f'{key}_sort_by')
+    with sort_cols[1]:
+        ascending = st.radio('Ordre', ['Croissant', 'Décroissant'], horizontal=True, key=f'{key}_order') == 'Croissant'
+    with sort_cols[2]:
+        page_size = st.selectbox('Lignes par page', [25, 50, 100, 500], index=1, key=f'{key}_page_size')
+    with sort_cols[3]:
+        page = st.number_input('Page', min_value=1, value=1, step=1, key=f'{key}_page')
 
-def apply_threshold(dataframe, threshold, scope):
-    if scope == 'All':
-        rows_to_drop_df = dataframe[dataframe['time_delta_with_previous_rental_in_minutes'] < threshold]
-    elif scope == 'Connect':
-        rows_to_drop_df = dataframe[(dataframe['time_delta_with_previous_rental_in_minutes'] < threshold) & (dataframe['checkin_type'] == 'connect')]
-    elif scope == 'mobile':
-        rows_to_drop_df = dataframe[(dataframe['time_delta_with_previous_rental_in_minutes'] < threshold) & (dataframe['checkin_type'] == 'mobile')]
-    else:
-        raise ValueError("Scope must be 'All', 'Connect', or 'mobile'")
-
-    nb_ended_rentals_dropped = len(keep_only_ended_rentals(rows_to_drop_df))
-    nb_late_checkins_cancelations_dropped = len(keep_only_late_checkins_canceled(rows_to_drop_df))
-    output = (
-        dataframe.drop(rows_to_drop_df.index),
-        nb_ended_rentals_dropped,
-        nb_late_checkins_cancelations_dropped
-    )
-
-    return output
+    page_df, total_rows, n_pages = paginate(data, filters, sort_by, ascending, int(page), page_size)
+    st.dataframe(page_df)
+    first_row = (min(int(page), n_pages) - 1) * page_size
+    st.caption(f"Lignes {min(first_row + 1, total_rows)}–{first_row + len(page_df)} sur {total_rows} (page {min(int(page), n_pages)}/{n_pages})")
 
+# Mesure du temps d'affichage de chaque section (DELAY_RENDER_TIMING=1)
+render_timer = RenderTimer()
 
 
 ############################################
@@ -158,6 +87,8 @@ st.set_page_config(
     layout="wide"
 )
 
+start_lottie_prefetch()
+
 ###################
 ### Application ###
 ###################
@@ -202,44 +133,65 @@ L'objectif de cette analyse est donc d'examiner certains éléments pour aider 
 
 ###### Chargement des données brutes
 
-DATA_URL = ('https://full-stack-assets.s3.eu-west-3.amazonaws.com/Deployment/get_around_delay_analysis.xlsx')
-
+# Source des données (URL ou fichier local via DELAY_DATA_SOURCE), ingérée une seule fois dans un cache
+# local typé (delays/data.py) ; l'empreinte SHA-256 de la source sert de version du jeu de données.
+# À chaque exécution du script, seule la signature de la source (date de modification et taille) est lue :
+# l'ingestion (lecture et hachage du classeur) n'est refaite que lorsqu'elle change.
 @st.cache_data
-def load_data(nrows=None):
-    data = pd.read_excel(DATA_URL, nrows=nrows)
+def dataset_version(signature):
+    return ingest_rentals(DATA_SOURCE)['sha256']
+
+DATASET_VERSION = dataset_version(source_signature(DATA_SOURCE))
+
+# Partagé entre les sessions sans copie (st.cache_data renverrait une copie complète à chaque exécution) :
+# le DataFrame ne doit pas être modifié en place. La copie typée est déjà ingérée, elle est lue directement.
+@st.cache_resource
+def load_data(dataset_version, nrows=None):
+    data = read_rentals(DATA_SOURCE)
+    if nrows is not None:
+        data = data.head(nrows)
     return data
 
 # Affiche un texte indiquant que les données sont en cours de chargement
 data_load_state = st.text('Chargement des données...')
-raw_data = load_data() # Charger les données sans limite de lignes
+raw_data = load_data(DATASET_VERSION) # Charger les données sans limite de lignes
 data_load_state.text("Données chargées avec succès!")
 
 # Affichage conditionnel des données brutes
 if st.checkbox('Afficher les données brutes'):
     st.subheader('Données brutes')
-    st.write(raw_data)
+    show_data_viewer(raw_data, 'raw')
 
 ###### Prétraitement des données
-prep_data = raw_data.copy()
+# Prétraitement vectorisé (delays/preprocessing.py), calculé une seule fois par version du jeu de données
+# et partagé entre toutes les sessions : les interactions avec les widgets ne le recalculent pas.
+# Le DataFrame partagé ne doit pas être modifié en place.
+@st.cache_resource
+def load_prepared_data(dataset_version):
+    return preprocess(load_data(dataset_version))
 
-# Modification « State » pour ajouter des informations indiquant si la restitution est à l'heure ou en retard 
-prep_data['state'] = prep_data.apply(clean_state, axis=1)
+prep_data = load_prepared_data(DATASET_VERSION)
 
-# Ajout d'une colonne qui marque le délai de restitution de la location précédente
-prep_data['previous_rental_checkout_delay'] = prep_data.apply(extract_previous_rental_delay, args=[prep_data], axis=1)
+# Moteur de simulation (delays/simulation.py) : temps entre locations triés une fois par portée,
+# chaque seuil est ensuite résolu par recherche dichotomique
+@st.cache_resource
+def load_threshold_sweep(dataset_version):
+    return ThresholdSweep(load_prepared_data(dataset_version))
 
+threshold_sweep = load_threshold_sweep(DATASET_VERSION)
 
-# Ajout d'une colonne qui marque le délais de délai d'enregistrement 
-prep_data['checkin_delay'] = prep_data['previous_rental_checkout_delay'] - prep_data['time_delta_with_previous_rental_in_minutes']
-prep_data['checkin_delay'] = prep_data['checkin_delay'].apply(lambda x: 0 if x < 0 else x)
-    
-# Ajout d'une colonne qui défini l'impact du délai de la location précédente 
-prep_data['impact_of_previous_rental_delay'] = prep_data.apply(determine_impact_of_previous_rental_delay, axis=1)
+# Chaînes de locations par voiture pour la simulation des retards en cascade (delays/cascade.py)
+@st.cache_resource
+def load_rental_chains(dataset_version):
+    return RentalChains(load_prepared_data(dataset_version))
+
+rental_chains = load_rental_chains(DATASET_VERSION)
+render_timer.mark('data')
 
 # Affichage conditionnel des données traitées
 if st.checkbox('Afficher les données traitées'):
     st.subheader('Données traitées')
-    st.write(prep_data)
+    show_data_viewer(prep_data, 'prep')
 
 # Afficher la description des données modifiées 
 st.write("Remarque : Toutes les analyses ci-dessous sont effectuées sur des données traitées.")
@@ -249,7 +201,24 @@ st.write("- Ajout de la colonne 'checkin_delay' pour obtenir des informations su
 st.write("- Ajout de la colonne 'impact_of_previous_rental_delay' pour obtenir des informations sur l'impact du délai de la location précédente.")
 
 ###### Statistiques des données 
-stats = calculate_statistics(prep_data)
+# Statistiques, comptes des graphes et grille de simulation seuil × portée (delays/reports.py) :
+# lus depuis les rapports précalculés (python -m delays --output <DELAY_REPORTS_DIR>) s'ils correspondent
+# à la version du jeu de données, sinon calculés une seule fois par version du jeu de données.
+REPORTS_DIR = os.environ.get('DELAY_REPORTS_DIR')
+
+@st.cache_data
+def load_reports(dataset_version):
+    if REPORTS_DIR:
+        reports = read_reports(REPORTS_DIR, dataset_version)
+        if reports is not None:
+            return reports
+    return build_reports(load_prepared_data(dataset_version), dataset_version)
+
+summary, threshold_curve = load_reports(DATASET_VERSION)
+state_counts_df = counts_frame(summary['state_counts'], 'state')
+impact_counts_df = counts_frame(summary['impact_counts'], 'impact_of_previous_rental_delay')
+
+stats = summary['statistics']
 # Extraire les valeurs des statistiques
 total_locations = stats["total_locations"]
 total_cars = stats["total_cars"]
@@ -280,6 +249,8 @@ with main_metrics_cols[2]:
     st.metric(label="Temps moyen entre locations ⏳", value=f"{int(stats['mean_time_delta'])} min")
 
 
+render_timer.mark('statistics')
+
 ###### Visualisations des données
 st.header('Visualisations des données')
 
@@ -287,8 +258,9 @@ st.header('Visualisations des données')
 info_cols = st.columns([35, 10, 35])
 with info_cols[0]:
     fig1 = px.pie(
-    prep_data, 
+    state_counts_df, 
     names="state", 
+    values="count", 
     color="state", 
     height=500, 
     color_discrete_map={
@@ -318,14 +290,10 @@ with info_cols[2]:
     st.plotly_chart(fig2)
 
 # Visualisation des données de Checkout à l'aide d'un diagramme à bar
-total_rentals = len(prep_data)
-delayed_rentals = prep_data[prep_data['delay_at_checkout_in_minutes'] > 0]
-on_time_rentals = prep_data[prep_data['delay_at_checkout_in_minutes'] <= 0]
-nan_rentals = prep_data[prep_data['delay_at_checkout_in_minutes'].isnull()]
-
-delayed_percent = (len(delayed_rentals) / total_rentals) * 100
-on_time_percent = (len(on_time_rentals) / total_rentals) * 100
-nan_percent = (len(nan_rentals) / total_rentals) * 100
+checkout_percentages = summary['checkout_percentages']
+delayed_percent = checkout_percentages['delayed_percent']
+on_time_percent = checkout_percentages['on_time_percent']
+nan_percent = checkout_percentages['nan_percent']
 
 data_bar_chart = pd.DataFrame({
     'Status': ['En retard', 'À l\'heure', 'Non renseigné'],
@@ -342,7 +310,7 @@ with info_cols2[0]:
     st.plotly_chart(fig3)
 
 # Statisqtiques sur les retards 
-stats_late = calculate_delay_percentages(prep_data)
+stats_late = summary['delay_percentages']
 with info_cols2[2]:
     st.write("**Statistiques des retards**")
     st.metric(label="Retard moins de 30 minutes", value=f"{round(stats_late['percent_less_than_30m'])}%", delta="de locations avec un retard de moins de 30 minutes", delta_color='inverse')
@@ -353,13 +321,12 @@ with info_cols2[2]:
 # Visualisation des Impacts des retards sur le prochain Chekin
 st.header('Impacts des retards sur le prochain Checkin')
 
-previous_rental_checkout_delay_df = prep_data[prep_data['previous_rental_checkout_delay'] > 0] # On prend que les checkout de location précédente supérieur à zéro
-
 info_cols3 = st.columns([35, 10, 35])
 with info_cols3[0]:
     impacts_pie = px.pie(
-        previous_rental_checkout_delay_df, 
+        impact_counts_df, # On prend que les checkout de location précédente supérieur à zéro
         names="impact_of_previous_rental_delay", 
+        values="count", 
         color="impact_of_previous_rental_delay", 
         height=500, 
         color_discrete_map={
@@ -374,30 +341,35 @@ with info_cols3[0]:
     st.plotly_chart(impacts_pie)
 
 with info_cols3[2]:
-    gif_pathh = load_lottieurl('https://lottie.host/837dfd9a-7345-46a5-ad2e-32853828f13f/pTRDKDo3dK.json')
-    st_lottie(gif_pathh, width=500)
+    gif_pathh = load_lottieurl(LOTTIE_URLS['car'])
+    show_lottie(gif_pathh, width=500)
    
+render_timer.mark('charts')
+
 ###### Formulaire de saisie de simulation
 with st.form(key='simulation_form'):
     simulation_form_cols = st.columns([20, 20, 20, 15, 25])
     with simulation_form_cols[0]:
         simulation_threshold = st.number_input(label='Seuil (minutes)', min_value=15, step=15)
     with simulation_form_cols[1]:
-        simulation_scope = st.radio('Portée', ['All', 'Connect', 'mobile'], key=3)
+        simulation_scope = st.radio('Portée', list(SCOPES), key=3)
+        simulation_cascade = st.checkbox('Propager les retards en cascade')
     submit = st.form_submit_button(label='Exécutez une Simulation 🚀')
 
 if submit:
-    with_threshold_df, nb_ended_rentals_lost, nb_late_checkins_cancelations_avoided = apply_threshold(prep_data, simulation_threshold, simulation_scope)
-    previous_rental_delay_with_threshold_df = with_threshold_df[with_threshold_df['previous_rental_checkout_delay'] > 0]
+    nb_ended_rentals_lost = threshold_sweep.ended_rentals_lost(simulation_threshold, simulation_scope)
+    nb_late_checkins_cancelations_avoided = threshold_sweep.late_checkins_cancelations_avoided(simulation_threshold, simulation_scope)
+    impact_counts_with_threshold_df = counts_frame(
+        threshold_sweep.impact_counts(simulation_threshold, simulation_scope), 'impact_of_previous_rental_delay')
     
     # Influence sur les indicateurs commerciaux
-    nb_ended_rentals = len(keep_only_ended_rentals(prep_data))
-    nb_late_checkins_cancelations = len(keep_only_late_checkins_canceled(prep_data))
+    nb_ended_rentals = threshold_sweep.nb_ended_rentals
+    nb_late_checkins_cancelations = threshold_sweep.nb_late_checkins_cancelations
 
-    gif_path = load_lottieurl('https://lottie.host/06ee9963-f040-483f-a837-37977cc82648/Mh7m7qu8qV.json')
+    gif_path = load_lottieurl(LOTTIE_URLS['simulation'])
 
     with simulation_form_cols[2]:
-        st_lottie(gif_path, width=100)
+        show_lottie(gif_path, width=100)
     
     with simulation_form_cols[3]:
         st.metric(
@@ -416,7 +388,7 @@ if submit:
 
     # Visualisations
     st.markdown("**Impacts des retards sur le prochain Checkin - Evolution de l'Impacts des retards**")
-    if len(previous_rental_delay_with_threshold_df['impact_of_previous_rental_delay']) == 0:
+    if len(impact_counts_with_threshold_df) == 0:
         late_checkouts_impact_evolution_cols = st.columns([30, 10, 5, 25, 30])
         with late_checkouts_impact_evolution_cols[3]:
             st.markdown("### _No more rentals consecutive to a delayed one_")
@@ -424,8 +396,8 @@ if submit:
         late_checkouts_impact_evolution_cols = st.columns([35, 20, 35])
         with late_checkouts_impact_evolution_cols[2]:
             impacts_pie_with_threshold = px.pie(
-                previous_rental_delay_with_threshold_df, 
-                names = "impact_of_previous_rental_delay", color = "impact_of_previous_rental_delay", 
+                impact_counts_with_threshold_df, 
+                names = "impact_of_previous_rental_delay", values = "count", color = "impact_of_previous_rental_delay", 
                 height = 500, 
                 color_discrete_map={
                     'No impact':'navy', 
@@ -441,7 +413,59 @@ if submit:
         impacts_pie_without_threshold.update_layout(title = "<b>Sans seuil</b>")
         st.plotly_chart(impacts_pie_without_threshold)
     with late_checkouts_impact_evolution_cols[1]:
-        st_lottie(gif_path, height = 200)
+        show_lottie(gif_path, height = 200)
+
+    # Mode cascade : les retards se propagent le long de la chaîne de locations de chaque voiture
+    if simulation_cascade:
+        st.markdown("**Propagation des retards en cascade le long des locations de chaque voiture**")
+        cascade = rental_chains.simulate([0, simulation_threshold], simulation_scope)
+        without_threshold, with_threshold = cascade.iloc[0], cascade.iloc[1]
+        cascade_cols = st.columns(3)
+        with cascade_cols[0]:
+            st.metric(
+                label = "Checkins en retard", 
+                value = int(with_threshold['late_checkins']), 
+                delta = int(with_threshold['late_checkins'] - without_threshold['late_checkins']), 
+                delta_color = 'inverse')
+        with cascade_cols[1]:
+            st.metric(
+                label = "Annulations après un départ tardif", 
+                value = int(with_threshold['cancelations']), 
+                delta = int(with_threshold['cancelations'] - without_threshold['cancelations']), 
+                delta_color = 'inverse')
+        with cascade_cols[2]:
+            st.metric(
+                label = "Retards transmis sur plusieurs locations", 
+                value = int(with_threshold['cascaded_late_checkins']), 
+                delta = int(with_threshold['cascaded_late_checkins'] - without_threshold['cascaded_late_checkins']), 
+                delta_color = 'inverse')
+        cascade_curve_fig = px.line(
+            rental_chains.simulate(np.arange(0, 721, 15), simulation_scope), 
+            x = "threshold", y = ["late_checkins", "cancelations", "cascaded_late_checkins"], 
+            markers = True, 
+            height = 400, 
+            labels = {"threshold": "Seuil (minutes)", "value": "Locations", "variable": "Indicateur"})
+        st.plotly_chart(cascade_curve_fig)
+
+render_timer.mark('simulation')
+
+###### Courbe de simulation pour tous les seuils et toutes les portées
+st.markdown("**Perte de revenu et annulations évitées en fonction du seuil**")
+threshold_curve_fig = px.line(
+    threshold_curve, 
+    x = "revenue_loss_percentage", y = "cancelations_avoided_percentage", color = "scope", 
+    hover_data = ["threshold", "ended_rentals_lost", "late_checkins_cancelations_avoided"], 
+    markers = True, 
+    height = 500, 
+    labels = {
+        "revenue_loss_percentage": "Perte de revenu (% des locations terminées)", 
+        "cancelations_avoided_percentage": "Annulations évitées (%)", 
+        "threshold": "Seuil (minutes)", 
+        "scope": "Portée"
+        })
+st.plotly_chart(threshold_curve_fig)
+render_timer.mark('threshold_curve')
+render_timer.report()
             
 
 
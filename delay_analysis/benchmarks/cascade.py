@@ -0,0 +1,107 @@
+import argparse
+import json
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from delays.cascade import RentalChains  # noqa: E402
+from delays.preprocessing import preprocess  # noqa: E402
+from delays.simulation import SCOPES  # noqa: E402
+from synthetic import make_rentals  # noqa: E402
+
+# Vérification de la propagation vectorisée par niveau de chaîne contre une implémentation de référence
+# (boucle Python sur chaque location, avec mémorisation), puis durée du balayage de tous les seuils.
+
+def reference_checkin_delays(prep_data, threshold, scope):
+    chains = RentalChains(prep_data)
+    checkin_type = prep_data['checkin_type'].astype(object).to_numpy()
+    effective = {}
+
+    def dropped(i):
+        in_scope = scope == 'All' or checkin_type[i] == {'Connect': 'connect', 'mobile': 'mobile'}[scope]
+        return in_scope and chains.time_delta[i] < threshold
+
+    def effective_delay(i):
+        if i not in effective:
+            if dropped(i):
+                effective[i] = 0.0
+            else:
+                pushed = checkin_delay(i)
+                effective[i] = chains.own_delay[i] + (0.0 if chains.canceled[i] else pushed)
+        return effective[i]
+
+    def checkin_delay(i):
+        previous = chains.previous[i]
+        if previous < 0 or dropped(i) or np.isnan(chains.time_delta[i]):
+            return 0.0
+        return max(0.0, effective_delay(previous) - chains.time_delta[i])
+
+    return np.array([checkin_delay(i) for i in range(len(prep_data))])
+
+# Écarts manquants alors que la location précédente est connue (cas présent dans les données réelles)
+def with_missing_gaps(raw_data, fraction, seed=0):
+    rng = np.random.default_rng(seed)
+    has_previous = raw_data['previous_ended_rental_id'].notna().to_numpy()
+    missing = has_previous & (rng.random(len(raw_data)) < fraction)
+    raw_data.loc[missing, 'time_delta_with_previous_rental_in_minutes'] = np.nan
+    return raw_data
+
+def compare(raw_data, thresholds, check_thresholds):
+    prep_data = preprocess(raw_data)
+    start = time.perf_counter()
+    chains = RentalChains(prep_data)
+    build_time = time.perf_counter() - start
+
+    for scope in SCOPES:
+        vectorized, _, _ = chains.propagate(check_thresholds, scope)
+        for row, threshold in enumerate(check_thresholds):
+            np.testing.assert_allclose(vectorized[row], reference_checkin_delays(prep_data, threshold, scope))
+
+    # Écart inconnu avec la location précédente : aucun retard transmis, quel que soit le seuil
+    unknown_gap = (chains.previous >= 0) & np.isnan(chains.time_delta)
+    assert not chains.propagate(check_thresholds)[0][:, unknown_gap].any()
+
+    # Au premier maillon, la propagation redonne le retard d'enregistrement du modèle d'origine
+    first_hop = chains.level == 1
+    one_hop = np.nan_to_num(prep_data['checkin_delay'].to_numpy(dtype='float64'))
+    np.testing.assert_allclose(chains.propagate([0])[0][0][first_hop], one_hop[first_hop])
+
+    start = time.perf_counter()
+    curve = chains.curve(thresholds)
+    sweep_time = time.perf_counter() - start
+    at_zero = curve[(curve['threshold'] == 0) & (curve['scope'] == 'All')].iloc[0]
+    return {
+        "rows": len(raw_data),
+        "longest_chain": chains.longest_chain(),
+        "build_s": build_time,
+        "thresholds_x_scopes": len(curve),
+        "sweep_s": sweep_time,
+        "late_checkins_one_hop": int(((one_hop > 0) & (prep_data['state'] != 'Canceled')).sum()),
+        "late_checkins_cascade": int(at_zero['late_checkins']),
+        "cascaded_late_checkins": int(at_zero['cascaded_late_checkins']),
+        "identical_to_reference": True,
+    }
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="*", default=[21310, 100000, 500000])
+    parser.add_argument("--thresholds", type=int, nargs="*", default=list(range(0, 721, 15)))
+    parser.add_argument("--check-thresholds", type=int, nargs="*", default=[0, 60, 180])
+    parser.add_argument("--missing-gaps", type=float, default=0.02,
+                        help="Part des locations avec précédente dont l'écart est effacé (données synthétiques)")
+    parser.add_argument("--data", default=None, help="Fichier réel (xlsx ou csv) à vérifier également")
+    args = parser.parse_args()
+
+    results = []
+    if args.data:
+        data = pd.read_excel(args.data) if args.data.endswith('.xlsx') else pd.read_csv(args.data)
+        results.append(compare(data, args.thresholds, args.check_thresholds))
+    for size in args.sizes:
+        results.append(compare(with_missing_gaps(make_rentals(size), args.missing_gaps), args.thresholds, args.check_thresholds))
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
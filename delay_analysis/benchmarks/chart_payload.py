@@ -0,0 +1,71 @@
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+import pandas as pd
+import plotly.express as px
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from delays.aggregates import impact_counts, state_counts  # noqa: E402
+from delays.preprocessing import preprocess  # noqa: E402
+from synthetic import make_rentals  # noqa: E402
+
+# Taille du JSON des graphes circulaires envoyé au navigateur : DataFrame complet (ancien code)
+# contre comptes agrégés par catégorie, avec vérification que les parts affichées sont identiques.
+
+def pie(data, names, values=None):
+    return px.pie(data, names=names, values=values, color=names, height=500)
+
+def slices(fig):
+    trace = fig.data[0]
+    if trace.values is None:
+        return dict(Counter(trace.labels))
+    totals = Counter()
+    for label, value in zip(trace.labels, trace.values):
+        totals[label] += value
+    return dict(totals)
+
+def measure(fig):
+    start = time.perf_counter()
+    payload = fig.to_json()
+    return len(payload), time.perf_counter() - start
+
+def compare(raw_data):
+    prep_data = preprocess(raw_data)
+    delayed = prep_data[prep_data['previous_rental_checkout_delay'] > 0]
+    charts = {
+        "fig1": (pie(prep_data, "state"), pie(state_counts(prep_data), "state", "count")),
+        "impacts_pie": (pie(delayed, "impact_of_previous_rental_delay"),
+                        pie(impact_counts(prep_data), "impact_of_previous_rental_delay", "count")),
+    }
+    result = {"rows": len(raw_data)}
+    for name, (legacy, aggregated) in charts.items():
+        assert slices(legacy) == slices(aggregated), f"{name}: aggregated slices differ"
+        legacy_bytes, legacy_time = measure(legacy)
+        aggregated_bytes, aggregated_time = measure(aggregated)
+        result[name] = {
+            "full_dataframe_bytes": legacy_bytes,
+            "aggregated_bytes": aggregated_bytes,
+            "full_dataframe_to_json_s": legacy_time,
+            "aggregated_to_json_s": aggregated_time,
+        }
+    return result
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="*", default=[21310, 100000, 500000])
+    parser.add_argument("--data", default=None, help="Fichier réel (xlsx ou csv) à mesurer également")
+    args = parser.parse_args()
+
+    results = []
+    if args.data:
+        data = pd.read_excel(args.data) if args.data.endswith('.xlsx') else pd.read_csv(args.data)
+        results.append(compare(data))
+    for size in args.sizes:
+        results.append(compare(make_rentals(size)))
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
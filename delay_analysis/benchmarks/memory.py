@@ -0,0 +1,97 @@
+import argparse
+import json
+import os
+import pickle
+import resource
+import subprocess
+import sys
+import tempfile
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from delays.data import typed_rentals  # noqa: E402
+from delays.preprocessing import preprocess  # noqa: E402
+from delays.statistics import calculate_statistics  # noqa: E402
+from synthetic import make_rentals  # noqa: E402
+
+# Mémoire du pipeline du tableau de bord par session, mesurée dans un processus séparé par mode :
+#   before : données lues avec les types de pd.read_excel (int64/float64/object), copie complète par session
+#            (st.cache_data), colonnes calculées en object/float64 et tri complet dans calculate_statistics
+#   after  : cache Feather typé partagé entre les sessions, catégories, entiers réduits, sans copie ni tri
+# Le pic de RSS (ru_maxrss) et la RSS conservée sont donnés au-delà de la RSS mesurée avant le chargement.
+
+def rss_mb():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def legacy_calculate_statistics(data):
+    df_sorted = data.sort_values(by=['car_id', 'rental_id'])
+    df_sorted['is_consecutive'] = df_sorted['time_delta_with_previous_rental_in_minutes'].notna()
+    return calculate_statistics(data), df_sorted['is_consecutive'].sum()
+
+def previous_preprocess(raw_data):
+    prep_data = preprocess(raw_data.copy())
+    for column in ['state', 'impact_of_previous_rental_delay']:
+        prep_data[column] = prep_data[column].astype(object)
+    prep_data['checkin_delay'] = prep_data['checkin_delay'].astype('float64')
+    return prep_data
+
+def run_sessions(mode, path, sessions):
+    baseline = rss_mb()
+    if mode == 'before':
+        raw_data = pd.read_pickle(path)
+        prep_data = previous_preprocess(raw_data)
+        held = []
+        for _ in range(sessions):
+            session_raw = pickle.loads(pickle.dumps(raw_data))
+            legacy_calculate_statistics(prep_data)
+            held.append(session_raw)
+    else:
+        raw_data = pd.read_feather(path)
+        prep_data = preprocess(raw_data)
+        for _ in range(sessions):
+            calculate_statistics(prep_data)
+    return {
+        "mode": mode,
+        "sessions": sessions,
+        "peak_rss_mb": round(peak_rss_mb() - baseline, 1),
+        "retained_rss_mb": round(rss_mb() - baseline, 1),
+        "prep_data_mb": round(prep_data.memory_usage(deep=True).sum() / 2**20, 1),
+    }
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="*", default=[21310, 500000])
+    parser.add_argument("--sessions", type=int, default=5)
+    parser.add_argument("--data", default=None, help="Fichier réel (xlsx ou csv) à mesurer à la place des données synthétiques")
+    parser.add_argument("--run", nargs=3, metavar=("MODE", "PATH", "SESSIONS"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        mode, path, sessions = args.run
+        print(json.dumps(run_sessions(mode, path, int(sessions))))
+        return
+
+    if args.data:
+        datasets = [pd.read_excel(args.data) if args.data.endswith('.xlsx') else pd.read_csv(args.data)]
+    else:
+        datasets = [make_rentals(size) for size in args.sizes]
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for raw_data in datasets:
+            untyped, typed = os.path.join(tmp, 'rentals.pkl'), os.path.join(tmp, 'rentals.feather')
+            raw_data.to_pickle(untyped)
+            typed_rentals(raw_data).to_feather(typed)
+            result = {"rows": len(raw_data)}
+            for mode, path in [("before", untyped), ("after", typed)]:
+                output = subprocess.run([sys.executable, __file__, "--run", mode, path, str(args.sessions)],
+                                        check=True, capture_output=True, text=True).stdout
+                result[mode] = json.loads(output)
+            results.append(result)
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
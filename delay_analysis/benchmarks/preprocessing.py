@@ -0,0 +1,79 @@
+import argparse
+import json
+import math
+import os
+import sys
+import time
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from delays.preprocessing import preprocess  # noqa: E402
+from previous_rental import legacy_extract_previous_rental_delay  # noqa: E402
+from synthetic import make_rentals  # noqa: E402
+
+# Comparaison de l'ancien prétraitement de app.py (fonctions appliquées ligne par ligne)
+# avec le prétraitement vectorisé : résultat identique et durée sur des tailles croissantes.
+
+def legacy_clean_state(row):
+    state = 'Unknown'
+    if row['state'] == 'ended':
+        if row['delay_at_checkout_in_minutes'] <= 0:
+            state = "On time checkout"
+        elif row['delay_at_checkout_in_minutes'] > 0:
+            state = "Late checkout"
+    if row['state'] == 'canceled':
+        state = "Canceled"
+    return state
+
+def legacy_determine_impact_of_previous_rental_delay(row):
+    impact = 'No previous rental filled out'
+    if not math.isnan(row['checkin_delay']):
+        if row['checkin_delay'] > 0:
+            if row['state'] == 'Canceled':
+                impact = 'Cancelation'
+            else:
+                impact = 'Late checkin'
+        else:
+            impact = 'No impact'
+    return impact
+
+def legacy_preprocess(raw_data):
+    prep_data = raw_data.copy()
+    prep_data['state'] = prep_data.apply(legacy_clean_state, axis=1)
+    prep_data['previous_rental_checkout_delay'] = prep_data.apply(legacy_extract_previous_rental_delay, args=[prep_data], axis=1)
+    prep_data['checkin_delay'] = prep_data['previous_rental_checkout_delay'] - prep_data['time_delta_with_previous_rental_in_minutes']
+    prep_data['checkin_delay'] = prep_data['checkin_delay'].apply(lambda x: 0 if x < 0 else x)
+    prep_data['impact_of_previous_rental_delay'] = prep_data.apply(legacy_determine_impact_of_previous_rental_delay, axis=1)
+    return prep_data
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+def compare(raw_data, run_legacy=True):
+    vectorized, vectorized_time = timed(lambda: preprocess(raw_data))
+    result = {"rows": len(raw_data), "vectorized_s": vectorized_time}
+    if run_legacy:
+        legacy, legacy_time = timed(lambda: legacy_preprocess(raw_data))
+        pd.testing.assert_frame_equal(vectorized, legacy, check_dtype=False, check_categorical=False)
+        result.update({"legacy_s": legacy_time, "speedup": legacy_time / vectorized_time, "identical": True})
+    return result
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="*", default=[1000, 5000, 21310, 100000, 500000])
+    parser.add_argument("--legacy-max-rows", type=int, default=21310)
+    parser.add_argument("--data", default=None, help="Fichier réel (xlsx ou csv) à comparer également")
+    args = parser.parse_args()
+
+    results = []
+    if args.data:
+        data = pd.read_excel(args.data) if args.data.endswith('.xlsx') else pd.read_csv(args.data)
+        results.append(compare(data))
+    for size in args.sizes:
+        results.append(compare(make_rentals(size), run_legacy=size <= args.legacy_max_rows))
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
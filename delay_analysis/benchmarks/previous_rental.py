@@ -0,0 +1,58 @@
+import argparse
+import json
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from delays.preprocessing import extract_previous_rental_delays  # noqa: E402
+from synthetic import make_rentals  # noqa: E402
+
+# Comparaison de l'ancienne recherche ligne par ligne (quadratique) avec la jointure indexée :
+# vérifie que les deux donnent exactement le même résultat et mesure leur durée sur des tailles croissantes.
+
+# Ancienne implémentation de app.py, conservée comme référence
+def legacy_extract_previous_rental_delay(row, dataframe):
+    previous_delay = np.nan
+    if not pd.isnull(row['previous_ended_rental_id']):
+        prev_rental_id = row['previous_ended_rental_id']
+        matching_delays = dataframe[dataframe['rental_id'] == prev_rental_id]['delay_at_checkout_in_minutes'].values
+        if len(matching_delays) > 0:
+            previous_delay = matching_delays[0]
+    return previous_delay
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+def compare(data, run_legacy=True):
+    indexed, indexed_time = timed(lambda: extract_previous_rental_delays(data))
+    result = {"rows": len(data), "indexed_s": indexed_time}
+    if run_legacy:
+        legacy, legacy_time = timed(lambda: data.apply(legacy_extract_previous_rental_delay, args=[data], axis=1))
+        pd.testing.assert_series_equal(indexed.reset_index(drop=True), legacy.reset_index(drop=True),
+                                       check_names=False, check_dtype=False)
+        result.update({"legacy_s": legacy_time, "speedup": legacy_time / indexed_time, "identical": True})
+    return result
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="*", default=[1000, 2000, 5000, 10000, 21310, 100000, 500000])
+    parser.add_argument("--legacy-max-rows", type=int, default=21310,
+                        help="Taille maximale pour laquelle l'ancienne implémentation est exécutée")
+    parser.add_argument("--data", default=None, help="Fichier réel (xlsx ou csv) à comparer également")
+    args = parser.parse_args()
+
+    results = []
+    if args.data:
+        data = pd.read_excel(args.data) if args.data.endswith('.xlsx') else pd.read_csv(args.data)
+        results.append(compare(data))
+    for size in args.sizes:
+        results.append(compare(make_rentals(size), run_legacy=size <= args.legacy_max_rows))
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import requests
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Temps d'affichage du tableau de bord lorsque le CDN des animations est lent ou injoignable :
+# l'application est exécutée avec streamlit.testing (sans navigateur) et chaque appel réseau
+# vers les animations attend --cdn-delay secondes avant d'échouer.
+
+def slow_cdn(delay):
+    def get(url, *args, **kwargs):
+        time.sleep(min(delay, kwargs.get('timeout') or delay))
+        raise requests.Timeout(f"{url} did not answer within {delay} s")
+    return get
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cdn-delay", type=float, default=10.0)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    os.environ.setdefault('LOTTIE_ASSETS_DIR', tempfile.mkdtemp(prefix='lottie-'))
+    os.environ['DELAY_RENDER_TIMING'] = '1'
+    requests.get = slow_cdn(args.cdn_delay)
+    os.chdir(APP_DIR)
+    sys.path.insert(0, APP_DIR)
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file('app.py', default_timeout=600)
+    timings = []
+    for run in range(args.runs):
+        start = time.perf_counter()
+        app.run()
+        timings.append(round(time.perf_counter() - start, 3))
+        if app.exception:
+            raise RuntimeError([e.value for e in app.exception])
+    print(json.dumps({"cdn_delay_s": args.cdn_delay, "render_s": timings}, indent=2))
+
+if __name__ == "__main__":
+    main()
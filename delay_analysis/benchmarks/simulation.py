@@ -0,0 +1,79 @@
+import argparse
+import json
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from delays.preprocessing import preprocess  # noqa: E402
+from delays.simulation import SCOPES, ThresholdSweep, apply_threshold, keep_only_ended_rentals, keep_only_late_checkins_canceled  # noqa: E402
+from synthetic import make_rentals  # noqa: E402
+
+# Comparaison de la simulation d'origine (apply_threshold, un couple seuil/portée à la fois)
+# avec le moteur précalculé ThresholdSweep : mêmes résultats pour tous les seuils et toutes les portées,
+# et durée pour balayer la grille complète.
+
+def legacy_sweep(prep_data, thresholds):
+    rows = []
+    for scope in SCOPES:
+        for threshold in thresholds:
+            with_threshold_df, lost, avoided = apply_threshold(prep_data, threshold, scope)
+            impacts = with_threshold_df[with_threshold_df['previous_rental_checkout_delay'] > 0]['impact_of_previous_rental_delay'].value_counts()
+            rows.append((scope, threshold, lost, avoided, {name: count for name, count in impacts.items() if count}))
+    return rows
+
+def engine_sweep(prep_data, thresholds):
+    sweep = ThresholdSweep(prep_data)
+    rows = []
+    for scope in SCOPES:
+        lost = sweep.ended_rentals_lost(thresholds, scope)
+        avoided = sweep.late_checkins_cancelations_avoided(thresholds, scope)
+        for i, threshold in enumerate(thresholds):
+            impacts = {name: count for name, count in sweep.impact_counts(threshold, scope).items() if count}
+            rows.append((scope, threshold, int(lost[i]), int(avoided[i]), impacts))
+    return sweep, rows
+
+def compare(raw_data, thresholds):
+    prep_data = preprocess(raw_data)
+    start = time.perf_counter()
+    legacy = legacy_sweep(prep_data, thresholds)
+    legacy_time = time.perf_counter() - start
+    start = time.perf_counter()
+    sweep, engine = engine_sweep(prep_data, thresholds)
+    engine_time = time.perf_counter() - start
+    assert legacy == engine, "ThresholdSweep diverges from apply_threshold"
+    assert sweep.nb_ended_rentals == len(keep_only_ended_rentals(prep_data))
+    assert sweep.nb_late_checkins_cancelations == len(keep_only_late_checkins_canceled(prep_data))
+
+    start = time.perf_counter()
+    sweep.curve(np.arange(0, 721, 1))
+    curve_time = time.perf_counter() - start
+    return {
+        "rows": len(raw_data),
+        "grid": len(thresholds) * len(SCOPES),
+        "apply_threshold_s": legacy_time,
+        "threshold_sweep_s": engine_time,
+        "speedup": legacy_time / engine_time,
+        "full_curve_721_thresholds_s": curve_time,
+        "identical": True,
+    }
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="*", default=[21310, 100000])
+    parser.add_argument("--thresholds", type=int, nargs="*", default=list(range(0, 721, 15)))
+    parser.add_argument("--data", default=None, help="Fichier réel (xlsx ou csv) à comparer également")
+    args = parser.parse_args()
+
+    results = []
+    if args.data:
+        data = pd.read_excel(args.data) if args.data.endswith('.xlsx') else pd.read_csv(args.data)
+        results.append(compare(data, args.thresholds))
+    for size in args.sizes:
+        results.append(compare(make_rentals(size), args.thresholds))
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+
+# Génération d'un jeu de données synthétique ayant la structure de get_around_delay_analysis.xlsx :
+# chaque voiture a une suite de locations, dont une partie est consécutive à la précédente.
+def make_rentals(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    n_cars = max(1, n_rows // 2)
+    rental_id = rng.permutation(np.arange(500000, 500000 + n_rows))
+    car_id = np.sort(rng.integers(0, n_cars, n_rows))
+    state = np.where(rng.random(n_rows) < 0.15, 'canceled', 'ended')
+    delay = np.round(rng.normal(60, 1000, n_rows))
+    delay[(state == 'canceled') | (rng.random(n_rows) < 0.2)] = np.nan
+
+    # Locations consécutives : la précédente est la location juste avant pour la même voiture
+    previous = np.full(n_rows, np.nan)
+    time_delta = np.full(n_rows, np.nan)
+    same_car = np.r_[False, car_id[1:] == car_id[:-1]]
+    consecutive = same_car & (rng.random(n_rows) < 0.3)
+    previous[consecutive] = rental_id[np.flatnonzero(consecutive) - 1]
+    # Quelques locations précédentes absentes de l'export
+    dangling = consecutive & (rng.random(n_rows) < 0.05)
+    previous[dangling] += 10000000
+    time_delta[consecutive] = rng.choice(np.arange(0, 750, 30), consecutive.sum())
+
+    return pd.DataFrame({
+        'rental_id': rental_id,
+        'car_id': car_id,
+        'checkin_type': np.where(rng.random(n_rows) < 0.2, 'connect', 'mobile'),
+        'state': state,
+        'delay_at_checkout_in_minutes': delay,
+        'previous_ended_rental_id': previous,
+        'time_delta_with_previous_rental_in_minutes': time_delta,
+    })
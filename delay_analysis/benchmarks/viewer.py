@@ -0,0 +1,47 @@
+import argparse
+import json
+import os
+import sys
+import time
+import pyarrow as pa
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from delays.preprocessing import preprocess  # noqa: E402
+from delays.viewer import paginate  # noqa: E402
+from synthetic import make_rentals  # noqa: E402
+
+# Données envoyées au navigateur par l'affichage des données : DataFrame complet (ancien st.write)
+# contre une page filtrée et triée côté serveur, et durée de calcul de cette page.
+
+def arrow_bytes(dataframe):
+    sink = pa.BufferOutputStream()
+    table = pa.Table.from_pandas(dataframe)
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().size
+
+def measure(prep_data, page_size):
+    cases = {
+        "first_page": {},
+        "sorted_by_delay": {"sort_by": "delay_at_checkout_in_minutes", "ascending": False},
+        "filtered_sorted": {"filters": {"state": ["Late checkout"], "checkin_type": ["connect"],
+                                        "delay_at_checkout_in_minutes": (30, None)},
+                            "sort_by": "time_delta_with_previous_rental_in_minutes", "page": 2},
+    }
+    result = {"rows": len(prep_data), "full_dataframe_bytes": arrow_bytes(prep_data)}
+    for name, kwargs in cases.items():
+        start = time.perf_counter()
+        page, total_rows, _ = paginate(prep_data, page_size=page_size, **kwargs)
+        result[name] = {"seconds": time.perf_counter() - start, "matching_rows": total_rows,
+                        "page_bytes": arrow_bytes(page)}
+    return result
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="*", default=[21310, 100000, 500000])
+    parser.add_argument("--page-size", type=int, default=50)
+    args = parser.parse_args()
+    print(json.dumps([measure(preprocess(make_rentals(size)), args.page_size) for size in args.sizes], indent=2))
+
+if __name__ == "__main__":
+    main()
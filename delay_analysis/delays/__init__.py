@@ -0,0 +1 @@
+# Fonctions d'analyse des retards de Getaround, indépendantes du tableau de bord Streamlit
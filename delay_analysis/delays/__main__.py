@@ -0,0 +1,3 @@
+from delays.cli import main
+
+main()
@@ -0,0 +1,33 @@
+from typing import Mapping, Sequence
+import pandas as pd
+from delays.preprocessing import IMPACTS, STATES
+
+#################################
+# Données agrégées des graphes  #
+#################################
+
+# Les graphes reçoivent uniquement le nombre de locations par catégorie (quelques lignes)
+# au lieu du DataFrame complet : la taille du graphe envoyé au navigateur ne dépend plus du jeu de données.
+
+
+# Tableau (catégorie, count) à partir d'un dictionnaire de comptes, sans les catégories absentes
+def counts_frame(counts: Mapping[str, int], name: str) -> pd.DataFrame:
+    frame = pd.DataFrame({name: list(counts), 'count': [int(count) for count in counts.values()]})
+    return frame[frame['count'] > 0].reset_index(drop=True)
+
+
+# Nombre de lignes par valeur d'une colonne, dans l'ordre des catégories données
+def category_counts(series: pd.Series, categories: Sequence[str]) -> pd.DataFrame:
+    counts = series.astype(object).value_counts()
+    return counts_frame({category: counts.get(category, 0) for category in categories}, series.name)
+
+
+# Répartition des statuts de locations
+def state_counts(prep_data: pd.DataFrame) -> pd.DataFrame:
+    return category_counts(prep_data['state'], STATES)
+
+
+# Impacts des retards sur le prochain checkin (locations dont la précédente a été restituée en retard)
+def impact_counts(prep_data: pd.DataFrame) -> pd.DataFrame:
+    delayed = prep_data[prep_data['previous_rental_checkout_delay'] > 0]
+    return category_counts(delayed['impact_of_previous_rental_delay'], IMPACTS)
@@ -0,0 +1,88 @@
+import argparse
+import json
+import os
+import threading
+import requests
+
+#################################
+# Animations Lottie             #
+#################################
+
+# Les animations sont lues depuis un dossier local (embarqué dans l'image Docker) : l'affichage de la page
+# ne fait jamais d'appel réseau. Les animations absentes sont téléchargées en arrière-plan, avec un délai
+# maximal, puis enregistrées dans ce dossier ; tant qu'elles manquent, elles ne sont simplement pas affichées.
+
+ASSETS_DIR = os.environ.get(
+    'LOTTIE_ASSETS_DIR', os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'assets'))
+FETCH_TIMEOUT = float(os.environ.get('LOTTIE_FETCH_TIMEOUT', '5'))
+
+LOTTIE_URLS = {
+    'car': 'https://lottie.host/837dfd9a-7345-46a5-ad2e-32853828f13f/pTRDKDo3dK.json',
+    'simulation': 'https://lottie.host/06ee9963-f040-483f-a837-37977cc82648/Mh7m7qu8qV.json',
+}
+
+# Animations téléchargées qui n'ont pas pu être écrites sur le disque (dossier en lecture seule)
+_downloaded = {}
+
+
+def local_path(url, assets_dir=ASSETS_DIR):
+    return os.path.join(assets_dir, os.path.basename(url.rstrip('/')))
+
+
+# Lecture locale uniquement : None si l'animation n'est pas (encore) disponible
+def read_lottie(url, assets_dir=ASSETS_DIR):
+    path = local_path(url, assets_dir)
+    if os.path.exists(path):
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    return _downloaded.get(url)
+
+
+# Téléchargement d'une animation avec délai maximal, puis écriture atomique dans le dossier local
+def fetch_lottie(url, assets_dir=ASSETS_DIR, timeout=FETCH_TIMEOUT):
+    try:
+        r = requests.get(url, timeout=timeout)
+        if r.status_code != 200:
+            print(f"Animation {url} indisponible (HTTP {r.status_code})")
+            return None
+        animation = r.json()
+    except (requests.RequestException, ValueError) as error:
+        print(f"Animation {url} indisponible ({error})")
+        return None
+    path = local_path(url, assets_dir)
+    try:
+        os.makedirs(assets_dir, exist_ok=True)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(animation, f)
+        os.replace(path + '.tmp', path)
+    except OSError:
+        _downloaded[url] = animation
+    return animation
+
+
+# Téléchargement en arrière-plan des animations absentes du dossier local
+def prefetch_lottie(urls=tuple(LOTTIE_URLS.values()), assets_dir=ASSETS_DIR, timeout=FETCH_TIMEOUT):
+    missing = [url for url in urls if read_lottie(url, assets_dir) is None]
+    thread = threading.Thread(
+        target=lambda: [fetch_lottie(url, assets_dir, timeout) for url in missing],
+        name='lottie-prefetch', daemon=True)
+    if missing:
+        thread.start()
+    return thread
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Télécharge les animations Lottie dans le dossier local.")
+    parser.add_argument('--assets_dir', default=ASSETS_DIR)
+    parser.add_argument('--timeout', type=float, default=FETCH_TIMEOUT)
+    args = parser.parse_args()
+    for name, url in LOTTIE_URLS.items():
+        status = 'ok' if fetch_lottie(url, args.assets_dir, args.timeout) is not None else 'indisponible'
+        print(f"{name}: {local_path(url, args.assets_dir)} ({status})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,32 @@
+import argparse
+import numpy as np
+from delays.data import DATA_SOURCE, DEFAULT_CACHE_DIR, ingest_rentals, read_rentals
+from delays.preprocessing import preprocess
+from delays.reports import SIMULATION_FILE, SUMMARY_FILE, build_reports, write_reports
+
+# Calcul des rapports en ligne de commande, sans Streamlit :
+#   python -m delays --source get_around_delay_analysis.xlsx --output reports
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m delays',
+        description="Calcule les statistiques des retards et la grille de simulation seuil × portée.")
+    parser.add_argument('--source', default=DATA_SOURCE, help="URL ou chemin local du classeur Excel")
+    parser.add_argument('--cache_dir', default=DEFAULT_CACHE_DIR)
+    parser.add_argument('--output', default='reports', help="Dossier des rapports")
+    parser.add_argument('--max_threshold', type=int, default=720, help="Seuil maximal simulé (minutes)")
+    parser.add_argument('--threshold_step', type=int, default=15, help="Pas entre deux seuils simulés (minutes)")
+    args = parser.parse_args(argv)
+
+    dataset_version = ingest_rentals(args.source, args.cache_dir)['sha256']
+    prep_data = preprocess(read_rentals(args.source, args.cache_dir))
+    thresholds = np.arange(0, args.max_threshold + 1, args.threshold_step)
+    summary, simulation = build_reports(prep_data, dataset_version, thresholds)
+    write_reports(summary, simulation, args.output)
+    print(f"Rapports écrits dans {args.output} ({SUMMARY_FILE}, {SIMULATION_FILE} : "
+          f"{len(simulation)} lignes seuil × portée) pour la version {dataset_version}.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+import argparse
+import hashlib
+import io
+import json
+import os
+import urllib.request
+import pandas as pd
+import pyarrow.feather as feather
+
+#################################
+# Ingestion des données         #
+#################################
+
+# Le classeur Excel (URL ou fichier local) est lu une seule fois, puis une copie typée au format Feather
+# (entiers nullables, catégories pour state et checkin_type) est écrite dans le cache local.
+# Les démarrages suivants lisent cette copie en mappant le fichier en mémoire, sans réseau ni openpyxl.
+
+DATA_URL = 'https://full-stack-assets.s3.eu-west-3.amazonaws.com/Deployment/get_around_delay_analysis.xlsx'
+# Source des données : URL ou chemin d'un fichier local (mode hors ligne)
+DATA_SOURCE = os.environ.get('DELAY_DATA_SOURCE', DATA_URL)
+DEFAULT_CACHE_DIR = os.environ.get('DELAY_DATA_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'getaround'))
+
+# Types compacts des colonnes du jeu de données
+INTEGER_COLUMNS = {
+    'rental_id': 'Int32',
+    'car_id': 'Int32',
+    'delay_at_checkout_in_minutes': 'Int32',
+    'previous_ended_rental_id': 'Int32',
+    'time_delta_with_previous_rental_in_minutes': 'Int16',
+}
+CATEGORY_COLUMNS = ['checkin_type', 'state']
+
+
+# Lecture du contenu brut d'une URL ou d'un fichier local
+def read_source(source):
+    if os.path.exists(source):
+        with open(source, 'rb') as f:
+            return f.read()
+    with urllib.request.urlopen(source) as response:
+        return response.read()
+
+
+def sha256_of(content):
+    return hashlib.sha256(content).hexdigest()
+
+
+# Typage compact du classeur lu par pandas
+def typed_rentals(dataframe):
+    rentals = dataframe.copy()
+    for column, dtype in INTEGER_COLUMNS.items():
+        if column in rentals:
+            rentals[column] = rentals[column].astype(dtype)
+    for column in CATEGORY_COLUMNS:
+        if column in rentals:
+            rentals[column] = rentals[column].astype('category')
+    return rentals
+
+
+def cache_paths(source, cache_dir):
+    name = os.path.splitext(os.path.basename(source.rstrip('/')))[0] or 'rentals'
+    return os.path.join(cache_dir, f'{name}.feather'), os.path.join(cache_dir, f'{name}.json')
+
+
+def read_meta(meta_path):
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path) as f:
+        return json.load(f)
+
+
+# Signature bon marché d'une source : date de modification et taille d'un fichier local (un stat),
+# l'URL elle-même pour une source distante (lue une seule fois, le cache fait foi ensuite)
+def source_signature(source):
+    if os.path.exists(source):
+        stat = os.stat(source)
+        return f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+    return source
+
+
+# Étape d'ingestion : écrit la copie typée si elle manque ou si le fichier local a changé.
+# Retourne les métadonnées du cache, dont l'empreinte SHA-256 qui sert de version du jeu de données.
+def ingest_rentals(source=DATA_SOURCE, cache_dir=DEFAULT_CACHE_DIR, refresh=False):
+    data_path, meta_path = cache_paths(source, cache_dir)
+    meta = read_meta(meta_path)
+    content = None
+    signature = source_signature(source)
+    # Un fichier local peut changer : le cache n'est valide que pour son contenu actuel.
+    # Le contenu n'est relu et haché que si la date de modification ou la taille ont changé.
+    if os.path.exists(source) and meta is not None and meta.get('signature') != signature:
+        content = read_source(source)
+        if meta.get('sha256') != sha256_of(content):
+            meta = None
+        else:
+            meta['signature'] = signature
+            with open(meta_path, 'w') as f:
+                json.dump(meta, f)
+
+    if not refresh and meta is not None and meta.get('source') == source and os.path.exists(data_path):
+        return meta
+
+    print(f"Ingestion des données depuis {source}...")
+    if content is None:
+        content = read_source(source)
+    rentals = typed_rentals(pd.read_excel(io.BytesIO(content)))
+
+    # Écriture non compressée (lisible par mappage mémoire), puis remplacement atomique
+    os.makedirs(cache_dir, exist_ok=True)
+    feather.write_feather(rentals, data_path + '.tmp', compression='uncompressed')
+    os.replace(data_path + '.tmp', data_path)
+    meta = {'source': source, 'sha256': sha256_of(content), 'rows': len(rentals), 'signature': signature}
+    with open(meta_path, 'w') as f:
+        json.dump(meta, f)
+    print(f"Données mises en cache dans {data_path} (sha256 {meta['sha256']}).")
+    return meta
+
+
+# Lecture de la copie typée déjà ingérée (fichier Feather mappé en mémoire), sans consulter la source
+def read_rentals(source=DATA_SOURCE, cache_dir=DEFAULT_CACHE_DIR):
+    data_path, _ = cache_paths(source, cache_dir)
+    return feather.read_table(data_path, memory_map=True).to_pandas()
+
+
+# Chargement du jeu de données depuis le cache local (ingéré au premier appel)
+def load_rentals(source=DATA_SOURCE, cache_dir=DEFAULT_CACHE_DIR, refresh=False):
+    ingest_rentals(source, cache_dir, refresh)
+    return read_rentals(source, cache_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingestion du jeu de données des retards dans le cache local.")
+    parser.add_argument('--source', default=DATA_SOURCE, help="URL ou chemin local du classeur Excel")
+    parser.add_argument('--cache_dir', default=DEFAULT_CACHE_DIR)
+    parser.add_argument('--refresh', action='store_true', help="Relire la source même si le cache est valide")
+    args = parser.parse_args()
+    print(json.dumps(ingest_rentals(args.source, args.cache_dir, args.refresh)))
+
+
+if __name__ == '__main__':
+    main()
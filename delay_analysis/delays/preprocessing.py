@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+
+#################################
+# Prétraitement des locations   #
+#################################
+
+# Catégories des colonnes calculées (stockées en catégories pandas, un octet par ligne)
+STATES = ('On time checkout', 'Late checkout', 'Canceled', 'Unknown')
+IMPACTS = ('No impact', 'Late checkin', 'Cancelation', 'No previous rental filled out')
+
+# Retard de restitution de la location précédente, par jointure indexée sur rental_id
+# (une seule recherche dans un index au lieu d'un parcours du DataFrame par ligne).
+# Si un rental_id apparaît plusieurs fois, la première occurrence est utilisée.
+def extract_previous_rental_delays(dataframe: pd.DataFrame) -> pd.Series:
+    delays_by_rental = (dataframe.drop_duplicates(subset='rental_id')
+                                 .set_index('rental_id')['delay_at_checkout_in_minutes'])
+    return dataframe['previous_ended_rental_id'].map(delays_by_rental)
+
+
+# Valeurs numériques en float64 (NaN pour les valeurs manquantes), quel que soit le type de la colonne
+def as_float(series: pd.Series) -> np.ndarray:
+    return pd.to_numeric(series, errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+
+
+# Transformation de la colonne state en fonction du délai de restitution en minutes
+def clean_states(dataframe: pd.DataFrame) -> pd.Series:
+    state = dataframe['state'].astype(object).to_numpy()
+    delay = as_float(dataframe['delay_at_checkout_in_minutes'])
+    ended = state == 'ended'
+    cleaned = np.select(
+        [state == 'canceled', ended & (delay <= 0), ended & (delay > 0)],
+        ['Canceled', 'On time checkout', 'Late checkout'],
+        default='Unknown')
+    return pd.Series(pd.Categorical(cleaned, categories=STATES), index=dataframe.index, name='state')
+
+
+# Délai d'enregistrement : retard de la location précédente moins le temps prévu entre les deux locations
+# (négatif ramené à 0, NaN si l'une des deux valeurs manque). Minutes entières : float32 est exact.
+def checkin_delays(dataframe: pd.DataFrame) -> pd.Series:
+    delay = (as_float(dataframe['previous_rental_checkout_delay'])
+             - as_float(dataframe['time_delta_with_previous_rental_in_minutes']))
+    return pd.Series(np.where(delay < 0, 0.0, delay).astype('float32'), index=dataframe.index, name='checkin_delay')
+
+
+# Impact du retard de la location précédente (à partir de l'état nettoyé et du délai d'enregistrement)
+def impacts_of_previous_rental_delay(dataframe: pd.DataFrame) -> pd.Series:
+    checkin_delay = as_float(dataframe['checkin_delay'])
+    late = checkin_delay > 0
+    canceled = dataframe['state'].astype(object).to_numpy() == 'Canceled'
+    impact = np.select(
+        [np.isnan(checkin_delay), late & canceled, late],
+        ['No previous rental filled out', 'Cancelation', 'Late checkin'],
+        default='No impact')
+    return pd.Series(pd.Categorical(impact, categories=IMPACTS), index=dataframe.index,
+                     name='impact_of_previous_rental_delay')
+
+
+# Prétraitement complet des données brutes, entièrement vectorisé.
+# Copie superficielle : les colonnes d'origine sont partagées avec raw_data (qui n'est pas modifié),
+# seules les colonnes calculées occupent de la mémoire supplémentaire.
+def preprocess(raw_data: pd.DataFrame) -> pd.DataFrame:
+    prep_data = raw_data.copy(deep=False)
+    prep_data['state'] = clean_states(raw_data)
+    prep_data['previous_rental_checkout_delay'] = extract_previous_rental_delays(raw_data)
+    prep_data['checkin_delay'] = checkin_delays(prep_data)
+    prep_data['impact_of_previous_rental_delay'] = impacts_of_previous_rental_delay(prep_data)
+    return prep_data
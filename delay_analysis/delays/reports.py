@@ -0,0 +1,66 @@
+import json
+import os
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+from delays.aggregates import impact_counts, state_counts
+from delays.simulation import ThresholdSweep
+from delays.statistics import calculate_checkout_percentages, calculate_delay_percentages, calculate_statistics
+
+#################################
+# Rapports précalculés          #
+#################################
+
+# Toutes les statistiques du tableau de bord et la grille de simulation seuil × portée,
+# calculées une fois (par exemple chaque nuit) puis lues par le tableau de bord.
+
+REPORT_THRESHOLDS = np.arange(0, 721, 15)
+SUMMARY_FILE = 'summary.json'
+SIMULATION_FILE = 'simulation.parquet'
+
+
+# Conversion des scalaires numpy en types Python pour la sérialisation JSON
+def to_builtin(values):
+    return {key: value.item() if isinstance(value, np.generic) else value for key, value in values.items()}
+
+
+def counts_dict(counts: pd.DataFrame):
+    return dict(zip(counts.iloc[:, 0], counts['count'].astype(int).tolist()))
+
+
+# Calcul de tous les rapports à partir des données prétraitées
+def build_reports(prep_data, dataset_version, thresholds=REPORT_THRESHOLDS):
+    summary = {
+        'dataset_version': dataset_version,
+        'generated_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'statistics': to_builtin(calculate_statistics(prep_data)),
+        'delay_percentages': to_builtin(calculate_delay_percentages(prep_data)),
+        'checkout_percentages': to_builtin(calculate_checkout_percentages(prep_data)),
+        'state_counts': counts_dict(state_counts(prep_data)),
+        'impact_counts': counts_dict(impact_counts(prep_data)),
+    }
+    simulation = ThresholdSweep(prep_data).curve(thresholds)
+    return summary, simulation
+
+
+def write_reports(summary, simulation, output_dir):
+    os.makedirs(output_dir, exist_ok=True)
+    simulation.to_parquet(os.path.join(output_dir, SIMULATION_FILE), index=False)
+    # Le résumé est écrit en dernier : sa présence indique que les rapports sont complets
+    summary_path = os.path.join(output_dir, SUMMARY_FILE)
+    with open(summary_path + '.tmp', 'w') as f:
+        json.dump(summary, f, indent=2)
+    os.replace(summary_path + '.tmp', summary_path)
+
+
+# Lecture des rapports ; None s'ils manquent ou concernent une autre version du jeu de données
+def read_reports(reports_dir, dataset_version=None):
+    summary_path = os.path.join(reports_dir, SUMMARY_FILE)
+    simulation_path = os.path.join(reports_dir, SIMULATION_FILE)
+    if not (os.path.exists(summary_path) and os.path.exists(simulation_path)):
+        return None
+    with open(summary_path) as f:
+        summary = json.load(f)
+    if dataset_version is not None and summary.get('dataset_version') != dataset_version:
+        return None
+    return summary, pd.read_parquet(simulation_path)
@@ -0,0 +1,119 @@
+from typing import Dict, Sequence
+import numpy as np
+import pandas as pd
+from delays.aggregates import IMPACTS
+from delays.preprocessing import as_float
+
+#################################
+# Simulation des seuils         #
+#################################
+
+SCOPES = ('All', 'Connect', 'mobile')
+CHECKIN_TYPES = {'Connect': 'connect', 'mobile': 'mobile'}
+
+
+def keep_only_ended_rentals(dataframe):
+    return dataframe[(dataframe['state'] == 'On time checkout') | (dataframe['state'] == 'Late checkout')]
+
+def keep_only_late_checkins_canceled(dataframe):
+    return dataframe[(dataframe['checkin_delay'] > 0) & (dataframe['state'] == 'Canceled')]
+
+
+# Masque des locations concernées par une portée ('All', 'Connect' ou 'mobile')
+def scope_mask(dataframe, scope):
+    if scope == 'All':
+        return np.ones(len(dataframe), dtype=bool)
+    if scope in CHECKIN_TYPES:
+        return dataframe['checkin_type'].astype(object).to_numpy() == CHECKIN_TYPES[scope]
+    raise ValueError("Scope must be 'All', 'Connect', or 'mobile'")
+
+
+# Simulation de référence pour un seul couple (seuil, portée) : filtre et supprime les lignes du DataFrame
+def apply_threshold(dataframe, threshold, scope):
+    in_scope = scope_mask(dataframe, scope)
+    rows_to_drop_df = dataframe[(dataframe['time_delta_with_previous_rental_in_minutes'] < threshold) & in_scope]
+
+    nb_ended_rentals_dropped = len(keep_only_ended_rentals(rows_to_drop_df))
+    nb_late_checkins_cancelations_dropped = len(keep_only_late_checkins_canceled(rows_to_drop_df))
+    output = (
+        dataframe.drop(rows_to_drop_df.index),
+        nb_ended_rentals_dropped,
+        nb_late_checkins_cancelations_dropped
+    )
+
+    return output
+
+
+# Moteur de simulation précalculé : les temps entre locations sont triés une seule fois par portée,
+# puis chaque seuil est résolu par recherche dichotomique (une location est supprimée si son temps
+# avec la location précédente est strictement inférieur au seuil, comme dans apply_threshold).
+class ThresholdSweep:
+    def __init__(self, prep_data: pd.DataFrame):
+        time_delta = as_float(prep_data['time_delta_with_previous_rental_in_minutes'])
+        state = prep_data['state'].astype(object).to_numpy()
+        checkin_delay = as_float(prep_data['checkin_delay'])
+        impact = prep_data['impact_of_previous_rental_delay'].astype(object).to_numpy()
+        has_delta = ~np.isnan(time_delta)
+
+        ended = (state == 'On time checkout') | (state == 'Late checkout')
+        late_checkins_canceled = (checkin_delay > 0) & (state == 'Canceled')
+        previous_rental_delayed = as_float(prep_data['previous_rental_checkout_delay']) > 0
+
+        self.nb_ended_rentals = int(ended.sum())
+        self.nb_late_checkins_cancelations = int(late_checkins_canceled.sum())
+        self.impact_counts_without_threshold = {
+            name: int((previous_rental_delayed & (impact == name)).sum()) for name in IMPACTS}
+
+        self._ended = {}
+        self._late_checkins_canceled = {}
+        self._impacts = {}
+        for scope in SCOPES:
+            droppable = scope_mask(prep_data, scope) & has_delta
+            self._ended[scope] = np.sort(time_delta[droppable & ended])
+            self._late_checkins_canceled[scope] = np.sort(time_delta[droppable & late_checkins_canceled])
+            self._impacts[scope] = {
+                name: np.sort(time_delta[droppable & previous_rental_delayed & (impact == name)])
+                for name in IMPACTS}
+
+    @staticmethod
+    def _count_below(sorted_deltas, thresholds):
+        return np.searchsorted(sorted_deltas, thresholds, side='left')
+
+    def _check_scope(self, scope):
+        if scope not in SCOPES:
+            raise ValueError("Scope must be 'All', 'Connect', or 'mobile'")
+
+    # Nombre de locations terminées perdues (équivalent au deuxième élément retourné par apply_threshold)
+    def ended_rentals_lost(self, threshold, scope='All'):
+        self._check_scope(scope)
+        return self._count_below(self._ended[scope], threshold)
+
+    # Nombre d'annulations dues à un enregistrement tardif évitées
+    def late_checkins_cancelations_avoided(self, threshold, scope='All'):
+        self._check_scope(scope)
+        return self._count_below(self._late_checkins_canceled[scope], threshold)
+
+    # Répartition des impacts des retards restant après application du seuil
+    def impact_counts(self, threshold, scope='All') -> Dict[str, int]:
+        self._check_scope(scope)
+        return {
+            name: self.impact_counts_without_threshold[name]
+                  - int(self._count_below(self._impacts[scope][name], threshold))
+            for name in IMPACTS}
+
+    # Courbe perte de revenu / annulations évitées pour toutes les portées et tous les seuils en une fois
+    def curve(self, thresholds: Sequence[float], scopes: Sequence[str] = SCOPES) -> pd.DataFrame:
+        thresholds = np.asarray(thresholds, dtype='float64')
+        frames = []
+        for scope in scopes:
+            lost = self.ended_rentals_lost(thresholds, scope)
+            avoided = self.late_checkins_cancelations_avoided(thresholds, scope)
+            frames.append(pd.DataFrame({
+                'threshold': thresholds,
+                'scope': scope,
+                'ended_rentals_lost': lost,
+                'late_checkins_cancelations_avoided': avoided,
+                'revenue_loss_percentage': lost / max(self.nb_ended_rentals, 1) * 100,
+                'cancelations_avoided_percentage': avoided / max(self.nb_late_checkins_cancelations, 1) * 100,
+            }))
+        return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,77 @@
+#################################
+# Statistiques des locations    #
+#################################
+
+def calculate_statistics(data):
+    # Nombre total de locations
+    total_locations = data.shape[0]
+
+    # Nombre total de voitures
+    total_cars = data['car_id'].nunique()
+
+    # Nombre d'annulations (comptes par masques booléens, sans extraire de sous-DataFrame)
+    canceled_bookings = int((data['state'] == 'Canceled').sum())
+    cancellation_percentage = (canceled_bookings / total_locations) * 100
+
+    # Nombre de 'connect' check-ins
+    connect_checkins = int((data['checkin_type'] == 'connect').sum())
+    mobile_checkins = int((data['checkin_type'] == 'mobile').sum())
+    connect_percentage = (connect_checkins / total_locations) * 100
+    mobile_percentage = (mobile_checkins / total_locations) * 100
+
+    # Statistiques des temps entre les locations consécutives
+    time_delta = data['time_delta_with_previous_rental_in_minutes']
+    max_time_delta = float(time_delta.max())
+    mean_time_delta = float(time_delta.mean())
+
+    # Calcul du pourcentage de locations consécutives (le compte ne dépend pas de l'ordre : aucun tri)
+    consecutive_locations = int(time_delta.notna().sum())
+    consecutive_percentage = (consecutive_locations / total_locations) * 100
+
+    return {
+        "total_locations": total_locations,
+        "total_cars": total_cars,
+        "canceled_bookings": canceled_bookings,
+        "cancellation_percentage": cancellation_percentage,
+        "connect_checkins": connect_checkins,
+        "connect_percentage": connect_percentage,
+        "mobile_checkins": mobile_checkins,
+        "mobile_percentage": mobile_percentage,
+        "max_time_delta": max_time_delta,
+        "mean_time_delta": mean_time_delta,
+        "consecutive_locations": consecutive_locations,
+        "consecutive_percentage": consecutive_percentage
+    }
+
+# Fonction pour calculer les pourcentages de retard
+def calculate_delay_percentages(data):
+    total_rentals = len(data)
+    delay = data['delay_at_checkout_in_minutes']
+    less_than_30m = int(((delay > 0) & (delay <= 30)).sum())
+    between_30m_1h = int(((delay > 30) & (delay <= 60)).sum())
+    more_than_1h = int((delay > 60).sum())
+
+
+    percent_less_than_30m = (less_than_30m / total_rentals) * 100
+    percent_between_30m_1h = (between_30m_1h / total_rentals) * 100
+    percent_more_than_1h = (more_than_1h / total_rentals) * 100
+
+    return {
+        "percent_less_than_30m": percent_less_than_30m,
+        "percent_between_30m_1h": percent_between_30m_1h,
+        "percent_more_than_1h": percent_more_than_1h
+    }
+
+# Fonction pour calculer la répartition des locations selon le délai de restitution
+def calculate_checkout_percentages(data):
+    total_rentals = len(data)
+    delay = data['delay_at_checkout_in_minutes']
+    delayed_rentals = int((delay > 0).sum())
+    on_time_rentals = int((delay <= 0).sum())
+    nan_rentals = int(delay.isnull().sum())
+
+    return {
+        "delayed_percent": (delayed_rentals / total_rentals) * 100,
+        "on_time_percent": (on_time_rentals / total_rentals) * 100,
+        "nan_percent": (nan_rentals / total_rentals) * 100
+    }
@@ -0,0 +1,34 @@
+import os
+import time
+
+#################################
+# Mesure du temps d'affichage   #
+#################################
+
+# Activé avec DELAY_RENDER_TIMING=1 : chaque exécution du script Streamlit affiche dans les logs
+# la durée de chaque section de la page et la durée totale d'affichage.
+RENDER_TIMING = os.environ.get('DELAY_RENDER_TIMING', '0') == '1'
+
+
+class RenderTimer:
+    def __init__(self, enabled=RENDER_TIMING):
+        self.enabled = enabled
+        self.start = time.perf_counter()
+        self.last = self.start
+        self.sections = {}
+
+    # Fin d'une section : durée écoulée depuis la section précédente
+    def mark(self, name):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.sections[name] = self.sections.get(name, 0.0) + (now - self.last)
+        self.last = now
+
+    def report(self):
+        if not self.enabled:
+            return None
+        timings = {name: round(seconds * 1000, 1) for name, seconds in self.sections.items()}
+        timings['total'] = round((time.perf_counter() - self.start) * 1000, 1)
+        print(f"Temps d'affichage (ms) : {timings}")
+        return timings
@@ -0,0 +1,49 @@
+import math
+from typing import Mapping, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+#################################
+# Affichage paginé des données  #
+#################################
+
+# Filtrage, tri et pagination côté serveur : seule la page visible est envoyée au navigateur.
+# Filtres : {colonne: liste de valeurs acceptées} ou {colonne: (minimum, maximum)} (bornes incluses,
+# None pour une borne ouverte ; les valeurs manquantes sont exclues dès qu'un intervalle est filtré).
+
+
+def filter_mask(dataframe: pd.DataFrame, filters: Optional[Mapping] = None) -> np.ndarray:
+    mask = np.ones(len(dataframe), dtype=bool)
+    for column, accepted in (filters or {}).items():
+        if accepted is None:
+            continue
+        values = dataframe[column]
+        if isinstance(accepted, tuple):
+            low, high = accepted
+            numbers = pd.to_numeric(values, errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+            with np.errstate(invalid='ignore'):
+                if low is not None:
+                    mask &= numbers >= low
+                if high is not None:
+                    mask &= numbers <= high
+        else:
+            mask &= values.isin(list(accepted)).to_numpy(dtype=bool)
+    return mask
+
+
+# Page demandée (numérotée à partir de 1) du DataFrame filtré et trié, nombre de lignes filtrées et de pages
+def paginate(dataframe: pd.DataFrame, filters: Optional[Mapping] = None, sort_by: Optional[str] = None,
+             ascending: bool = True, page: int = 1, page_size: int = 50) -> Tuple[pd.DataFrame, int, int]:
+    positions = np.flatnonzero(filter_mask(dataframe, filters))
+    total_rows = len(positions)
+    n_pages = max(1, math.ceil(total_rows / page_size))
+    page = min(max(1, page), n_pages)
+
+    if sort_by is not None:
+        # Seule la colonne triée est réordonnée ; les lignes complètes ne sont extraites que pour la page
+        keys = dataframe[sort_by].iloc[positions].reset_index(drop=True)
+        order = keys.sort_values(ascending=ascending, kind='stable', na_position='last').index.to_numpy()
+        positions = positions[order]
+
+    start = (page - 1) * page_size
+    return dataframe.iloc[positions[start:start + page_size]], total_rows, n_pages
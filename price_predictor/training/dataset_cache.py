@@ -0,0 +1,75 @@
+import hashlib
+import io
+import json
+import os
+import urllib.request
+import pandas as pd
+import pyarrow.feather as feather
+
+# Chargement du jeu de données avec cache local :
+# le CSV est téléchargé (ou lu depuis un fichier local) une seule fois, son empreinte SHA-256 est vérifiée,
+# puis une copie typée au format Feather (catégories et booléens conservés) est écrite dans le cache.
+# Les exécutions suivantes lisent cette copie en mappant le fichier en mémoire, sans téléchargement.
+
+DATASET_URL = "https://full-stack-assets.s3.eu-west-3.amazonaws.com/Deployment/get_around_pricing_project.csv"
+DEFAULT_CACHE_DIR = os.environ.get("DATASET_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "getaround"))
+
+
+# Lecture du contenu brut d'une URL ou d'un fichier local
+def read_source(source):
+    if os.path.exists(source):
+        with open(source, "rb") as f:
+            return f.read()
+    with urllib.request.urlopen(source) as response:
+        return response.read()
+
+
+def sha256_of(content):
+    return hashlib.sha256(content).hexdigest()
+
+
+# Typage compact : colonnes texte en catégories, booléens conservés
+def typed_dataset(content):
+    dataset = pd.read_csv(io.BytesIO(content))
+    dataset = dataset.drop(['Unnamed: 0'], axis=1, errors='ignore')
+    for column in dataset.select_dtypes(include='object').columns:
+        dataset[column] = dataset[column].astype('category')
+    return dataset
+
+
+def cache_paths(source, cache_dir):
+    name = os.path.splitext(os.path.basename(source.rstrip("/")))[0] or "dataset"
+    return os.path.join(cache_dir, f"{name}.feather"), os.path.join(cache_dir, f"{name}.json")
+
+
+# Fonction pour charger les données depuis le cache local, ou depuis la source lors du premier appel
+def load_dataset(source=DATASET_URL, cache_dir=DEFAULT_CACHE_DIR, sha256=None, refresh=False):
+    data_path, meta_path = cache_paths(source, cache_dir)
+    # Un fichier local peut changer : le cache n'est valide que pour son contenu actuel
+    if sha256 is None and os.path.exists(source):
+        sha256 = sha256_of(read_source(source))
+
+    if not refresh and os.path.exists(data_path) and os.path.exists(meta_path):
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if meta.get("source") == source and (sha256 is None or meta.get("sha256") == sha256):
+            print(f"Loading dataset from local cache {data_path}...")
+            dataset = feather.read_table(data_path, memory_map=True).to_pandas()
+            print("Dataset loaded successfully.")
+            return dataset
+
+    print(f"Loading dataset from {source}...")
+    content = read_source(source)
+    checksum = sha256_of(content)
+    if sha256 is not None and checksum != sha256:
+        raise ValueError(f"Checksum mismatch for {source}: expected {sha256}, got {checksum}.")
+    dataset = typed_dataset(content)
+
+    # Écriture non compressée (lisible par mappage mémoire), puis remplacement atomique
+    os.makedirs(cache_dir, exist_ok=True)
+    feather.write_feather(dataset, data_path + ".tmp", compression="uncompressed")
+    os.replace(data_path + ".tmp", data_path)
+    with open(meta_path, "w") as f:
+        json.dump({"source": source, "sha256": checksum, "rows": len(dataset)}, f)
+    print(f"Dataset loaded successfully and cached in {data_path} (sha256 {checksum}).")
+    return dataset
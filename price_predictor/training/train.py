@@ -1,29 +1,33 @@
 import argparse
+import hashlib
+import os
+import time
 import pandas as pd
 import mlflow
 import mlflow.sklearn
-from sklearn.model_selection import train_test_split, GridSearchCV
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401 (active HalvingGridSearchCV)
+from sklearn.model_selection import train_test_split, GridSearchCV, HalvingGridSearchCV, HalvingRandomSearchCV
 from sklearn.preprocessing import StandardScaler, FunctionTransformer, OneHotEncoder
 from sklearn.compose import ColumnTransformer
 from sklearn.linear_model import LinearRegression, Ridge
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.pipeline import Pipeline
 from sklearn.metrics import r2_score, mean_absolute_error
-
-# Fonction pour charger les données
-def load_data(url):
-    print("Loading dataset from URL...")
-    dataset = pd.read_csv(url)
-    dataset = dataset.drop(['Unnamed: 0'], axis=1)
-    print("Dataset loaded successfully.")
-    return dataset
+from joblib import dump, load
+import sklearn
+from dataset_cache import DATASET_URL, DEFAULT_CACHE_DIR, load_dataset
 
 # Fonction pour regrouper les catégories rares
 def regroup_categories(df, column, threshold):
     print(f"Regrouping rare categories in column: {column}...")
     counts = df[column].value_counts()
     infrequent_values = counts[counts < threshold].index
+    # Colonne catégorielle (jeu de données en cache) : 'Others' doit faire partie des catégories
+    if isinstance(df[column].dtype, pd.CategoricalDtype) and 'Others' not in df[column].cat.categories:
+        df[column] = df[column].cat.add_categories(['Others'])
     df.loc[df[column].isin(infrequent_values), column] = 'Others'
+    if isinstance(df[column].dtype, pd.CategoricalDtype):
+        df[column] = df[column].cat.remove_unused_categories()
     print(f"Categories regrouped in column: {column}.")
     return df
 
@@ -60,10 +64,74 @@ def create_preprocessor(X):
     
     return preprocessor
 
+# Version du préprocesseur : à incrémenter lorsque create_preprocessor change, pour invalider le cache
+FEATURES_CACHE_VERSION = 1
+
+# Fonction pour ajuster le préprocesseur et transformer les données d'entraînement, avec cache sur disque :
+# la matrice transformée (one-hot creuse et variables numériques normalisées) ne dépend que des données
+# d'entraînement, elle est donc réutilisée par tous les candidats, régresseurs et exécutions
+def fit_features(X_train, cache_dir=None):
+    if cache_dir is None:
+        preprocessor = create_preprocessor(X_train)
+        return preprocessor, preprocessor.fit_transform(X_train)
+
+    digest = hashlib.sha256()
+    digest.update(f"{FEATURES_CACHE_VERSION}-{sklearn.__version__}".encode())
+    digest.update(str(list(X_train.dtypes.items())).encode())
+    digest.update(pd.util.hash_pandas_object(X_train, index=True).values.tobytes())
+    cache_path = os.path.join(cache_dir, f"features-{digest.hexdigest()[:16]}.joblib")
+
+    if os.path.exists(cache_path):
+        print(f"Loading fitted preprocessor and transformed features from {cache_path}...")
+        return load(cache_path)
+
+    preprocessor = create_preprocessor(X_train)
+    features = (preprocessor, preprocessor.fit_transform(X_train))
+    os.makedirs(cache_dir, exist_ok=True)
+    dump(features, cache_path + ".tmp")
+    os.replace(cache_path + ".tmp", cache_path)
+    print(f"Transformed features cached in {cache_path}")
+    return features
+
+# Stratégies de recherche d'hyperparamètres
+SEARCH_STRATEGIES = ['grid', 'halving', 'halving_random']
+
+# Fonction pour créer la recherche d'hyperparamètres, plis et candidats étant répartis sur 'n_jobs' cœurs :
+# grille complète, ou successive halving (les candidats sont évalués sur une fraction croissante
+# des données et seul le meilleur tiers, pour factor=3, passe à l'itération suivante)
+def create_search(model, param_grid, cv=None, search='grid', n_jobs=-1, factor=3):
+    if search == 'grid':
+        return GridSearchCV(model, param_grid=param_grid, cv=cv, n_jobs=n_jobs, verbose=3)
+    if search == 'halving':
+        return HalvingGridSearchCV(model, param_grid=param_grid, cv=cv, factor=factor, n_jobs=n_jobs, verbose=3)
+    if search == 'halving_random':
+        return HalvingRandomSearchCV(model, param_distributions=param_grid, cv=cv, factor=factor, n_jobs=n_jobs,
+                                     verbose=3, random_state=0)
+    raise ValueError(f"Search strategy must be one of {SEARCH_STRATEGIES}")
+
+# Fonction pour récupérer le temps passé sur chaque candidat (entraînement et évaluation, tous plis confondus :
+# temps de calcul cumulé, supérieur à la durée écoulée lorsque les plis tournent en parallèle avec --n_jobs)
+def candidate_timings(search):
+    results = pd.DataFrame(search.cv_results_)
+    timings = pd.DataFrame({
+        'params': results['params'].astype(str),
+        'mean_fit_time': results['mean_fit_time'],
+        'mean_score_time': results['mean_score_time'],
+        'total_fit_score_time': (results['mean_fit_time'] + results['mean_score_time']) * search.n_splits_,
+        'mean_test_score': results['mean_test_score'],
+        'rank_test_score': results['rank_test_score']
+    })
+    # Successive halving : itération et quantité de données utilisées pour chaque évaluation
+    for column in ['iter', 'n_resources']:
+        if column in results:
+            timings[column] = results[column]
+    return timings
+
 # Fonction pour définir et entraîner le modèle
-def train_model(X_train, Y_train, X_test, Y_test, regressor, param_grid=None, cv=None):
+def train_model(X_train, Y_train, X_test, Y_test, regressor, param_grid=None, cv=None, search='grid', n_jobs=-1, factor=3,
+                features_cache_dir=None):
     print("Creating preprocessors for numerical, categorical, and binary features...")
-    preprocessor = create_preprocessor(X_train)
+    preprocessor, X_train_features = fit_features(X_train, features_cache_dir)
     print("Preprocessors created successfully.")
     
     print(f"Training model: {regressor}...")
@@ -75,15 +143,16 @@ def train_model(X_train, Y_train, X_test, Y_test, regressor, param_grid=None, cv
         model = RandomForestRegressor()
 
     if param_grid:
-        model = GridSearchCV(model, param_grid=param_grid, cv=cv, verbose=3)
-        print("GridSearchCV is being used for hyperparameter tuning.")
+        model = create_search(model, param_grid, cv=cv, search=search, n_jobs=n_jobs, factor=factor)
+        print(f"{type(model).__name__} is being used for hyperparameter tuning.")
 
+    # Le modèle est entraîné sur les features déjà transformées, puis assemblé avec le préprocesseur ajusté
+    model.fit(X_train_features, Y_train)
     predictor = Pipeline(steps=[
         ('features_preprocessing', preprocessor),
         ("model", model)
     ])
 
-    predictor.fit(X_train, Y_train)
     print(f"Model {regressor} trained successfully.")
     return predictor, model
 
@@ -105,12 +174,21 @@ def main():
     parser.add_argument("--min_samples_split", type=int, nargs="*")
     parser.add_argument("--n_estimators", type=int, nargs="*")
     parser.add_argument("--executor_name", default='Unknown')
+    parser.add_argument("--search", default='grid', choices=SEARCH_STRATEGIES, help="Hyperparameter search strategy.")
+    parser.add_argument("--n_jobs", type=int, default=-1, help="Cores used by the search (-1: all cores).")
+    parser.add_argument("--halving_factor", type=int, default=3, help="Successive halving elimination factor.")
+    parser.add_argument("--dataset", default=DATASET_URL, help="URL or local path of the pricing CSV.")
+    parser.add_argument("--dataset_sha256", default=None, help="Expected SHA-256 of the pricing CSV.")
+    parser.add_argument("--cache_dir", default=DEFAULT_CACHE_DIR, help="Local dataset cache directory.")
+    parser.add_argument("--refresh_dataset", action="store_true", help="Ignore the local dataset cache.")
+    parser.add_argument("--no_features_cache", action="store_true", help="Do not cache the transformed features.")
     args = parser.parse_args()
     print(f"Command line arguments parsed: {args}")
+    # Arguments qui ne sont pas des hyperparamètres du modèle
+    non_grid_args = ['cv', 'regressor', 'executor_name', 'run_name', 'dataset', 'dataset_sha256', 'cache_dir', 'refresh_dataset', 'search', 'n_jobs', 'halving_factor', 'no_features_cache']
 
     # Filtrer les données
-    dataset_url = "https://full-stack-assets.s3.eu-west-3.amazonaws.com/Deployment/get_around_pricing_project.csv"
-    dataset = load_data(dataset_url)
+    dataset = load_dataset(args.dataset, cache_dir=args.cache_dir, sha256=args.dataset_sha256, refresh=args.refresh_dataset)
 
     # Filter data
     print("Filtering data...")
@@ -139,30 +217,39 @@ def main():
     with mlflow.start_run() as run:
         mlflow.set_tag("executor_name", args.executor_name)
 
-        param_grid = {key: getattr(args, key) for key in vars(args) if getattr(args, key) is not None and key not in ['cv', 'regressor', 'executor_name']}
+        param_grid = {key: getattr(args, key) for key in vars(args) if getattr(args, key) is not None and key not in non_grid_args}
         
         # Déterminer si GridSearchCV est nécessaire
         grid_search_done = False
         if args.regressor == 'LR':
             model = LinearRegression()
         else: # Si un modèle peut avoir des hyperparamètres à optimiser, utiliser GridSearch avec validation croisée
-            regressor_args = {option: parameters for option, parameters in vars(args).items() if (parameters is not None and option not in ['cv', 'regressor'])}
+            regressor_args = {option: parameters for option, parameters in vars(args).items() if (parameters is not None and option not in non_grid_args)}
             regressor_params = {param_name: values for param_name, values in regressor_args.items()}
             if args.regressor == 'Ridge':
                 regressor = Ridge()
             elif args.regressor == 'RF':
                 regressor = RandomForestRegressor()
-            model = GridSearchCV(regressor, param_grid=regressor_params, cv=args.cv, verbose=3)
+            model = create_search(regressor, regressor_params, cv=args.cv, search=args.search, n_jobs=args.n_jobs,
+                                  factor=args.halving_factor)
             grid_search_done = True
 
         # Configuration du pipeline
+        start_time = time.perf_counter()
         predictor, model = train_model(X_train, Y_train, X_test, Y_test, args.regressor,
                                        param_grid=param_grid if param_grid else None,
-                                       cv=args.cv if grid_search_done else None)
+                                       cv=args.cv if grid_search_done else None,
+                                       search=args.search, n_jobs=args.n_jobs, factor=args.halving_factor,
+                                       features_cache_dir=None if args.no_features_cache else args.cache_dir)
+        mlflow.log_metric("training_wall_time", time.perf_counter() - start_time)
 
-        # Enregistrer les meilleurs paramètres pour GridSearch
-        if isinstance(model, GridSearchCV):
+        # Enregistrer les meilleurs paramètres et le temps passé sur chaque candidat
+        if hasattr(model, 'best_params_'):
             mlflow.log_params({f"best_param_{key}": value for key, value in model.best_params_.items()})
+            mlflow.set_tag("search", type(model).__name__)
+            timings_file = f"{args.regressor}_search_timings.csv"
+            candidate_timings(model).to_csv(timings_file, index=False)
+            mlflow.log_artifact(timings_file)
 
         # Faire des prédictions sur les ensembles d'entraînement et de test
         print("Making predictions...")